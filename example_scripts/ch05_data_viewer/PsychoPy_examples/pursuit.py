@@ -4,17 +4,30 @@
 #
 # Description:
 # A simple smooth pursuit task implemented in PsychoPy
+#
+# The TARGET_POS message of each screen refresh is sent through a
+# MessageQueue (see message_queue.py in the parent folder), from a
+# background thread, timestamped at the flip. Set MEASURE_DROPS to True to
+# run each trial twice, with the messages sent in the loop and through the
+# queue, and print the frame drop rates of the two.
 
 import pylink
 import os
+import sys
 import random
 from psychopy import visual, core, event, monitors
 from EyeLinkCoreGraphicsPsychoPy import EyeLinkCoreGraphicsPsychoPy
 from math import sin, pi
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             '..'))
+from message_queue import MessageQueue, DropCounter
 
 # Monitor resolution
 SCN_WIDTH, SCN_HEIGHT = (1280, 800)
 
+# Compare the frame drop rates with and without the message queue
+MEASURE_DROPS = False
+
 # Step 1: Connect to the tracker
 tk = pylink.EyeLink('100.1.1.1')
 
@@ -59,6 +72,10 @@ pylink.openGraphicsEx(graphics)
 target = visual.GratingStim(win, tex=None, mask='circle', size=25)
 pursuitClock = core.Clock()
 
+# Count the dropped frames, by the refresh interval measured by PsychoPy
+drops = DropCounter(win.monitorFramePeriod or 1/60.0)
+drop_rates = {False: [], True: []}
+
 # Paramters for the Sinusoidal movement pattern
 # [amp_x, amp_y, phase_x, phase_y, freq_x, freq_y]
 mov_pars = [
@@ -79,11 +96,12 @@ tk.doTrackerSetup()
 
 # Step 7: Run through a couple of trials
 # here we define a function to group the code that will executed on each trial
-def run_trial(trial_duration, movement_pars):
+def run_trial(trial_duration, movement_pars, queued=True):
     """ Run a smooth pursuit trial
 
     trial_duration: the duration of the pursuit movement
     movement_pars: [ amp_x, amp_y, phase_x, phase_y, freq_x, freq_y]
+    queued: send the TARGET_POS messages through the message queue
     The Sinusoidal movement pattern is determined by the following equation
     y(t) = amplitude * sin(frequency * t + phase)
     for a circular or elliptical movements, the phase in x and y directions
@@ -121,6 +139,11 @@ def run_trial(trial_duration, movement_pars):
 
     # Send a message to mark movement onset
     tk.sendMessage('Movement_onset')
+
+    # The messages are timestamped with the flip time, by the clock
+    # of win.flip()
+    mq = MessageQueue(tk, clock=core.getTime, threaded=queued)
+    drops.reset()
     while True:
         time_elapsed = pursuitClock.getTime()
         if time_elapsed >= trial_duration:
@@ -130,9 +153,15 @@ def run_trial(trial_duration, movement_pars):
             tar_y = amp_y*sin(freq_y * time_elapsed + phase_y)
             target.pos = (tar_x, tar_y)
             target.draw()
-            win.flip()
+            t_flip = win.flip()
+            drops.flip(core.getTime() if t_flip is None else t_flip)
             tar_pos = (tar_x + int(SCN_WIDTH/2), int(SCN_HEIGHT/2)-tar_y)
-            tk.sendMessage('!V TARGET_POS target %d, %d 1 0' % tar_pos)
+            mq.send('!V TARGET_POS target %d, %d 1 0' % tar_pos, t_flip)
+
+    # Wait for the queued messages to go out, before calling the
+    # tracker again
+    mq.close()
+    drop_rates[queued].append(drops.rate())
 
     # Send a message to mark movement offset
     tk.sendMessage('Movement_offset')
@@ -151,6 +180,8 @@ def run_trial(trial_duration, movement_pars):
     tk.sendMessage("!V TRIAL_VAR freq_x %.2f" % freq_x)
     tk.sendMessage("!V TRIAL_VAR freq_y %.2f" % freq_y)
     tk.sendMessage("!V TRIAL_VAR duration %.2f" % trial_duration)
+    tk.sendMessage("!V TRIAL_VAR msg_queue %d" % queued)
+    tk.sendMessage("!V TRIAL_VAR dropped_frames %d" % drops.dropped)
 
     # Send a 'TRIAL_RESULT' message to mark the end of trial
     tk.sendMessage('TRIAL_RESULT')
@@ -160,8 +191,19 @@ def run_trial(trial_duration, movement_pars):
 test_list = mov_pars[:]
 random.shuffle(test_list)
 for trial in test_list:
+    if MEASURE_DROPS:
+        # run the trial with the messages sent in the loop, then queued
+        run_trial(5.0, trial, queued=False)
     run_trial(5.0, trial)
 
+# Print the frame drop rates, with and without the queue
+if MEASURE_DROPS:
+    for queued in [False, True]:
+        rates = drop_rates[queued]
+        print('Messages %s: %.2f%% frames dropped' %
+              (['sent in the loop', 'queued'][queued],
+               sum(rates)/len(rates)*100))
+
 # Step 8: Close the EDF data file and put the tracker in idle mode
 tk.closeDataFile()
 tk.setOfflineMode()
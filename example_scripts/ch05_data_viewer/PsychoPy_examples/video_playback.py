@@ -4,17 +4,30 @@
 #
 # Description:
 # Play video and record eye movements in Psychopy
+#
+# The two messages of each video frame are sent through a MessageQueue
+# (see message_queue.py in the parent folder), from a background thread,
+# timestamped at the flip that showed the frame. Set MEASURE_DROPS to True
+# to play each video twice, with the messages sent in the loop and through
+# the queue, and print the frame drop rates of the two.
 
 import pylink
 import os
+import sys
 import random
 from psychopy import visual, core, event, monitors
 from EyeLinkCoreGraphicsPsychoPy import EyeLinkCoreGraphicsPsychoPy
 from psychopy.constants import STOPPED, PLAYING
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             '..'))
+from message_queue import MessageQueue, DropCounter
 
 # Screen resolution
 SCN_WIDTH, SCN_HEIGHT = (1280, 800)
 
+# Compare the frame drop rates with and without the message queue
+MEASURE_DROPS = False
+
 # SETP 1: Connect to the tracker
 tk = pylink.EyeLink('100.1.1.1')
 
@@ -71,9 +84,15 @@ trials = [
     ]
 
 
+# Count the dropped frames, by the refresh interval measured by PsychoPy
+drops = DropCounter(win.monitorFramePeriod or 1/60.0)
+drop_rates = {False: [], True: []}
+
+
 # Here we define a helper function to group the code executed on each trial
-def run_trial(pars):
-    """ pars corresponds to a row in the trial list"""
+def run_trial(pars, queued=True):
+    """ pars corresponds to a row in the trial list
+    queued: send the VFRAME messages through the message queue"""
 
     # Retrieve parameters from the trial list
     trial_num, movie_file = pars
@@ -111,13 +130,19 @@ def run_trial(pars):
     mov_x = int(SCN_WIDTH/2 - mo_width/2)
     mov_y = int(SCN_HEIGHT/2 - mo_height/2)
 
+    # The messages are timestamped with the flip time, by the clock
+    # of win.flip()
+    mq = MessageQueue(tk, clock=core.getTime, threaded=queued)
+    drops.reset()
+
     # play the video till the end
     frame_n = 0
     prev_frame_timestamp = mov.getCurrentFrameTime()
     while mov.status is not STOPPED:
         # draw a movie frame and flip the video buffer
         mov.draw()
-        win.flip()
+        t_flip = win.flip()
+        drops.flip(core.getTime() if t_flip is None else t_flip)
 
         # if a new frame is drawn, check frame timestamp and
         # send a VFRAME message
@@ -125,14 +150,19 @@ def run_trial(pars):
         if current_frame_timestamp != prev_frame_timestamp:
             frame_n += 1
             # send a message to mark the onset of each video frame
-            tk.sendMessage('Video_Frame: %d' % frame_n)
+            mq.send('Video_Frame: %d' % frame_n, t_flip)
             # VFRAME message: "!V VFRAME frame_num movie_pos_x,
             # movie_pos_y, path_to_movie_file"
             m_path = '../' + movie_file
             msg = "!V VFRAME %d %d %d %s" % (frame_n, mov_x, mov_y, m_path)
-            tk.sendMessage(msg)
+            mq.send(msg, t_flip)
             prev_frame_timestamp = current_frame_timestamp
 
+    # Wait for the queued messages to go out, before calling the
+    # tracker again
+    mq.close()
+    drop_rates[queued].append(drops.rate())
+
     # Send a message to mark video playback end
     tk.sendMessage("Video_terminates")
 
@@ -143,6 +173,10 @@ def run_trial(pars):
     # Stop recording
     tk.stopRecording()
 
+    # Log the dropped frames, and whether the message queue was used
+    tk.sendMessage('!V TRIAL_VAR msg_queue %d' % queued)
+    tk.sendMessage('!V TRIAL_VAR dropped_frames %d' % drops.dropped)
+
     # Send a'TRIAL_RESULT' message to mark the end of trial
     tk.sendMessage('TRIAL_RESULT')
 
@@ -150,8 +184,19 @@ def run_trial(pars):
 test_list = trials[:]
 random.shuffle(test_list)
 for trial in test_list:
+    if MEASURE_DROPS:
+        # play the video with the messages sent in the loop, then queued
+        run_trial(trial, queued=False)
     run_trial(trial)
 
+# Print the frame drop rates, with and without the queue
+if MEASURE_DROPS:
+    for queued in [False, True]:
+        rates = drop_rates[queued]
+        print('Messages %s: %.2f%% frames dropped' %
+              (['sent in the loop', 'queued'][queued],
+               sum(rates)/len(rates)*100))
+
 # Step 7: Close the EDF data file and put the tracker in idle mode
 tk.closeDataFile()
 tk.setOfflineMode()
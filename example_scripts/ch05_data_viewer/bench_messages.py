@@ -0,0 +1,101 @@
+# Filename: bench_messages.py
+# Author: Zhiguo Wang
+# Date: 10/18/2026
+#
+# Description:
+# Compare the frame drop rates of a display loop that sends two messages
+# per frame (e.g., Video_Frame and VFRAME), with the messages sent in the
+# loop, or through a MessageQueue (message_queue.py). No tracker or
+# PsychoPy needed: the flips are simulated by waiting for the next
+# refresh, and SlowLink stands in for the tracker, with sendMessage()
+# calls that take a while, and now and then a lot longer. SlowLink also
+# keeps the time each message arrived, so we can check that the arrival
+# time minus the offset, the message time in the EDF data file, is the
+# time of the flip.
+#
+# Usage:
+# python bench_messages.py
+
+import random
+import time
+from message_queue import MessageQueue, DropCounter
+
+REFRESH_RATES = [60, 144]
+DURATION = 5.0  # secs per run
+DRAW_TIME = 0.5  # proportion of the frame period spent drawing
+SEND_TIME = 0.0015  # secs per sendMessage() call
+SLOW_SEND = (0.02, 0.008)  # 2% of the calls take 8 ms
+
+
+class SlowLink(object):
+    '''A stand-in for pylink.EyeLink, with a slow sendMessage()'''
+
+    def __init__(self, seed=1):
+        self.rng = random.Random(seed)
+        self.messages = []  # (arrival time, message)
+
+    def sendMessage(self, message):
+        # the message arrives at once, the call returns a while later
+        self.messages.append((time.perf_counter(), message))
+        p, slow = SLOW_SEND
+        time.sleep(slow if self.rng.random() < p else SEND_TIME)
+        return 0
+
+
+def busy(secs):
+    '''Keep the CPU busy, like drawing a frame'''
+
+    t_end = time.perf_counter() + secs
+    while time.perf_counter() < t_end:
+        pass
+
+
+def run(rate, threaded):
+    '''Run the display loop for DURATION secs; return the DropCounter and
+    the largest error (ms) of the message times'''
+
+    period = 1.0/rate
+    tk = SlowLink()
+    mq = MessageQueue(tk, threaded=threaded)
+    drops = DropCounter(period)
+    flips = {}
+
+    t_start = time.perf_counter()
+    t_refresh = t_start
+    frame_n = 0
+    while t_refresh - t_start < DURATION:
+        # draw, then "flip" at the next refresh
+        busy(period*DRAW_TIME)
+        now = time.perf_counter()
+        t_refresh += period*max(1, int((now - t_refresh)/period) + 1)
+        time.sleep(max(t_refresh - time.perf_counter(), 0))
+        t_flip = time.perf_counter()
+        drops.flip(t_flip)
+
+        frame_n += 1
+        flips[frame_n] = t_flip
+        mq.send('Video_Frame: %d' % frame_n, t_flip)
+        mq.send('!V VFRAME %d 160 130 ../Seoul.mp4' % frame_n, t_flip)
+    mq.close()
+
+    # message time in the EDF = arrival time - offset
+    error = 0.0
+    for t_arrival, msg in tk.messages:
+        offset, text = msg.split(' ', 1)
+        if text.startswith('Video_Frame'):
+            t_flip = flips[int(text.split()[1])]
+            t_edf = t_arrival - int(offset)/1000.0
+            error = max(error, abs(t_edf - t_flip)*1000.0)
+    return drops, error, mq.max_offset
+
+
+if __name__ == '__main__':
+    print('%5s  %8s  %7s  %8s  %7s  %12s  %11s' %
+          ('Hz', 'messages', 'frames', 'dropped', 'rate', 'time error',
+           'max offset'))
+    for rate in REFRESH_RATES:
+        for threaded in [False, True]:
+            drops, error, max_offset = run(rate, threaded)
+            print('%5d  %8s  %7d  %8d  %6.1f%%  %9.2f ms  %8d ms' %
+                  (rate, ['in loop', 'queued'][threaded], drops.frames,
+                   drops.dropped, drops.rate()*100, error, max_offset))
@@ -0,0 +1,148 @@
+# Filename: message_queue.py
+# Author: Zhiguo Wang
+# Date: 10/18/2026
+#
+# Description:
+# Send the messages of a high-rate loop (e.g., a VFRAME message for every
+# video frame, or a TARGET_POS message for every screen refresh) from a
+# background thread, so the display loop does not wait for the link. Each
+# message is timestamped locally, e.g., with the time of the flip returned
+# by win.flip() in PsychoPy, and sent with a time offset, "offset message",
+# the time (in ms) that passed between the flip and the sendMessage() call.
+# The Host subtracts the offset from the time the message arrives, so the
+# message is at the time of the flip in the EDF data file, however long it
+# waited in the queue. The thread sends all the messages that piled up
+# while it was busy, one after another, then waits for the next one.
+#
+# pylink is not meant to be called from two threads at once; call flush()
+# before any other link call (e.g., stopRecording()) in the main thread.
+#
+# DropCounter counts the dropped frames from the flip times, so a script
+# can compare the frame drop rates with and without the queue.
+#
+# Usage:
+# mq = MessageQueue(tk, clock=core.getTime)  # the clock of win.flip()
+# t_flip = win.flip()
+# mq.send('!V VFRAME %d %d %d %s' % (frame_n, x, y, path), t_flip)
+# mq.flush()  # before calling the tracker again
+# mq.close()
+
+import threading
+import time
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+
+class MessageQueue(object):
+    '''Send messages to the tracker from a background thread, with a time
+    offset, so they are timestamped at the time they were queued for'''
+
+    def __init__(self, tk, clock=time.perf_counter, threaded=True):
+        '''tk: a connected pylink.EyeLink
+        clock: the clock of the timestamps, in seconds
+        threaded: send the messages from a background thread; if False,
+        send() sends them at once, e.g., to compare the two'''
+
+        self.tk = tk
+        self.clock = clock
+        self.threaded = threaded
+        self.sent = 0  # number of messages sent
+        self.max_offset = 0  # the largest offset so far, in ms
+        self._queue = queue.Queue()
+        self._thread = None
+        if threaded:
+            self._thread = threading.Thread(target=self._run)
+            self._thread.daemon = True
+            self._thread.start()
+
+    def send(self, msg, t=None):
+        '''Send a message, timestamped at t (by the clock, e.g., the time
+        of a flip); now, if t is None'''
+
+        if t is None:
+            t = self.clock()
+        if self._thread is None:
+            self._send(t, msg)
+        else:
+            self._queue.put((t, msg))
+
+    def flush(self):
+        '''Wait until all the queued messages are sent'''
+
+        if self._thread is not None:
+            self._queue.join()
+
+    def close(self):
+        '''Send the queued messages, and stop the thread'''
+
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def _send(self, t, msg):
+        # The offset is always included, so a message that starts with a
+        # number is not mistaken for one with an offset
+        offset = max(int(round((self.clock() - t)*1000.0)), 0)
+        self.tk.sendMessage('%d %s' % (offset, msg))
+        self.sent += 1
+        if offset > self.max_offset:
+            self.max_offset = offset
+
+    def _run(self):
+        q = self._queue
+        while True:
+            item = q.get()
+            # send the messages that piled up, then wait for the next one
+            batch = [item]
+            while item is not None:
+                try:
+                    item = q.get_nowait()
+                except queue.Empty:
+                    break
+                batch.append(item)
+            for item in batch:
+                if item is not None:
+                    self._send(*item)
+                q.task_done()
+            if batch[-1] is None:
+                return
+
+
+class DropCounter(object):
+    '''Count the dropped frames of a display loop from the flip times'''
+
+    def __init__(self, frame_period, threshold=1.5):
+        '''frame_period: the refresh interval, in secs, e.g.,
+        win.monitorFramePeriod in PsychoPy
+        threshold: a frame interval longer than threshold*frame_period
+        means one or more frames were dropped'''
+
+        self.frame_period = frame_period
+        self.threshold = threshold
+        self.reset()
+
+    def reset(self):
+        '''Start counting again'''
+
+        self.frames = 0  # the frames shown
+        self.dropped = 0  # the frames dropped
+        self.t_last = None
+
+    def flip(self, t):
+        '''Count a flip, at time t (secs)'''
+
+        if self.t_last is not None:
+            interval = t - self.t_last
+            if interval > self.threshold*self.frame_period:
+                self.dropped += int(round(interval/self.frame_period)) - 1
+        self.frames += 1
+        self.t_last = t
+
+    def rate(self):
+        '''The proportion of frames dropped'''
+
+        total = self.frames + self.dropped
+        return self.dropped/float(total) if total else 0.0
@@ -42,13 +42,18 @@
 
 
 from __future__ import print_function
-from psychopy import visual, event, core, sound
-from numpy import linspace
-from math import sin, cos, pi
-from PIL import Image
-import array, string, pylink, os
+from psychopy import visual, event, sound
+import string, pylink, os, sys, numpy
+# the backend-neutral base, kept in one place, ch07_advanced_topics
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'ch07_advanced_topics'))
+from EyeLinkCoreGraphicsBase import EyeLinkCoreGraphicsBase, PYLINK_KEYS, DrawingPool, lozenge_vertices
+
+class EyeLinkCoreGraphicsPsychoPy(EyeLinkCoreGraphicsBase):
+    # PsychoPy key names -> pylink key codes, the special keys and the letters
+    keyMap = dict(PYLINK_KEYS, **dict((k, ord(k)) for k in string.ascii_letters))
+    # PsychoPy shows the first row of an image array at the bottom
+    bottomUp = True
 
-class EyeLinkCoreGraphicsPsychoPy(pylink.EyeLinkCustomDisplay):
     def __init__(self, tracker, win):
         
         '''Initialize a Custom EyeLinkCoreGraphics  
@@ -56,7 +61,7 @@ class EyeLinkCoreGraphicsPsychoPy(pylink.EyeLinkCustomDisplay):
         tracker: an eye-tracker instance
         win: the Psychopy display we plan to use for stimulus presentation  '''
         
-        pylink.EyeLinkCustomDisplay.__init__(self)
+        EyeLinkCoreGraphicsBase.__init__(self)
         
         self.pylinkMinorVer = pylink.__version__.split('.')[1] # minor version 1-Mac, 11-Win/Linux
         self.display = win
@@ -76,10 +81,7 @@ class EyeLinkCoreGraphicsPsychoPy(pylink.EyeLinkCustomDisplay):
         self.__target_beep__done__ = sound.Sound('E', octave=4, secs=0.1)
         self.__target_beep__error__ = sound.Sound('E', octave=6, secs=0.1)
         
-        self.imgBuffInitType = 'I'
-        self.imagebuffer = array.array(self.imgBuffInitType)
-        self.resizeImagebuffer = array.array(self.imgBuffInitType)
-        self.pal = None
+        self.imgStim = None # a single ImageStim to show the camera image
         self.bg_color = win.color
         self.img_scaling_factor = 3
         self.size = (192*self.img_scaling_factor, 160*self.img_scaling_factor)
@@ -104,9 +106,13 @@ class EyeLinkCoreGraphicsPsychoPy(pylink.EyeLinkCustomDisplay):
                                         'Up/Down: Pupil threshold\n' + 
                                         'Alt+arrows: Search limit')
         
-        # lines for drawing cross hair etc.
-        self.line = visual.Line(self.display, start=(0, 0), end=(0,0),
-                                lineWidth=2.0, lineColor=[0,0,0], units='pix')
+        # lines and lozenges for drawing cross hair etc., reused from one camera
+        # frame to the next (see draw_overlay)
+        self.linePool = DrawingPool(lambda: visual.Line(self.display, start=(0, 0), end=(0,0),
+                                                        lineWidth=2.0, lineColor=[0,0,0], units='pix'))
+        self.lozengePool = DrawingPool(lambda: visual.ShapeStim(self.display, vertices=[(0, 0)]*3,
+                                                                lineWidth=2.0, closeShape=True, units='pix'))
+        self.overlayPools = [self.linePool, self.lozengePool]
 
         self.calTarget = 'default' # could be 'default', 'rotatingCheckerboard', 'movie'
         self.animatedTarget = False # this is like a switch, when it's turned on the animated target is displayed
@@ -195,16 +201,6 @@ class EyeLinkCoreGraphicsPsychoPy(pylink.EyeLinkCustomDisplay):
         if beepid in [pylink.CAL_GOOD_BEEP, pylink.DC_GOOD_BEEP]:
             self.__target_beep__done__.play()
 
-    def getColorFromIndex(self, colorindex):
-         '''Return psychopy colors for elements in the camera image'''
-         
-         if colorindex   ==  pylink.CR_HAIR_COLOR:          return (1, 1, 1)
-         elif colorindex ==  pylink.PUPIL_HAIR_COLOR:       return (1, 1, 1)
-         elif colorindex ==  pylink.PUPIL_BOX_COLOR:        return (-1, 1, -1)
-         elif colorindex ==  pylink.SEARCH_LIMIT_BOX_COLOR: return (1, -1, -1)
-         elif colorindex ==  pylink.MOUSE_CURSOR_COLOR:     return (1, -1, -1)
-         else:                                              return (0,0,0)
-
     def draw_line(self, x1, y1, x2, y2, colorindex):
         '''Draw a line. This is used for drawing crosshairs/squares'''
         
@@ -214,11 +210,13 @@ class EyeLinkCoreGraphicsPsychoPy(pylink.EyeLinkCustomDisplay):
         x1 = (+x1  - self.size[0]/2)* self.img_scaling_factor 
         y2 = (-y2  + self.size[1]/2)* self.img_scaling_factor 
         x2 = (+x2  - self.size[0]/2)* self.img_scaling_factor 
-        color = self.getColorFromIndex(colorindex)
-        self.line.start     = (x1, y1)
-        self.line.end       = (x2, y2)
-        self.line.lineColor = color
-        self.line.draw()
+        # reuse the line drawn at the same point of the previous frame
+        line, changed = self.linePool.get((x1, y1, x2, y2, colorindex))
+        if changed:
+            line.start     = (x1, y1)
+            line.end       = (x2, y2)
+            line.lineColor = self.getColorFromIndex(colorindex)
+        line.draw()
 
     def draw_lozenge(self, x, y, width, height, colorindex):
         ''' draw a lozenge to show the defined search limits
@@ -231,25 +229,14 @@ class EyeLinkCoreGraphicsPsychoPy(pylink.EyeLinkCustomDisplay):
         height = height* self.img_scaling_factor
         y = (-y + self.size[1]/2)* self.img_scaling_factor 
         x = (+x - self.size[0]/2)* self.img_scaling_factor       
-        color = self.getColorFromIndex(colorindex)
-        
-        if width > height:
-            rad = height / 2
-            if rad == 0: return #cannot draw the circle with 0 radius
-            Xs1 = [rad*cos(t) + x + rad for t in linspace(pi/2, pi/2+pi, 72)]
-            Ys1 = [rad*sin(t) + y - rad for t in linspace(pi/2, pi/2+pi, 72)]
-            Xs2 = [rad*cos(t) + x - rad + width for t in linspace(pi/2+pi, pi/2+2*pi, 72)]
-            Ys2 = [rad*sin(t) + y - rad for t in linspace(pi/2+pi, pi/2+2*pi, 72)]
-        else:
-            rad = width / 2
-            if rad == 0: return #cannot draw sthe circle with 0 radius
-            Xs1 = [rad*cos(t) + x + rad for t in linspace(0, pi, 72)]
-            Ys1 = [rad*sin(t) + y - rad for t in linspace(0, pi, 72)]
-            Xs2 = [rad*cos(t) + x + rad for t in linspace(pi, 2*pi, 72)]
-            Ys2 = [rad*sin(t) + y + rad - height for t in linspace(pi, 2*pi, 72)]
-
-        lozenge = visual.ShapeStim(self.display, vertices = list(zip(Xs1+Xs2, Ys1+Ys2)),
-                                    lineWidth=2.0, lineColor=color, closeShape=True, units='pix')    
+        if min(width, height) <= 0: return #cannot draw the circle with 0 radius
+
+        # reuse the ShapeStim drawn at the same point of the previous frame, and
+        # only update it if the lozenge has changed
+        lozenge, changed = self.lozengePool.get((x, y, width, height, colorindex))
+        if changed:
+            lozenge.vertices = lozenge_vertices(x, y, width, height)
+            lozenge.lineColor = self.getColorFromIndex(colorindex)
         lozenge.draw()
 
     def get_mouse_state(self):
@@ -285,43 +272,7 @@ class EyeLinkCoreGraphicsPsychoPy(pylink.EyeLinkCustomDisplay):
             self.calibTar.draw()
             self.display.flip()
 
-        ky=[]
-        for keycode, modifier in event.getKeys(modifiers=True):
-            k= pylink.JUNK_KEY
-            if keycode   == 'f1': k = pylink.F1_KEY
-            elif keycode == 'f2': k = pylink.F2_KEY
-            elif keycode == 'f3': k = pylink.F3_KEY
-            elif keycode == 'f4': k = pylink.F4_KEY
-            elif keycode == 'f5': k = pylink.F5_KEY
-            elif keycode == 'f6': k = pylink.F6_KEY
-            elif keycode == 'f7': k = pylink.F7_KEY
-            elif keycode == 'f8': k = pylink.F8_KEY
-            elif keycode == 'f9': k = pylink.F9_KEY
-            elif keycode == 'f10': k = pylink.F10_KEY
-            elif keycode == 'pageup': k = pylink.PAGE_UP
-            elif keycode == 'pagedown': k = pylink.PAGE_DOWN
-            elif keycode == 'up': k = pylink.CURS_UP
-            elif keycode == 'down': k = pylink.CURS_DOWN
-            elif keycode == 'left': k = pylink.CURS_LEFT
-            elif keycode == 'right': k = pylink.CURS_RIGHT
-            elif keycode == 'backspace': k = ord('\b')
-            elif keycode == 'return': k = pylink.ENTER_KEY
-            elif keycode == 'space': k = ord(' ')
-            elif keycode == 'escape': k = pylink.ESC_KEY
-            elif keycode == 'tab': k = ord('\t')
-            elif keycode in string.ascii_letters: k = ord(keycode)
-            elif k== pylink.JUNK_KEY: k = 0
-
-            # plus/equal & minux signs for CR adjustment
-            if keycode in ['num_add', 'equal']: k = ord('+')
-            if keycode in ['num_subtract', 'minus']: k = ord('-')
-
-            if modifier['alt']==True: mod = 256
-            else: mod = 0
-            
-            ky.append(pylink.KeyInput(k, mod))
-            #event.clearEvents()
-        return ky
+        return EyeLinkCoreGraphicsBase.get_input_key(self)
 
     def exit_image_display(self):
         '''Clcear the camera image'''
@@ -342,46 +293,41 @@ class EyeLinkCoreGraphicsPsychoPy(pylink.EyeLinkCustomDisplay):
         self.size = (width, height)
         self.title.autoDraw = True
         self.calibInst.autoDraw=True
+        self.reset_frame_count()
         
     def image_title(self, text):
         '''Draw title text below the camera image'''
         
         self.title.text = text
         
-    def draw_image_line(self, width, line, totlines, buff):
-        '''Display image pixel by pixel, line by line'''
+    def poll_keys(self):
+        '''Return the key presses, with the alt key as the modifier'''
 
-        self.size = (width, totlines)
+        return [(keycode, 256 if modifier['alt'] else 0)
+                for keycode, modifier in event.getKeys(modifiers=True)]
 
-        i =0
-        for i in range(width):
-            try: self.imagebuffer.append(self.pal[buff[i]])
-            except: pass
-            
-        if line == totlines:
-            bufferv = self.imagebuffer.tostring()
-            img = Image.frombytes("RGBX", (width, totlines), bufferv) # Pillow
-            imgResize = img.resize((width*self.img_scaling_factor, totlines*self.img_scaling_factor))
-            imgResizeVisual = visual.ImageStim(self.display, image=imgResize, units='pix')
-            imgResizeVisual.draw()
-            self.draw_cross_hair()
-            self.display.flip()
-            self.imagebuffer = array.array(self.imgBuffInitType)
-            
-            
-    def set_image_palette(self, r,g,b):
-        '''Given a set of RGB colors, create a list of 24bit numbers representing the pallet.
-        I.e., RGB of (1,64,127) would be saved as 82047, or the number 00000001 01000000 011111111'''
-        
-        self.imagebuffer = array.array(self.imgBuffInitType)
-        self.resizeImagebuffer = array.array(self.imgBuffInitType)
-        #self.clear_cal_display()
-        sz = len(r)
-        i =0
-        self.pal = []
-        while i < sz:
-            rf = int(b[i])
-            gf = int(g[i])
-            bf = int(r[i])
-            self.pal.append((rf<<16) | (gf<<8) | (bf))
-            i = i+1
+    def make_color(self, rgba):
+        '''Convert a color from 0-255 RGBA to PsychoPy RGB (-1 to 1)'''
+
+        return tuple(c/127.5 - 1.0 for c in rgba[:3])
+
+    def make_palette(self, rgb):
+        '''The palette lookup table, with the colors from -1 to 1 as PsychoPy expects'''
+
+        return rgb.astype(numpy.float32)/127.5 - 1.0
+
+    def new_image(self, width, height):
+        '''Create a single ImageStim for the camera image, once per image size'''
+
+        self.imgStim = visual.ImageStim(self.display, image=self.frame, units='pix',
+                                        size=(width*self.img_scaling_factor, height*self.img_scaling_factor))
+
+    def show_image(self, frame):
+        '''Draw the camera image, i.e., upload the new frame to the existing texture;
+        PsychoPy shows the first row of an array at the bottom, see bottomUp'''
+
+        self.size = (frame.shape[1], frame.shape[0])
+        self.imgStim.image = frame
+        self.imgStim.draw()
+        self.draw_overlay()
+        self.display.flip()
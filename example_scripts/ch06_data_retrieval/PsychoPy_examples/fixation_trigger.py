@@ -3,12 +3,25 @@
 # Date: 11/7/2020
 #
 # Description:
-# A fixation trigger implemented in PsychoPy
-
+# A fixation trigger implemented in PsychoPy; the samples waiting in
+# the link queue are retrieved in one call (see event_drain.py in the
+# parent folder), and the gaze is checked sample by sample against an
+# interest area around the fixation dot (see region_trigger.py), rather
+# than waiting for the FIXUPDATE events of the Host, which only arrive
+# every 50 ms
+
+import os
+import sys
 import pylink
 from EyeLinkCoreGraphicsPsychoPy import EyeLinkCoreGraphicsPsychoPy
 from psychopy import visual, core, event, monitors
-from math import hypot
+from psychopy.tools.monitorunittools import deg2pix
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             '..'))
+from event_drain import drain_link
+from region_trigger import Region, RegionTrigger
+
+SAMPLE_RATE = 1000  # sampling rate of the tracker
 
 # Connect to the tracker
 tk = pylink.EyeLink('100.1.1.1')
@@ -16,11 +29,11 @@ tk = pylink.EyeLink('100.1.1.1')
 # Open an EDF data file on the Host PC
 tk.openDataFile('psychopy.edf')
 
-# Make all types of events  available over the link, especially the
-# FIXUPDATE event, which report the current status of a fixation at
-# predefined intervals (default: 50 ms)
-event_flags = 'LEFT,RIGHT,FIXATION,FIXUPDATE,SACCADE,BLINK,BUTTON,INPUT'
-tk.sendCommand('link_event_filter = %s' % event_flags)
+# Set the sampling rate, and make the gaze samples available over the
+# link, for the gaze trigger
+tk.sendCommand('sample_rate %d' % SAMPLE_RATE)
+sample_flags = 'LEFT,RIGHT,GAZE,GAZERES,PUPIL,HREF,AREA,STATUS,INPUT'
+tk.sendCommand('link_sample_data  = %s' % sample_flags)
 
 # Open a window in PsychoPy
 SCN_WIDTH, SCN_HEIGHT = (800, 600)
@@ -30,13 +43,16 @@ mon.setSizePix((SCN_WIDTH, SCN_HEIGHT))
 win = visual.Window((SCN_WIDTH, SCN_HEIGHT), monitor=mon, fullscr=False,
                     color=[0, 0, 0], units='pix', allowStencil=True)
 
+# 1 deg = ? pixels
+ppd = deg2pix(1.0, mon)
+
 # Use the PsychoPy window to present calibration targets
 genv = EyeLinkCoreGraphicsPsychoPy(tk, win)
 pylink.openGraphicsEx(genv)
 
 # Calibrate the tracker
 calib_prompt = 'Press ENTER twice to calibrate the tracker'
-calib_msg = visual.TextStim(win, text=promp)
+calib_msg = visual.TextStim(win, text=calib_prompt)
 calib_msg.draw()
 win.flip()
 event.waitKeys()
@@ -65,32 +81,20 @@ for i in range(3):
     # a minimum of 300 ms)
     # fixation dot position in reference to the top-left screen corner
     fix_dot_x, fix_dot_y = (SCN_WIDTH/2.0, SCN_HEIGHT/2.0)
-    triggered = False
-    fixation_start_time = -32768
+    # an interest area within 1.5 deg of the fixation dot
+    r = ppd*1.5
+    fix_ia = Region(1, 'ELLIPSE', (fix_dot_x - r, fix_dot_y - r,
+                                   fix_dot_x + r, fix_dot_y + r), 'fix_dot')
+    # set the "triggered" flag once the gaze has stayed in the interest
+    # area for 300 ms
+    triggered = []
+    trigger = RegionTrigger([fix_ia], dwell=300,
+                            on_dwell=lambda ia, t, t0: triggered.append(t))
     while not triggered:
-        # Check if any new events are available
-        dt = tk.getNextData()
-        if dt > 0:
-            ev = tk.getFloatData()
-            if dt == pylink.FIXUPDATE:
-                # Update the fixation start time
-                if fixation_start_time < 0:
-                    fixation_start_time = ev.getStartTime()
-
-                # How much time has elapsed within the current fixation
-                fixation_duration = ev.getEndTime() - fixation_start_time
-
-                # Check if the average gaze position
-                gaze_x, gaze_y = ev.getAverageGaze()
-                gaze_error = hypot(gaze_x-fix_dot_x, gaze_y-fix_dot_y)
-
-                # 1 deg = ? pixels in the current fixation
-                ppd = (ev.getStartPPD() + ev.getEndPPD())/2.0
-
-                # Break if the duration of the fixation is > 300 ms and
-                # the gaze position is close to the fixation dot (< 1.5 deg)
-                if fixation_duration >= 300 and gaze_error < ppd*1.5:
-                    triggered = True
+        # Retrieve all the samples in the link queue, and pass them
+        # to the trigger
+        batch = drain_link(tk)
+        trigger.update(batch['samples'])
 
     # Show the image for 2 secs
     img.draw()
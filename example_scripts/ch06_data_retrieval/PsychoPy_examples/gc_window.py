@@ -3,11 +3,33 @@
 # Date: 11/7/2020
 #
 # Description:
-# A gaze-contingent window task implemented in PsychoPy
-
+# A gaze-contingent window task implemented in PsychoPy. The samples are
+# retrieved in a background thread (see sample_ring.py in the parent
+# folder), so the display loop never waits for the link. The latency of
+# each frame, i.e., how old the sample is at the flip, is logged (see
+# frame_latency.py) and reported at the end.
+#
+# Optionally, the window is positioned at the gaze position predicted for
+# the time of the flip (see gaze_predictor.py), rather than the newest
+# sample; set PREDICTION to 'linear' or 'kalman' to turn this on. The
+# prediction error is reported at the end, next to the error of using the
+# newest sample. During blinks, the window is moved off the screen (to the
+# missing data position) if prediction is off, as before; with prediction
+# on, it stays at the last valid gaze position.
+
+import os
+import sys
 import pylink
 from EyeLinkCoreGraphicsPsychoPy import EyeLinkCoreGraphicsPsychoPy
 from psychopy import visual, core, event, monitors
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             '..'))
+from sample_ring import SampleAcquisition, MISSING
+from frame_latency import FrameLatency
+from gaze_predictor import GazePredictor
+
+# Gaze prediction: None (use the newest sample), 'linear', or 'kalman'
+PREDICTION = None
 
 # Connect to the tracker
 tk = pylink.EyeLink('100.1.1.1')
@@ -33,7 +55,7 @@ pylink.openGraphicsEx(genv)
 
 # Calibrate the tracker
 calib_prompt = 'Press ENTER twice to calibrate the tracker'
-calib_msg = visual.TextStim(win, text=promp)
+calib_msg = visual.TextStim(win, text=calib_prompt)
 calib_msg.draw()
 win.flip()
 event.waitKeys()
@@ -47,8 +69,20 @@ gaze_window.enabled = True
 img = visual.ImageStim(win, image='woods.jpg',
                        size=(SCN_WIDTH, SCN_HEIGHT))
 
-# start recording
+# start recording, and retrieve the samples in a background thread
 tk.startRecording(1, 1, 1, 1)
+acq = SampleAcquisition(tk)
+acq.start()
+
+# Log the timing of each frame
+# (trackerTimeUsec() is called while the thread is running, so share its
+# link lock)
+lat = FrameLatency(tk, clock=core.getTime, lock=acq.lock)
+
+# Predict the gaze position at the next flip
+predictor = GazePredictor(PREDICTION)
+frame_period = win.monitorFramePeriod
+i = 0  # index of the next sample to read from the ring buffer
 
 # show the image indefinitely until a key is pressed
 gaze_pos = (-32768, -32768)
@@ -59,24 +93,44 @@ while not terminate:
     if event.getKeys():
         terminate = True
 
-    # Check for new samples
-    dt = tk.getNewestSample()
-    if dt is not None:
-        if dt.isRightSample():
-            gaze_pos = dt.getRightEye().getGaze()
-        elif dt.isLeftSample():
-            gaze_pos = dt.getLeftEye().getGaze()
+    # Get the new samples from the ring buffer
+    samples, i = acq.ring.since(i)
+    predictor.update(samples)
+    newest = predictor.newest
+    blink = predictor.in_blink
+    if blink:
+        # log the time of the sample without gaze data
+        lat.retrieved(predictor.last_time, missing=True)
+    else:
+        lat.retrieved(None if newest is None else newest[0])
+
+    # Predict the gaze position at the flip (the newest valid sample if
+    # prediction is off, or during blinks)
+    pos = predictor.predict(lat.next_flip(frame_period))
+    if blink and PREDICTION is None:
+        gaze_pos = (MISSING, MISSING)
+    elif pos is not None:
+        gaze_pos = pos
 
     # Draw the background image
+    lat.draw_start()
     img.draw()
     # Update the window with the current gaze position
     gaze_window.pos = (gaze_pos[0]-SCN_WIDTH/2,
                        SCN_HEIGHT/2-gaze_pos[1])
+    # Log the flip time
+    win.callOnFlip(lat.flipped)
     win.flip()
 
-# Stop recording
+# Stop the acquisition thread and stop recording
+acq.stop()
 tk.stopRecording()
 
+# Report the frame latencies, and save the frame log
+lat.report()
+lat.save('gc_window_latency.npy')
+predictor.report()
+
 # Close EDF and the link
 tk.closeDataFile()
 
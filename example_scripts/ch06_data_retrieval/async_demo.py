@@ -0,0 +1,78 @@
+# Filename: async_demo.py
+# Author: Zhiguo Wang
+# Date: 10/18/2026
+#
+# Description:
+# A short script illustrating the asyncio front-end (async_link.py). While
+# recording, one task counts the samples, another one prints out the
+# saccades, and a third one sends a message to the tracker once a second;
+# none of them blocks the others.
+#
+# Usage:
+# python async_demo.py  (connect to the tracker at 100.1.1.1)
+# python async_demo.py --dummy  (pylink dummy mode, no tracker needed)
+# python async_demo.py --sim  (simulated tracker, see tracker_sim.py)
+
+import sys
+import asyncio
+import pylink
+from async_link import AsyncEyeLink
+from tracker_sim import SimulatedEyeLink
+
+
+async def count_samples(samples):
+    '''Count the samples, until recording stops'''
+
+    n = 0
+    async for smp in samples:
+        n += 1
+    print('Retrieved %d samples' % n)
+
+
+async def print_saccades(events):
+    '''Print out the amplitude of each saccade'''
+
+    async for table, ev in events:
+        if table == 'saccades' and ev['type'] == pylink.ENDSACC:
+            print('Saccade at %d, %.1f deg' % (ev['time'], ev['amplitude']))
+
+
+async def heartbeat(link, duration=5.0):
+    '''Send a message to the tracker once a second, then stop recording'''
+
+    for i in range(int(duration)):
+        await asyncio.sleep(1.0)
+        await link.send_message('HEARTBEAT %d' % i)
+    await link.stop_recording()
+
+
+async def main(tk):
+    link = AsyncEyeLink(tk)
+    await link.open_data_file('async.edf')
+    await link.send_command('sample_rate 1000')
+
+    # Subscribe to the streams before recording starts, so no data
+    # is missed
+    tasks = [count_samples(link.samples()), print_saccades(link.events())]
+    error = await link.start_recording(1, 1, 1, 1)
+    if error:
+        print('startRecording() failed, error code: %d' % error)
+        for task in tasks:
+            task.close()
+    else:
+        await asyncio.gather(heartbeat(link), *tasks)
+
+    await link.close_data_file()
+    await link.receive_data_file('async.edf', 'async.edf')
+    await link.close()
+
+
+if __name__ == '__main__':
+    # Connect to the tracker, or open a dummy connection, or simulate one
+    if '--dummy' in sys.argv:
+        tk = pylink.EyeLink(None)
+    elif '--sim' in sys.argv:
+        tk = SimulatedEyeLink(sample_rate=1000)
+    else:
+        tk = pylink.EyeLink('100.1.1.1')
+    asyncio.run(main(tk))
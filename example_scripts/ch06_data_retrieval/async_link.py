@@ -0,0 +1,164 @@
+# Filename: async_link.py
+# Author: Zhiguo Wang
+# Date: 10/18/2026
+#
+# Description:
+# An asyncio front-end for a tracker connection, so an experiment can wait
+# for the tracker, the keyboard, and the network at the same time. All
+# pylink calls run on one dedicated executor thread, in the order they are
+# made, so the event loop never blocks on the link. While recording, the
+# link data queue is drained (see event_drain.py) on that thread, and the
+# samples and events are handed out through "async for" streams.
+#
+# Usage:
+# link = AsyncEyeLink(pylink.EyeLink('100.1.1.1'))
+# await link.start_recording()
+# async for smp in link.samples():  # ends when recording stops
+#     print(smp['time'], smp['gaze_x'], smp['gaze_y'])
+# await link.stop_recording()  # in another task
+# await link.receive_data_file('test.edf', 'test.edf')
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from event_drain import drain_link
+
+# The event tables returned by drain_link()
+EVENT_TABLES = ['fixations', 'saccades', 'blinks']
+
+
+class AsyncEyeLink(object):
+    '''Awaitable methods and async streams for a pylink.EyeLink'''
+
+    def __init__(self, tk, poll_interval=0.001):
+        '''tk: a connected pylink.EyeLink (or a simulated tracker)
+        poll_interval: how long to wait (in secs) before draining the
+        link queue again, when it was found empty'''
+
+        self.tk = tk
+        self.poll_interval = poll_interval
+        # One thread, so the link calls never run concurrently
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._subscribers = {'samples': [], 'events': []}
+        self._pump_task = None
+        self._recording = False
+
+    async def call(self, func, *args, **kwargs):
+        '''Run a (blocking) function on the link thread, and await it'''
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, functools.partial(func, *args, **kwargs))
+
+    # Awaitable versions of the pylink.EyeLink methods
+    async def send_command(self, command):
+        return await self.call(self.tk.sendCommand, command)
+
+    async def send_message(self, message):
+        return await self.call(self.tk.sendMessage, message)
+
+    async def tracker_time(self):
+        return await self.call(self.tk.trackerTime)
+
+    async def open_data_file(self, edf_name):
+        return await self.call(self.tk.openDataFile, edf_name)
+
+    async def close_data_file(self):
+        return await self.call(self.tk.closeDataFile)
+
+    async def receive_data_file(self, src, dest):
+        '''Download the EDF data file from the Host; this can take a few
+        seconds, the event loop keeps running meanwhile'''
+
+        return await self.call(self.tk.receiveDataFile, src, dest)
+
+    async def start_recording(self, file_samples=1, file_events=1,
+                              link_samples=1, link_events=1):
+        '''Start recording, and start draining the link data queue;
+        return the error code of startRecording()'''
+
+        error = await self.call(self.tk.startRecording, file_samples,
+                                file_events, link_samples, link_events)
+        if not error:
+            self._recording = True
+            self._pump_task = asyncio.ensure_future(self._pump())
+        return error
+
+    async def stop_recording(self):
+        '''Stop recording; the streams end after the data left in the
+        link queue have been handed out'''
+
+        error = await self.call(self.tk.stopRecording)
+        self._recording = False
+        if self._pump_task is not None:
+            await self._pump_task
+            self._pump_task = None
+        return error
+
+    async def close(self):
+        '''Close the link, and shut down the link thread'''
+
+        if self._recording:
+            await self.stop_recording()
+        await self.call(self.tk.close)
+        self._executor.shutdown()
+
+    def samples(self):
+        '''An async iterator of the samples (see sample_ring.SAMPLE_DTYPE)
+        retrieved from now on, until recording stops'''
+
+        return self._stream('samples')
+
+    def events(self):
+        '''An async iterator of (table, event) tuples, e.g., ('saccades',
+        an event record, see event_drain.py), in time order, until
+        recording stops'''
+
+        return self._stream('events')
+
+    def _stream(self, kind):
+        '''Subscribe to a stream now, so no data is missed between this
+        call and the first iteration'''
+
+        queue = asyncio.Queue()
+        self._subscribers[kind].append(queue)
+
+        async def stream():
+            try:
+                while True:
+                    item = await queue.get()
+                    if item is None:  # recording stopped
+                        return
+                    yield item
+            finally:
+                self._subscribers[kind].remove(queue)
+
+        return stream()
+
+    async def _pump(self):
+        '''Drain the link queue on the link thread, and hand the data
+        out to the subscribers, until recording stops'''
+
+        while True:
+            recording = self._recording
+            batch = await self.call(drain_link, self.tk)
+
+            events = [(ev['time'], table, ev) for table in EVENT_TABLES
+                      for ev in batch[table]]
+            events.sort(key=lambda item: item[0])
+            for queue in self._subscribers['samples']:
+                for smp in batch['samples']:
+                    queue.put_nowait(smp)
+            for queue in self._subscribers['events']:
+                for t, table, ev in events:
+                    queue.put_nowait((table, ev))
+
+            if not recording:
+                break  # the last drain after recording stopped
+            if len(batch['samples']) == 0 and not events:
+                await asyncio.sleep(self.poll_interval)
+
+        # Tell the streams that there is no more data
+        for queues in self._subscribers.values():
+            for queue in queues:
+                queue.put_nowait(None)
@@ -0,0 +1,118 @@
+# Filename: bench_detector.py
+# Author: Zhiguo Wang
+# Date: 10/18/2026
+#
+# Description:
+# Benchmark the online fixation/saccade detector (online_detector.py) on a
+# synthetic 2000 Hz gaze stream (tracker_sim.py). We report
+# - the processing time per sample, for both algorithms;
+# - the number of saccades detected, out of those in the stream;
+# - the decision latency, i.e., the time from the start of a saccade to
+#   its detection, versus the time the Host's ENDSACC event would be
+#   available; and the time from the start of a fixation to its
+#   detection, versus the first FIXUPDATE event.
+#
+# Usage:
+# python bench_detector.py
+
+import time
+import numpy as np
+import pylink
+from online_detector import OnlineDetector
+from sample_ring import SAMPLE_DTYPE
+from tracker_sim import SyntheticGaze
+
+RATE = 2000  # sampling rate
+DURATION = 60000.0  # duration of the gaze stream, in ms
+PPD = 35.0  # pixels per degree
+
+
+def make_stream():
+    '''Return the samples (see SAMPLE_DTYPE) and events of a stream'''
+
+    stream = SyntheticGaze(RATE, ppd=PPD, seed=1)
+    stream.extend(DURATION)
+    samples = np.zeros(len(stream.t), dtype=SAMPLE_DTYPE)
+    samples['time'] = stream.t
+    samples['gaze_x'] = stream.x
+    samples['gaze_y'] = stream.y
+    samples['pupil'] = stream.pupil
+    return samples, stream.events
+
+
+def cost_per_sample(samples, method):
+    '''Time the detector, return the cost per sample in microseconds'''
+
+    det = OnlineDetector(PPD, RATE, method,
+                         on_fixation_start=lambda fix: None,
+                         on_fixation_update=lambda fix: None,
+                         on_saccade_start=lambda sac: None,
+                         on_saccade_end=lambda sac: None)
+    t0 = time.perf_counter()
+    det.update(samples)
+    return (time.perf_counter() - t0)/len(samples)*1e6
+
+
+def detection_times(samples, method):
+    '''Feed the samples one at a time, return the times of the samples at
+    which saccade and fixation starts were detected'''
+
+    detected = {'saccade': [], 'fixation': []}
+    t_now = [0.0]
+    det = OnlineDetector(
+        PPD, RATE, method,
+        on_saccade_start=lambda sac: detected['saccade'].append(t_now[0]),
+        on_fixation_start=lambda fix: detected['fixation'].append(t_now[0]))
+    for t, x, y, pupil in zip(samples['time'].tolist(),
+                              samples['gaze_x'].tolist(),
+                              samples['gaze_y'].tolist(),
+                              samples['pupil'].tolist()):
+        t_now[0] = t
+        det.feed(t, x, y, pupil)
+    return {key: np.array(value) for key, value in detected.items()}
+
+
+def latencies(starts, detected, tolerance=20.0, max_latency=100.0):
+    '''Match each true start with the first detection after it (or just
+    before it, within "tolerance" ms), return the latencies of the
+    matches'''
+
+    i = np.searchsorted(detected, starts - tolerance)
+    ok = i < len(detected)
+    lat = detected[i[ok]] - starts[ok]
+    return lat[lat <= max_latency]
+
+
+if __name__ == '__main__':
+    samples, events = make_stream()
+    # The true event starts, and the time the Host events would be
+    # available over the link
+    sac_start = np.array([ev.getStartTime() for t, dt, ev in events
+                          if dt == pylink.STARTSACC])
+    endsacc = np.array([t - ev.getStartTime() for t, dt, ev in events
+                        if dt == pylink.ENDSACC])
+    fix_start = np.array([ev.getStartTime() for t, dt, ev in events
+                          if dt == pylink.STARTFIX])
+    first_update = {}
+    for t, dt, ev in events:
+        if dt == pylink.FIXUPDATE:
+            first_update.setdefault(ev.getStartTime(), t - ev.getStartTime())
+    fixupdate = np.array(list(first_update.values()))
+
+    print('%d samples at %d Hz, %d saccades, %d fixations' %
+          (len(samples), RATE, len(sac_start), len(fix_start)))
+    print('Host events: ENDSACC %.1f ms after saccade start (median), '
+          'first FIXUPDATE %.1f ms after fixation start' %
+          (np.median(endsacc), np.median(fixupdate)))
+    for method in ['ivt', 'idt']:
+        cost = cost_per_sample(samples, method)
+        detected = detection_times(samples, method)
+        sac_lat = latencies(sac_start, detected['saccade'])
+        fix_lat = latencies(fix_start, detected['fixation'])
+        print('%s: %.2f us/sample (%.1f%% of a CPU at %d Hz); '
+              '%d saccades detected' %
+              (method, cost, cost*RATE/1e4, RATE, len(detected['saccade'])))
+        print('    saccade onset after %.1f ms (median), %.1f ms (95%%); '
+              'fixation start after %.1f ms (median), %.1f ms (95%%)' %
+              (np.median(sac_lat), np.percentile(sac_lat, 95),
+               np.median(fix_lat), np.percentile(fix_lat, 95)))
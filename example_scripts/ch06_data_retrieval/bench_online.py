@@ -0,0 +1,134 @@
+# Filename: bench_online.py
+# Author: Zhiguo Wang
+# Date: 10/18/2026
+#
+# Description:
+# Latency and throughput tests of the online data retrieval code, run
+# against the simulated tracker (tracker_sim.py), so no tracker is needed.
+# For each sampling rate, we measure
+# - the share of samples missed by a main loop that polls
+#   getNewestSample() (as in the earlier version of retrieve_samples.py),
+#   versus one that reads from the ring buffer filled by
+#   SampleAcquisition (sample_ring.py), while the loop is busy drawing;
+# - the cost per item of retrieving the link data queue one item at a
+#   time with an if-chain, versus drain_link() (event_drain.py).
+#
+# Usage:
+# python bench_online.py
+
+import time
+import pylink
+from event_drain import drain_link, start_fixation, fixation, \
+    start_saccade, end_saccade, start_blink, end_blink
+from sample_ring import SampleAcquisition, sample_record
+from tracker_sim import SimulatedEyeLink
+
+RATES = [250, 500, 1000, 2000]  # sampling rates to test
+DURATION = 2.0  # duration of each test, in secs
+WORK = 0.005  # simulated drawing time per main loop iteration, in secs
+
+
+def poll_newest(tk):
+    '''Poll getNewestSample() in the main loop, count the new samples'''
+
+    n = 0
+    smp_time = -1
+    t_end = time.perf_counter() + DURATION
+    while time.perf_counter() < t_end:
+        smp = tk.getNewestSample()
+        if smp is not None and smp.getTime() > smp_time:
+            smp_time = smp.getTime()
+            n += 1
+        time.sleep(WORK)  # drawing
+    return n
+
+
+def read_ring(tk):
+    '''Read all new samples from the ring buffer in the main loop'''
+
+    acq = SampleAcquisition(tk)
+    acq.start()
+    n = 0
+    i = 0
+    t_end = time.perf_counter() + DURATION
+    while time.perf_counter() < t_end:
+        smp, i = acq.ring.since(i)
+        n += len(smp)
+        time.sleep(WORK)  # drawing
+    acq.stop()
+    return n + len(acq.ring.since(i)[0])
+
+
+def missed(tk, loop):
+    '''Run a main loop while recording, return the share of samples that
+    the loop missed'''
+
+    tk.startRecording(1, 1, 1, 1)
+    t_start = tk.trackerTimeUsec()/1000.0
+    n = loop(tk)
+    duration = tk.trackerTimeUsec()/1000.0 - t_start
+    tk.stopRecording()
+    # The samples that were available over the link during the test
+    n_total = sum(1 for t in tk._stream.t if t + tk.link_delay <= duration)
+    return 1.0 - float(n)/n_total
+
+
+def if_chain(tk):
+    '''Retrieve the link data queue one item at a time, with a chain of
+    if statements, as in the earlier version of retrieve_events.py; the
+    data are converted into the same tuples as in drain_link()'''
+
+    rows = []
+    while True:
+        dt = tk.getNextData()
+        if not dt:
+            break
+        ev = tk.getFloatData()
+        if dt == pylink.SAMPLE_TYPE:
+            rows.append(sample_record(ev))
+        if dt == pylink.STARTSACC:
+            rows.append(start_saccade(dt, ev))
+        if dt == pylink.ENDSACC:
+            rows.append(end_saccade(dt, ev))
+        if dt == pylink.STARTFIX:
+            rows.append(start_fixation(dt, ev))
+        if dt == pylink.FIXUPDATE or dt == pylink.ENDFIX:
+            rows.append(fixation(dt, ev))
+        if dt == pylink.STARTBLINK:
+            rows.append(start_blink(dt, ev))
+        if dt == pylink.ENDBLINK:
+            rows.append(end_blink(dt, ev))
+    return len(rows)
+
+
+def bulk_drain(tk):
+    '''Retrieve the link data queue with drain_link()'''
+
+    batch = drain_link(tk)
+    return sum(len(rows) for rows in batch.values())
+
+
+def cost_per_item(tk, drain):
+    '''Let the link queue fill up for 1 sec, then time draining it,
+    return the cost per item in microseconds'''
+
+    tk.startRecording(1, 1, 1, 1)
+    time.sleep(1.0)
+    t0 = time.perf_counter()
+    n = drain(tk)
+    t = time.perf_counter() - t0
+    tk.stopRecording()
+    return t/n*1e6
+
+
+if __name__ == '__main__':
+    print('Main loop busy for %d ms per iteration, %.1f secs per test' %
+          (WORK*1000, DURATION))
+    print('%6s  %14s  %14s  %16s  %16s' %
+          ('rate', 'missed (poll)', 'missed (ring)', 'us/item (if)',
+           'us/item (drain)'))
+    for rate in RATES:
+        tk = SimulatedEyeLink(sample_rate=rate, seed=1)
+        print('%6d  %13.1f%%  %13.1f%%  %16.2f  %16.2f' %
+              (rate, missed(tk, poll_newest)*100, missed(tk, read_ring)*100,
+               cost_per_item(tk, if_chain), cost_per_item(tk, bulk_drain)))
@@ -0,0 +1,122 @@
+# Filename: bench_regions.py
+# Author: Zhiguo Wang
+# Date: 10/18/2026
+#
+# Description:
+# Benchmark the region lookup of region_trigger.py. For 10 to 1000 random
+# interest areas (rectangles, ellipses, and freehand polygons) on a
+# 1920 x 1080 screen, we time the lookup of random gaze positions in the
+# grid index, versus testing every region in turn; and the cost per
+# sample of RegionTrigger on a synthetic gaze stream (tracker_sim.py).
+# The regions are either tiled (no overlap, e.g., words on a page), or
+# placed at random (overlapping, a harder case, as each gaze position
+# falls in several regions).
+#
+# Usage:
+# python bench_regions.py
+
+import time
+import numpy as np
+from region_trigger import Region, GridIndex, RegionTrigger
+from sample_ring import SAMPLE_DTYPE
+from tracker_sim import SyntheticGaze
+
+SCN_WIDTH, SCN_HEIGHT = (1920, 1080)
+N_REGIONS = [10, 100, 1000]
+N_POINTS = 200000
+
+
+def random_regions(n, rng, tiled=False):
+    '''Return n regions of random shape, size, and position; if tiled,
+    each region is in its own tile of the screen'''
+
+    n_cols = int(np.ceil(np.sqrt(n*SCN_WIDTH/SCN_HEIGHT)))
+    tile_w = SCN_WIDTH/float(n_cols)
+    tile_h = SCN_HEIGHT/float(np.ceil(n/float(n_cols)))
+    regions = []
+    for i in range(n):
+        if tiled:
+            w, h = tile_w*rng.uniform(0.5, 1.0), tile_h*rng.uniform(0.5, 1.0)
+            x = (i % n_cols)*tile_w + rng.uniform(0, tile_w - w)
+            y = (i // n_cols)*tile_h + rng.uniform(0, tile_h - h)
+        else:
+            w, h = rng.uniform(40, 200, 2)
+            x = rng.uniform(0, SCN_WIDTH - w)
+            y = rng.uniform(0, SCN_HEIGHT - h)
+        shape = ['RECTANGLE', 'ELLIPSE', 'FREEHAND'][i % 3]
+        if shape == 'FREEHAND':
+            # a star-shaped polygon with 8 to 16 vertices
+            k = rng.integers(8, 17)
+            angle = np.sort(rng.uniform(0, 2*np.pi, k))
+            radius = rng.uniform(0.5, 1.0, k)
+            coords = list(zip(x + w/2*(1 + radius*np.cos(angle)),
+                              y + h/2*(1 + radius*np.sin(angle))))
+        else:
+            coords = (x, y, x + w, y + h)
+        regions.append(Region(i + 1, shape, coords, 'ia%d' % (i + 1)))
+    return regions
+
+
+def linear_scan(regions, x, y):
+    '''Test every region, the baseline'''
+
+    return tuple(r for r in regions if r.contains(x, y))
+
+
+def time_lookup(lookup, points):
+    '''Return the time per lookup, in microseconds'''
+
+    t0 = time.perf_counter()
+    for x, y in points:
+        lookup(x, y)
+    return (time.perf_counter() - t0)/len(points)*1e6
+
+
+def gaze_samples(duration=60000.0):
+    '''Return the samples (see SAMPLE_DTYPE) of a synthetic gaze stream'''
+
+    stream = SyntheticGaze(1000, SCN_WIDTH, SCN_HEIGHT, seed=1)
+    stream.extend(duration)
+    samples = np.zeros(len(stream.t), dtype=SAMPLE_DTYPE)
+    samples['time'] = stream.t
+    samples['gaze_x'] = stream.x
+    samples['gaze_y'] = stream.y
+    samples['pupil'] = stream.pupil
+    return samples
+
+
+if __name__ == '__main__':
+    rng = np.random.default_rng(1)
+    points = list(zip(rng.uniform(0, SCN_WIDTH, N_POINTS).tolist(),
+                      rng.uniform(0, SCN_HEIGHT, N_POINTS).tolist()))
+    samples = gaze_samples()
+
+    print('Lookup time per point, and trigger time per sample, in us')
+    print('%7s  %7s  %10s  %8s  %8s  %8s' %
+          ('layout', 'regions', 'build (ms)', 'scan', 'grid', 'trigger'))
+    for tiled, n in [(tiled, n) for tiled in [True, False]
+                     for n in N_REGIONS]:
+        regions = random_regions(n, rng, tiled)
+        t0 = time.perf_counter()
+        index = GridIndex(regions)
+        build = (time.perf_counter() - t0)*1000.0
+
+        # The grid must agree with the linear scan
+        for x, y in points[:10000]:
+            assert (set(index.lookup(x, y)) ==
+                    set(linear_scan(regions, x, y)))
+
+        t_scan = time_lookup(lambda x, y: linear_scan(regions, x, y),
+                             points[:N_POINTS//max(n//10, 1)])
+        t_grid = time_lookup(index.lookup, points)
+
+        trigger = RegionTrigger(regions, on_enter=lambda r, t: None,
+                                on_exit=lambda r, t: None,
+                                on_dwell=lambda r, t, t_enter: None)
+        t0 = time.perf_counter()
+        trigger.update(samples)
+        t_trigger = (time.perf_counter() - t0)/len(samples)*1e6
+
+        print('%7s  %7d  %10.1f  %8.3f  %8.3f  %8.3f' %
+              (['random', 'tiled'][tiled], n, build, t_scan, t_grid,
+               t_trigger))
@@ -0,0 +1,188 @@
+# Filename: event_drain.py
+# Author: Zhiguo Wang
+# Date: 10/18/2026
+#
+# Description:
+# Retrieve everything in the link data queue in one call. Rather than
+# calling getNextData() and getFloatData() for one event at a time, then
+# working through a chain of "if dt == pylink.X" checks, drain_link() looks
+# up the converter of each data type in a table, collects compact tuples,
+# and returns one NumPy structured array per event type, e.g., all the
+# saccades that were waiting in the queue.
+#
+# Usage:
+# from event_drain import drain_link, events_of, ENDSACC
+# batch = drain_link(tk)  # tk, a connected pylink.EyeLink
+# for sac in events_of(batch, 'saccades', ENDSACC):
+#     print(sac['amplitude'], sac['peak_vel'])
+
+from math import hypot
+import numpy as np
+import pylink
+from sample_ring import sample_record, SAMPLE_DTYPE
+
+# Data types, as returned by getNextData()
+STARTBLINK, ENDBLINK = pylink.STARTBLINK, pylink.ENDBLINK
+STARTSACC, ENDSACC = pylink.STARTSACC, pylink.ENDSACC
+STARTFIX, ENDFIX = pylink.STARTFIX, pylink.ENDFIX
+FIXUPDATE = pylink.FIXUPDATE
+
+# The fields of each event table, times are in ms; gaze is the start gaze
+# position for STARTFIX, the average gaze position for ENDFIX and FIXUPDATE
+FIXATION_DTYPE = np.dtype([('type', np.int16), ('eye', np.int8),
+                           ('time', np.float64), ('start', np.float64),
+                           ('end', np.float64),
+                           ('gaze_x', np.float32), ('gaze_y', np.float32),
+                           ('ppd_x', np.float32), ('ppd_y', np.float32),
+                           ('pupil', np.float32)])
+SACCADE_DTYPE = np.dtype([('type', np.int16), ('eye', np.int8),
+                          ('time', np.float64), ('start', np.float64),
+                          ('end', np.float64),
+                          ('start_x', np.float32), ('start_y', np.float32),
+                          ('end_x', np.float32), ('end_y', np.float32),
+                          ('amplitude', np.float32), ('angle', np.float32),
+                          ('avg_vel', np.float32), ('peak_vel', np.float32),
+                          ('start_href_x', np.float32),
+                          ('start_href_y', np.float32),
+                          ('end_href_x', np.float32),
+                          ('end_href_y', np.float32),
+                          ('start_ppd_x', np.float32),
+                          ('start_ppd_y', np.float32),
+                          ('end_ppd_x', np.float32), ('end_ppd_y', np.float32),
+                          ('start_vel', np.float32), ('end_vel', np.float32)])
+BLINK_DTYPE = np.dtype([('type', np.int16), ('eye', np.int8),
+                        ('time', np.float64), ('start', np.float64),
+                        ('end', np.float64)])
+
+NAN = float('nan')
+
+
+def start_fixation(dt, ev):
+    '''STARTFIX, the gaze position and pupil size at fixation onset'''
+
+    start = ev.getStartTime()
+    return ((dt, ev.getEye(), ev.getTime(), start, start) +
+            tuple(ev.getStartGaze()) + tuple(ev.getStartPPD()) +
+            (ev.getStartPupilSize(),))
+
+
+def fixation(dt, ev):
+    '''ENDFIX and FIXUPDATE, the average gaze position and pupil size'''
+
+    ppd_x0, ppd_y0 = ev.getStartPPD()
+    ppd_x1, ppd_y1 = ev.getEndPPD()
+    return ((dt, ev.getEye(), ev.getTime(), ev.getStartTime(),
+             ev.getEndTime()) + tuple(ev.getAverageGaze()) +
+            ((ppd_x0 + ppd_x1)/2.0, (ppd_y0 + ppd_y1)/2.0,
+             ev.getAveragePupilSize()))
+
+
+def start_saccade(dt, ev):
+    '''STARTSACC, the end point is not known yet'''
+
+    start = ev.getStartTime()
+    return ((dt, ev.getEye(), ev.getTime(), start, start) +
+            tuple(ev.getStartGaze()) + (NAN,)*16)
+
+
+def end_saccade(dt, ev):
+    '''ENDSACC, the amplitude is in degrees, the velocities in deg/sec'''
+
+    return ((dt, ev.getEye(), ev.getTime(), ev.getStartTime(),
+             ev.getEndTime()) + tuple(ev.getStartGaze()) +
+            tuple(ev.getEndGaze()) +
+            (hypot(*ev.getAmplitude()), ev.getAngle(),
+             ev.getAverageVelocity(), ev.getPeakVelocity()) +
+            tuple(ev.getStartHREF()) + tuple(ev.getEndHREF()) +
+            tuple(ev.getStartPPD()) + tuple(ev.getEndPPD()) +
+            (ev.getStartVelocity(), ev.getEndVelocity()))
+
+
+def start_blink(dt, ev):
+    '''STARTBLINK'''
+
+    start = ev.getStartTime()
+    return (dt, ev.getEye(), ev.getTime(), start, start)
+
+
+def end_blink(dt, ev):
+    '''ENDBLINK'''
+
+    return (dt, ev.getEye(), ev.getTime(), ev.getStartTime(),
+            ev.getEndTime())
+
+
+def sample(dt, smp):
+    '''A sample, same fields as in the sample ring'''
+
+    return sample_record(smp)
+
+
+# The dispatch table, data type -> (table name, converter)
+CONVERTERS = {STARTFIX: ('fixations', start_fixation),
+              ENDFIX: ('fixations', fixation),
+              FIXUPDATE: ('fixations', fixation),
+              STARTSACC: ('saccades', start_saccade),
+              ENDSACC: ('saccades', end_saccade),
+              STARTBLINK: ('blinks', start_blink),
+              ENDBLINK: ('blinks', end_blink),
+              pylink.SAMPLE_TYPE: ('samples', sample)}
+
+# The dtype of each table
+TABLES = {'fixations': FIXATION_DTYPE,
+          'saccades': SACCADE_DTYPE,
+          'blinks': BLINK_DTYPE,
+          'samples': SAMPLE_DTYPE}
+
+
+def drain_link(tk, max_items=None, samples=True):
+    '''Retrieve all the data in the link queue, return a dict with one
+    structured array per table (see TABLES), in the order received, and
+    an 'other' list with the (data type, data) of everything else, e.g.,
+    button and input events
+
+    tk: a connected pylink.EyeLink (or EyeLinkListener)
+    max_items: stop after this many items, None to empty the queue
+    samples: set to False to skip the samples'''
+
+    rows = {table: [] for table in TABLES}
+    other = []
+
+    # Local names save an attribute lookup per item
+    get_next_data = tk.getNextData
+    get_float_data = tk.getFloatData
+    get_converter = CONVERTERS.get
+    append = {table: rows[table].append for table in TABLES}
+    append_sample = rows['samples'].append
+    sample_type = pylink.SAMPLE_TYPE
+    n = 0
+    while max_items is None or n < max_items:
+        dt = get_next_data()
+        if not dt:
+            break
+        n += 1
+        data = get_float_data()
+        # Samples are the bulk of the data, they skip the table lookup
+        if dt == sample_type:
+            if samples:
+                append_sample(sample_record(data))
+            continue
+        converter = get_converter(dt)
+        if converter is None:
+            other.append((dt, data))
+            continue
+        table, convert = converter
+        append[table](convert(dt, data))
+
+    batch = {table: np.array(rows[table], dtype=TABLES[table])
+             for table in TABLES}
+    batch['other'] = other
+    return batch
+
+
+def events_of(batch, table, *types):
+    '''Return the rows of a table with the given data types, e.g.,
+    events_of(batch, 'saccades', ENDSACC)'''
+
+    events = batch[table]
+    return events[np.isin(events['type'], types)]
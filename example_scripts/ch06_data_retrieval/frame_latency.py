@@ -0,0 +1,186 @@
+# Filename: frame_latency.py
+# Author: Zhiguo Wang
+# Date: 10/18/2026
+#
+# Description:
+# Measure how stale the gaze data are when a gaze-contingent display is
+# updated. For every frame, we log the timestamp of the sample used to
+# draw the frame, the time the sample was retrieved, the time drawing
+# started, and the time of the screen flip (in a function registered with
+# win.callOnFlip(), see ch02_psychopy/demo_callOnFlip.py). The sample
+# timestamps are in tracker time, so the offset between the tracker clock
+# and the local clock is measured with trackerTimeUsec() once a second.
+# At the end, we print latency histograms and the number of frames drawn
+# with a repeated (i.e., not new) sample; frames drawn while the gaze data
+# are missing (e.g., during blinks) are counted separately.
+#
+# Note that the flip time is when the frame buffer is swapped; the display
+# adds its own (fixed) delay before the photons come out.
+#
+# Usage:
+# lat = FrameLatency(tk, lock=acq.lock)
+# while ...:
+#     smp = acq.ring.newest()
+#     lat.retrieved(smp['time'])  # sample timestamp, in tracker time
+#     lat.draw_start()
+#     ... draw ...
+#     win.callOnFlip(lat.flipped)
+#     win.flip()
+# lat.report()
+
+import threading
+import time
+import numpy as np
+
+# One record per frame; sample timestamps are in tracker time (ms), the
+# other times are in local time (secs)
+FRAME_DTYPE = np.dtype([('sample_time', np.float64),
+                        ('retrieved', np.float64),
+                        ('draw_start', np.float64),
+                        ('flip', np.float64),
+                        ('offset', np.float64),  # tracker - local time, ms
+                        ('repeated', np.bool_),
+                        ('missing', np.bool_)])  # no gaze data, e.g., blink
+
+
+def text_histogram(values, bin_width=1.0, max_bins=30, width=50):
+    '''Return a histogram of values (ms) as lines of text'''
+
+    values = np.asarray(values)
+    values = values[np.isfinite(values)]
+    if len(values) == 0:
+        return ['  (no data)']
+    lo = np.floor(values.min()/bin_width)*bin_width
+    n_bins = min(int(np.ceil((values.max() - lo)/bin_width)) + 1, max_bins)
+    counts, edges = np.histogram(values, bins=n_bins,
+                                 range=(lo, lo + n_bins*bin_width))
+    # the values beyond the last bin are added to it
+    counts[-1] += np.sum(values >= edges[-1])
+    lines = []
+    for count, edge in zip(counts, edges):
+        bar = '#'*int(round(width*count/counts.max()))
+        lines.append('  %6.1f ms %6d %s' % (edge, count, bar))
+    return lines
+
+
+class FrameLatency(object):
+    '''Log the timing of each frame of a gaze-contingent display'''
+
+    def __init__(self, tk, clock=time.perf_counter, sync_interval=1.0,
+                 capacity=36000, lock=None):
+        '''tk: the tracker connection, for tracker time
+        clock: the local clock (in secs)
+        sync_interval: how often to measure the clock offset, in secs
+        capacity: initial number of frames to allocate (10 min @ 60 Hz)
+        lock: the lock that guards the link, e.g., acq.lock if samples are
+        retrieved by a SampleAcquisition thread (sample_ring.py)'''
+
+        self.tk = tk
+        self.lock = threading.Lock() if lock is None else lock
+        self.clock = clock
+        self.sync_interval = sync_interval
+        self.frames = np.zeros(capacity, dtype=FRAME_DTYPE)
+        self.n = 0  # number of frames logged
+        self.last_sync = -float('inf')
+        self.offset = 0.0
+        self.sync()
+        self._frame = np.zeros(1, dtype=FRAME_DTYPE)[0]
+        self._last_sample = None
+
+    def sync(self):
+        '''Measure the offset between the tracker and the local clock,
+        i.e., tracker time (ms) - local time (ms)'''
+
+        with self.lock:
+            t0 = self.clock()
+            tracker_ms = self.tk.trackerTimeUsec()/1000.0
+            t1 = self.clock()
+        self.offset = tracker_ms - (t0 + t1)/2.0*1000.0
+        self.last_sync = t1
+
+    def retrieved(self, sample_time, missing=False):
+        '''Log the timestamp of the sample used for the current frame, call
+        this right after the sample is retrieved (None if there is no
+        sample yet); set missing to True if the sample has no gaze data,
+        e.g., during blinks, these frames are not counted as repeated'''
+
+        if sample_time is None:
+            sample_time = float('nan')
+        now = self.clock()
+        if now - self.last_sync > self.sync_interval:
+            self.sync()
+            now = self.clock()
+        frame = self._frame
+        frame['sample_time'] = sample_time
+        frame['retrieved'] = now
+        frame['offset'] = self.offset
+        frame['repeated'] = not missing and sample_time == self._last_sample
+        frame['missing'] = missing
+        self._last_sample = sample_time
+
+    def draw_start(self):
+        '''Call this before drawing the frame'''
+
+        self._frame['draw_start'] = self.clock()
+
+    def flipped(self):
+        '''Call this at the flip, i.e., win.callOnFlip(lat.flipped)'''
+
+        self._frame['flip'] = self.clock()
+        if self.n == len(self.frames):
+            self.frames = np.concatenate((self.frames,
+                                          np.zeros_like(self.frames)))
+        self.frames[self.n] = self._frame
+        self.n += 1
+
+    def next_flip(self, frame_period):
+        '''Predict the time of the next flip, in tracker time (ms)
+
+        frame_period: the refresh interval of the monitor, in secs'''
+
+        now = self.clock()
+        if self.n == 0:
+            return (now + frame_period)*1000.0 + self.offset
+        # count whole frames from the last flip
+        t_flip = self.frames['flip'][self.n - 1] + frame_period
+        if t_flip < now:
+            t_flip += np.ceil((now - t_flip)/frame_period)*frame_period
+        return t_flip*1000.0 + self.offset
+
+    def latencies(self):
+        '''Return the latencies (ms) of all frames, i.e., the age of the
+        sample at retrieval, at the start of drawing, and at the flip'''
+
+        f = self.frames[:self.n]
+        # the sample timestamps in local time (ms)
+        sample_local = f['sample_time'] - f['offset']
+        return {'retrieval': f['retrieved']*1000.0 - sample_local,
+                'draw': f['draw_start']*1000.0 - sample_local,
+                'flip': f['flip']*1000.0 - sample_local}
+
+    def report(self, bin_width=1.0):
+        '''Print out the latency histograms and the repeated frames'''
+
+        if self.n == 0:
+            print('No frames logged')
+            return
+        lat = self.latencies()
+        n_repeated = int(np.sum(self.frames['repeated'][:self.n]))
+        n_missing = int(np.sum(self.frames['missing'][:self.n]))
+        print('%d frames, %d (%.1f%%) with a repeated sample, %d (%.1f%%) '
+              'without gaze data' % (self.n, n_repeated,
+                                     100.0*n_repeated/self.n, n_missing,
+                                     100.0*n_missing/self.n))
+        for key, label in [('retrieval', 'Sample age at retrieval'),
+                           ('draw', 'Sample age at the start of drawing'),
+                           ('flip', 'Gaze-to-flip latency')]:
+            values = lat[key]
+            print('%s: median %.2f ms, 95%% %.2f ms, max %.2f ms' %
+                  (label, np.nanmedian(values), np.nanpercentile(values, 95),
+                   np.nanmax(values)))
+            print('\n'.join(text_histogram(values, bin_width)))
+
+    def save(self, filename):
+        '''Save the frame log in a .npy file'''
+
+        np.save(filename, self.frames[:self.n])
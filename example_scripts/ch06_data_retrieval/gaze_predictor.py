@@ -0,0 +1,210 @@
+# Filename: gaze_predictor.py
+# Author: Zhiguo Wang
+# Date: 10/18/2026
+#
+# Description:
+# Predict where the gaze will be when the next frame hits the screen. In a
+# gaze-contingent display, the newest sample is at least one frame plus the
+# link delay old by the time the frame is shown, so the window lags behind
+# the eye during saccades. Here, the recent samples (from the sample ring)
+# are extrapolated to the predicted flip time, either with a line fitted
+# to the last few ms of data ('linear'), or with a constant-velocity Kalman
+# filter ('kalman'). The predictor switches itself off during blinks (and
+# for a short while after), and it logs its prediction error against the
+# samples that arrive later, together with the error of simply using the
+# newest sample, so the two can be compared.
+#
+# Usage:
+# predictor = GazePredictor('linear')
+# samples, i = acq.ring.since(i)
+# predictor.update(samples)  # feed the new samples
+# gaze_x, gaze_y = predictor.predict(t_flip)  # t_flip, in tracker time
+# predictor.report()
+
+from collections import deque
+import numpy as np
+from sample_ring import is_missing
+
+
+class Kalman1D(object):
+    '''A constant-velocity Kalman filter for one coordinate'''
+
+    def __init__(self, process_noise=0.01, measurement_noise=4.0):
+        '''process_noise: variance of the acceleration, (px/ms^2)^2
+        measurement_noise: variance of the gaze noise, px^2'''
+
+        self.q = process_noise
+        self.r = measurement_noise
+        self.reset()
+
+    def reset(self):
+        self.t = None
+        self.pos = 0.0
+        self.vel = 0.0  # px/ms
+        self.p = (1e6, 0.0, 1e6)  # state covariance, p00, p01, p11
+
+    def update(self, t, z):
+        '''Add a measurement z (px) at time t (ms)'''
+
+        if self.t is None:
+            self.t, self.pos, self.vel = t, z, 0.0
+            return
+        dt = t - self.t
+        self.t = t
+
+        # Predict the state at time t
+        pos = self.pos + self.vel*dt
+        p00, p01, p11 = self.p
+        q = self.q
+        p00 += dt*(2*p01 + dt*p11) + q*dt**4/4.0
+        p01 += dt*p11 + q*dt**3/2.0
+        p11 += q*dt*dt
+
+        # Correct it with the measurement
+        s = p00 + self.r
+        k0, k1 = p00/s, p01/s
+        residual = z - pos
+        self.pos = pos + k0*residual
+        self.vel += k1*residual
+        self.p = ((1 - k0)*p00, (1 - k0)*p01, p11 - k1*p01)
+
+    def predict(self, t):
+        return self.pos + self.vel*(t - self.t)
+
+
+class GazePredictor(object):
+    '''Extrapolate the gaze position to a (future) time'''
+
+    def __init__(self, mode='linear', window=10.0, min_velocity=1.0,
+                 max_horizon=40.0, recovery=50.0, max_log=100000):
+        '''mode: 'linear', 'kalman', or None (always use the newest sample)
+        window: the line is fitted to the samples of the last "window" ms
+        min_velocity: extrapolate only if the gaze moves faster than this
+        (px/ms, ~30 deg/s at 35 pixels per degree), so the fixational
+        noise is not extrapolated
+        max_horizon: never extrapolate further than this (ms)
+        recovery: stay off for this long (ms) after missing data
+        max_log: number of prediction errors to keep'''
+
+        if mode not in ['linear', 'kalman', None]:
+            raise ValueError('Unknown prediction mode: %s' % mode)
+        self.mode = mode
+        self.window = window
+        self.min_velocity = min_velocity
+        self.max_horizon = max_horizon
+        self.recovery = recovery
+
+        self.recent = deque()  # (t, x, y) of the last "window" ms
+        self.newest = None  # newest valid sample, (t, x, y)
+        self.last_time = -float('inf')  # newest sample seen
+        self.last_missing = -float('inf')  # newest sample without data
+        self.kalman = (Kalman1D(), Kalman1D())
+
+        # Predictions waiting for the actual gaze position, and the errors
+        # (px) of the predictions and of the newest sample
+        self.pending = deque()
+        self.errors = deque(maxlen=max_log)
+        self.n_predicted = 0
+        self.n_disabled = 0
+
+    @property
+    def active(self):
+        '''False during blinks, and shortly after'''
+
+        return (self.mode is not None and self.newest is not None and
+                self.newest[0] - self.last_missing > self.recovery)
+
+    @property
+    def in_blink(self):
+        '''True if the newest sample has no gaze data, e.g., in a blink'''
+
+        return self.last_missing == self.last_time > -float('inf')
+
+    def update(self, samples):
+        '''Feed new samples (a structured array, see SAMPLE_DTYPE in
+        sample_ring.py); samples already seen are skipped'''
+
+        for t, x, y, pupil in zip(samples['time'].tolist(),
+                                  samples['gaze_x'].tolist(),
+                                  samples['gaze_y'].tolist(),
+                                  samples['pupil'].tolist()):
+            if t <= self.last_time:
+                continue
+            self.last_time = t
+            if is_missing(x, y, pupil):
+                self.last_missing = t
+                self.recent.clear()
+                for kf in self.kalman:
+                    kf.reset()
+                continue
+
+            self.newest = (t, x, y)
+            self.recent.append((t, x, y))
+            while self.recent[0][0] < t - self.window:
+                self.recent.popleft()
+            if self.mode == 'kalman':
+                self.kalman[0].update(t, x)
+                self.kalman[1].update(t, y)
+            self._score(t, x, y)
+
+    def predict(self, t_target):
+        '''Return the predicted gaze position at t_target (tracker time,
+        ms); the newest sample if the predictor is off, None if there
+        are no samples yet'''
+
+        if self.newest is None:
+            return None
+        t, x, y = self.newest
+        if self.mode is None:
+            # log the error of the newest sample only, as a baseline
+            self.pending.append((t_target, x, y, x, y))
+            return (x, y)
+        if not self.active or len(self.recent) < 2:
+            self.n_disabled += 1
+            return (x, y)
+
+        t_target = min(t_target, t + self.max_horizon)
+        if self.mode == 'linear':
+            data = np.array(self.recent)
+            dt = data[:, 0] - t
+            # least-squares line through the recent samples
+            vx, x0 = np.polyfit(dt, data[:, 1], 1)
+            vy, y0 = np.polyfit(dt, data[:, 2], 1)
+        else:
+            vx, x0 = self.kalman[0].vel, self.kalman[0].predict(t)
+            vy, y0 = self.kalman[1].vel, self.kalman[1].predict(t)
+        if np.hypot(vx, vy) < self.min_velocity:
+            vx = vy = 0.0
+        px = x0 + vx*(t_target - t)
+        py = y0 + vy*(t_target - t)
+
+        self.n_predicted += 1
+        self.pending.append((t_target, px, py, x, y))
+        return (px, py)
+
+    def _score(self, t, x, y):
+        '''Compare the predictions for time t with the actual gaze'''
+
+        while self.pending and self.pending[0][0] <= t:
+            t_target, px, py, nx, ny = self.pending.popleft()
+            self.errors.append((np.hypot(px - x, py - y),
+                                np.hypot(nx - x, ny - y)))
+
+    def report(self, ppd=None):
+        '''Print out the prediction error, and the error of using the
+        newest sample; in degrees if ppd (pixels per degree) is given'''
+
+        print('Prediction mode: %s, %d predictions, %d frames with the '
+              'predictor off' % (self.mode, self.n_predicted,
+                                 self.n_disabled))
+        if not self.errors:
+            return
+        errors = np.array(self.errors)
+        unit = 'px'
+        if ppd is not None:
+            errors = errors/ppd
+            unit = 'deg'
+        for i, label in enumerate(['predicted', 'newest sample']):
+            print('Error (%s): median %.2f %s, 95%% %.2f %s' %
+                  (label, np.median(errors[:, i]), unit,
+                   np.percentile(errors[:, i], 95), unit))
@@ -0,0 +1,316 @@
+# Filename: online_detector.py
+# Author: Zhiguo Wang
+# Date: 10/18/2026
+#
+# Description:
+# Detect fixations and saccades online, from the samples streamed over the
+# link. The Host parser reports a fixation at fixed intervals (FIXUPDATE,
+# every 50 ms by default), and the amplitude of a saccade only once it is
+# over (ENDSACC), so a script waiting for these events is tens of ms late.
+# Here, each sample is processed as soon as it arrives, with a constant
+# amount of work per sample, and callbacks are called when a fixation
+# starts, is updated, or ends, and when a saccade starts or ends.
+#
+# Two algorithms are available:
+# - 'ivt', velocity threshold: a saccade starts when the gaze velocity
+#   (over the last few ms) is above the threshold for a few samples in a
+#   row, and ends when it is below the threshold for a few samples;
+# - 'idt', dispersion threshold: a fixation starts when the samples of
+#   the last "min_fixation" ms are within the dispersion threshold, and
+#   ends (i.e., a saccade starts) when a sample falls outside of it.
+#
+# Usage:
+# det = OnlineDetector(ppd=35.0, sample_rate=1000,
+#                      on_saccade_start=print)
+# samples, i = acq.ring.since(i)
+# det.update(samples)  # or, det.feed(t, x, y, pupil) for each sample
+
+from collections import deque, namedtuple
+from math import hypot
+from sample_ring import is_missing
+
+# The data passed to the callbacks; for an ongoing fixation, "end" is the
+# time of the latest sample; at the start of a saccade, the end_* fields
+# and the amplitude are None (but see current_saccade)
+Fixation = namedtuple('Fixation', ['start', 'end', 'gaze_x', 'gaze_y', 'n'])
+Saccade = namedtuple('Saccade', ['start', 'end', 'start_x', 'start_y',
+                                 'end_x', 'end_y', 'amplitude',
+                                 'peak_velocity'])
+
+
+class MovingExtreme(object):
+    '''The minimum (or maximum) of a sliding window, a monotonic queue
+    with an amortized O(1) cost per sample'''
+
+    def __init__(self, sign=1):
+        '''sign: 1 for the minimum, -1 for the maximum'''
+
+        self.sign = sign
+        self.queue = deque()  # (t, value)
+
+    def push(self, t, value):
+        queue = self.queue
+        v = value*self.sign
+        while queue and queue[-1][1] >= v:
+            queue.pop()
+        queue.append((t, v))
+
+    def expire(self, t_first):
+        '''Drop the values older than t_first'''
+
+        queue = self.queue
+        while queue and queue[0][0] < t_first:
+            queue.popleft()
+
+    def value(self):
+        return self.queue[0][1]*self.sign
+
+    def clear(self):
+        self.queue.clear()
+
+
+class OnlineDetector(object):
+    '''Detect fixations and saccades, one sample at a time'''
+
+    def __init__(self, ppd, sample_rate=1000, method='ivt', velocity=30.0,
+                 dispersion=1.0, min_fixation=40.0, velocity_window=4.0,
+                 onset=2.0, update_interval=50.0,
+                 on_fixation_start=None, on_fixation_update=None,
+                 on_fixation_end=None, on_saccade_start=None,
+                 on_saccade_end=None):
+        '''ppd: pixels per degree
+        sample_rate: the sampling rate, to set the velocity window
+        method: 'ivt' (velocity threshold) or 'idt' (dispersion threshold)
+        velocity: velocity threshold, in deg/s (ivt)
+        dispersion: dispersion threshold, in deg (idt)
+        min_fixation: minimum fixation duration, in ms (idt)
+        velocity_window: the velocity is computed over this interval (ms),
+        to keep the noise down at high sampling rates
+        onset: the velocity must be above (or below) the threshold for
+        this long (ms, at least one sample) to start (or end) a saccade,
+        so that noise does not start one (ivt)
+        update_interval: how often to call on_fixation_update, in ms (0
+        for every sample)
+        on_*: the callbacks, called with a Fixation or Saccade'''
+
+        if method not in ['ivt', 'idt']:
+            raise ValueError('Unknown detection method: %s' % method)
+        self.ppd = ppd
+        self.method = method
+        self.velocity = velocity
+        self.dispersion = dispersion*ppd  # in pixels
+        self.min_fixation = min_fixation
+        self.onset_samples = max(int(round(onset*sample_rate/1000.0)), 1)
+        self.update_interval = update_interval
+        self.on_fixation_start = on_fixation_start
+        self.on_fixation_update = on_fixation_update
+        self.on_fixation_end = on_fixation_end
+        self.on_saccade_start = on_saccade_start
+        self.on_saccade_end = on_saccade_end
+
+        # The velocity is the displacement over the last "lag" samples
+        self.lag = max(int(round(velocity_window*sample_rate/1000.0)), 1)
+        self.history = deque(maxlen=self.lag + 1)  # (t, x, y)
+
+        # Sliding window of the last "min_fixation" ms (idt)
+        self.window = deque()  # (t, x, y)
+        self.extremes = [MovingExtreme(1), MovingExtreme(-1),
+                         MovingExtreme(1), MovingExtreme(-1)]
+
+        self.reset()
+
+    def reset(self):
+        '''Forget the current fixation or saccade, e.g., after a blink'''
+
+        self.state = None  # None, 'fixation', or 'saccade'
+        self.history.clear()
+        self.window.clear()
+        for ext in self.extremes:
+            ext.clear()
+        self.win_sum = [0.0, 0.0]
+        self.n_fast = self.n_slow = 0
+        self.last_fast = None  # (t, x, y) of the latest fast sample
+        self.prev = None  # (t, x, y) of the previous sample
+        self.run = None  # the current run of slow samples, [t, sx, sy, n]
+        self.fix = None  # the current fixation, [start, end, sx, sy, n]
+        self.bounds = None  # its min_x, max_x, min_y, max_y (idt)
+        self.sac = None  # the current saccade, [start, x, y, peak]
+
+    @property
+    def current_fixation(self):
+        '''The ongoing fixation (a Fixation), or None'''
+
+        if self.state != 'fixation':
+            return None
+        return self._fixation()
+
+    @property
+    def current_saccade(self):
+        '''The ongoing saccade (a Saccade), or None; the end_* fields and
+        the amplitude are those of the latest sample'''
+
+        if self.state != 'saccade':
+            return None
+        start, sx, sy, peak = self.sac
+        t, x, y = self.prev
+        return Saccade(start, t, sx, sy, x, y, hypot(x - sx, y - sy)/self.ppd,
+                       peak)
+
+    def update(self, samples):
+        '''Process an array of samples, see SAMPLE_DTYPE in sample_ring.py'''
+
+        feed = self.feed
+        for t, x, y, pupil in zip(samples['time'].tolist(),
+                                  samples['gaze_x'].tolist(),
+                                  samples['gaze_y'].tolist(),
+                                  samples['pupil'].tolist()):
+            feed(t, x, y, pupil)
+
+    def feed(self, t, x, y, pupil=1.0):
+        '''Process one sample, t in ms, x and y in pixels'''
+
+        if is_missing(x, y, pupil):
+            if self.state == 'fixation':
+                self._end_fixation()
+            self.reset()
+            return
+
+        # Gaze velocity, in deg/s
+        history = self.history
+        history.append((t, x, y))
+        if len(history) > self.lag:
+            t0, x0, y0 = history[0]
+            v = hypot(x - x0, y - y0)/self.ppd/(t - t0)*1000.0
+        else:
+            v = 0.0
+
+        if self.method == 'ivt':
+            self._ivt(t, x, y, v)
+        else:
+            self._idt(t, x, y, v)
+        self.prev = (t, x, y)
+
+    def _ivt(self, t, x, y, v):
+        if v > self.velocity:
+            self.n_fast += 1
+            self.n_slow = 0
+            self.last_fast = (t, x, y)
+            if self.state == 'saccade':
+                self.sac[3] = max(self.sac[3], v)
+            elif self.n_fast == 1:
+                # Where the saccade may be starting
+                start = self.prev if self.prev is not None else (t, x, y)
+                self.sac = [t, start[1], start[2], v]
+            else:
+                self.sac[3] = max(self.sac[3], v)
+            if self.state != 'saccade' and self.n_fast >= self.onset_samples:
+                self._start_saccade()
+            return
+
+        self.n_fast = 0
+        self.n_slow += 1
+        if self.state == 'fixation':
+            self._add_to_fixation(t, x, y)
+            return
+
+        # Follow the run of slow samples, it becomes a fixation once it is
+        # long enough
+        if self.n_slow == 1:
+            self.run = [t, 0.0, 0.0, 0]
+        run = self.run
+        run[1] += x
+        run[2] += y
+        run[3] += 1
+        if self.n_slow >= self.onset_samples:
+            if self.state == 'saccade':
+                self._end_saccade(*self.last_fast)
+            self._start_fixation(run[0], t, run[1], run[2], run[3])
+
+    def _idt(self, t, x, y, v):
+        if self.state == 'fixation':
+            min_x, max_x, min_y, max_y = self.bounds
+            min_x, max_x = min(min_x, x), max(max_x, x)
+            min_y, max_y = min(min_y, y), max(max_y, y)
+            if (max_x - min_x) + (max_y - min_y) <= self.dispersion:
+                self.bounds = [min_x, max_x, min_y, max_y]
+                self._add_to_fixation(t, x, y)
+                return
+            # The sample is out of the fixation, a saccade starts
+            self.sac = [t, self.prev[1], self.prev[2], v]
+            self._start_saccade()
+        elif self.state == 'saccade':
+            self.sac[3] = max(self.sac[3], v)
+
+        # Slide the window over the last "min_fixation" ms
+        window = self.window
+        window.append((t, x, y))
+        self.win_sum[0] += x
+        self.win_sum[1] += y
+        for ext, value in zip(self.extremes, (x, x, y, y)):
+            ext.push(t, value)
+        last_out = None
+        while window[0][0] < t - self.min_fixation:
+            last_out = window.popleft()
+            self.win_sum[0] -= last_out[1]
+            self.win_sum[1] -= last_out[2]
+        t_first = window[0][0]
+        for ext in self.extremes:
+            ext.expire(t_first)
+        if last_out is None:
+            return  # the window is not full yet
+
+        min_x, max_x, min_y, max_y = [ext.value() for ext in self.extremes]
+        if (max_x - min_x) + (max_y - min_y) <= self.dispersion:
+            if self.state == 'saccade':
+                self._end_saccade(*last_out)
+            self.bounds = [min_x, max_x, min_y, max_y]
+            self._start_fixation(t_first, t, self.win_sum[0],
+                                 self.win_sum[1], len(window))
+            window.clear()
+            self.win_sum = [0.0, 0.0]
+            for ext in self.extremes:
+                ext.clear()
+
+    def _fixation(self):
+        start, end, sx, sy, n = self.fix
+        return Fixation(start, end, sx/n, sy/n, n)
+
+    def _start_fixation(self, start, t, sx, sy, n):
+        self.state = 'fixation'
+        self.fix = [start, t, sx, sy, n]
+        self.last_update = t
+        if self.on_fixation_start is not None:
+            self.on_fixation_start(self._fixation())
+
+    def _add_to_fixation(self, t, x, y):
+        fix = self.fix
+        fix[1] = t
+        fix[2] += x
+        fix[3] += y
+        fix[4] += 1
+        if (self.on_fixation_update is not None and
+                t - self.last_update >= self.update_interval):
+            self.last_update = t
+            self.on_fixation_update(self._fixation())
+
+    def _end_fixation(self):
+        self.state = None
+        if self.on_fixation_end is not None:
+            self.on_fixation_end(self._fixation())
+
+    def _start_saccade(self):
+        if self.state == 'fixation':
+            self._end_fixation()
+        self.state = 'saccade'
+        start, x, y, peak = self.sac
+        if self.on_saccade_start is not None:
+            self.on_saccade_start(Saccade(start, None, x, y, None, None,
+                                          None, peak))
+
+    def _end_saccade(self, t, x, y):
+        start, sx, sy, peak = self.sac
+        self.state = None
+        if self.on_saccade_end is not None:
+            amplitude = hypot(x - sx, y - sy)/self.ppd
+            self.on_saccade_end(Saccade(start, t, sx, sy, x, y, amplitude,
+                                        peak))
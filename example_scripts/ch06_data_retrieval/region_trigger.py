@@ -0,0 +1,307 @@
+# Filename: region_trigger.py
+# Author: Zhiguo Wang
+# Date: 10/18/2026
+#
+# Description:
+# Gaze triggers for many interest areas at once. The regions are defined
+# with the same strings as the IAREA messages that Data Viewer uses (see
+# ch05_data_viewer/interest_area.py), e.g.,
+#   '!V IAREA ELLIPSE 1 0 0 100 100 head'
+#   '!V IAREA RECTANGLE 2 85 85 285 185 body'
+#   '!V IAREA FREEHAND 3 285,125 385,50 335,125 tail'
+# The regions are put in a uniform grid; each grid cell keeps the regions
+# that cover the whole cell, and those that cover part of it. To find the
+# regions a gaze sample falls in, we look up its cell, and only test the
+# partly covering regions, so the cost per sample hardly grows with the
+# number of regions. A freehand polygon is clipped to each cell it
+# overlaps, so the point-in-polygon test only checks the few edges that
+# pass through the cell.
+#
+# For each sample, RegionTrigger calls on_enter and on_exit when the gaze
+# enters or leaves a region, and on_dwell once the gaze has stayed in a
+# region for a given time.
+#
+# Usage:
+# regions = [parse_iarea(msg) for msg in ia_messages]
+# trigger = RegionTrigger(regions, dwell=300, on_dwell=print)
+# samples, i = acq.ring.since(i)
+# trigger.update(samples)  # or, trigger.feed(t, x, y, pupil)
+
+from sample_ring import is_missing
+
+
+class Region(object):
+    '''An interest area, a rectangle, an ellipse, or a freehand polygon'''
+
+    def __init__(self, ia_id, shape, coords, label=''):
+        '''ia_id: interest area ID
+        shape: 'RECTANGLE', 'ELLIPSE', or 'FREEHAND'
+        coords: (left, top, right, bottom) for rectangles and ellipses,
+        a list of (x, y) vertices for freehand shapes
+        label: interest area label'''
+
+        self.id = ia_id
+        self.shape = shape.upper()
+        self.label = label
+        if self.shape in ['RECTANGLE', 'ELLIPSE']:
+            left, top, right, bottom = coords
+            self.bbox = (min(left, right), min(top, bottom),
+                         max(left, right), max(top, bottom))
+            self.cx = (left + right)/2.0
+            self.cy = (top + bottom)/2.0
+            self.rx = abs(right - left)/2.0
+            self.ry = abs(bottom - top)/2.0
+        elif self.shape == 'FREEHAND':
+            if len(coords) < 3:
+                raise ValueError('A freehand shape needs 3 or more vertices')
+            self.vertices = [(float(x), float(y)) for x, y in coords]
+            xs, ys = zip(*self.vertices)
+            self.bbox = (min(xs), min(ys), max(xs), max(ys))
+            # The edges, (x1, y1, x2, y2, dx/dy, y_min, y_max); horizontal
+            # edges are left out, as they never cross a horizontal ray
+            self.edges = []
+            x1, y1 = self.vertices[-1]
+            for x2, y2 in self.vertices:
+                if y1 != y2:
+                    self.edges.append((x1, y1, x2, y2, (x2 - x1)/(y2 - y1),
+                                       min(y1, y2), max(y1, y2)))
+                x1, y1 = x2, y2
+        else:
+            raise ValueError('Unknown interest area shape: %s' % shape)
+
+    def __repr__(self):
+        return 'Region(%d, %s, %s)' % (self.id, self.shape, self.label)
+
+    def contains(self, x, y):
+        '''Check if the point (x, y) is in the region'''
+
+        left, top, right, bottom = self.bbox
+        if x < left or x > right or y < top or y > bottom:
+            return False
+        if self.shape == 'RECTANGLE':
+            return True
+        if self.shape == 'ELLIPSE':
+            if self.rx == 0 or self.ry == 0:
+                return False
+            dx = (x - self.cx)/self.rx
+            dy = (y - self.cy)/self.ry
+            return dx*dx + dy*dy <= 1.0
+        return crossings(x, y, False, self.edges)
+
+    def clip(self, left, top, right, bottom):
+        '''Clip a freehand polygon to a cell; returns the parity of the
+        edges that a ray from any point in the cell to the right always
+        crosses, and the edges that need testing'''
+
+        # Edges above, below, or to the left of the cell are never
+        # crossed; edges to the right of the cell, spanning its height,
+        # are always crossed; only the others need testing
+        parity = False
+        edges = []
+        for edge in self.edges:
+            x1, y1, x2, y2, slope, y_min, y_max = edge
+            if y_max <= top or y_min > bottom or max(x1, x2) < left:
+                continue
+            if min(x1, x2) > right and y_min <= top and y_max > bottom:
+                parity = not parity
+            else:
+                edges.append(edge)
+        return parity, edges
+
+    def test(self, left, top, right, bottom):
+        '''Find out how the region overlaps a cell; returns True if the
+        region covers the whole cell, False if it is outside the region,
+        and otherwise a test for the points in the cell, a tuple (region,
+        parity, edges), see crossings()'''
+
+        if self.shape == 'FREEHAND':
+            parity, edges = self.clip(left, top, right, bottom)
+            return parity if not edges else (self, parity, edges)
+
+        # rectangles and ellipses are convex, checking the corners is enough
+        corners = [(left, top), (right, top), (right, bottom),
+                   (left, bottom)]
+        if all(self.contains(x, y) for x, y in corners):
+            return True
+        return (self, None, None)
+
+
+def crossings(x, y, parity, edges):
+    '''Cast a ray from (x, y) to the right, return True if it crosses an
+    odd number of edges (plus one if parity is True)'''
+
+    for x1, y1, x2, y2, slope, y_min, y_max in edges:
+        if y_min <= y < y_max and x < x1 + (y - y1)*slope:
+            parity = not parity
+    return parity
+
+
+def parse_iarea(msg):
+    '''Parse an IAREA message, with or without the leading "!V IAREA",
+    e.g., 'ELLIPSE 1 0 0 100 100 head'; return a Region'''
+
+    fields = msg.split()
+    if fields[:2] == ['!V', 'IAREA']:
+        fields = fields[2:]
+    shape, ia_id = fields[0].upper(), int(fields[1])
+    if shape == 'FREEHAND':
+        # the vertices are "x,y" pairs, followed by the label
+        n = 2
+        while n < len(fields) and ',' in fields[n]:
+            n += 1
+        vertices = [[float(v) for v in field.split(',')]
+                    for field in fields[2:n]]
+        return Region(ia_id, shape, vertices, ' '.join(fields[n:]))
+
+    coords = [float(v) for v in fields[2:6]]
+    return Region(ia_id, shape, coords, ' '.join(fields[6:]))
+
+
+class GridIndex(object):
+    '''A uniform grid of cells, each with the regions overlapping it'''
+
+    def __init__(self, regions, cell_size=None):
+        '''regions: a list of Region
+        cell_size: size of the grid cells, in pixels; by default, a
+        quarter of the typical region size (4 to 32 pixels), so most
+        cells are either fully in or fully out of a region'''
+
+        self.regions = list(regions)
+        if not self.regions:
+            self.cell_size = 1.0
+            self.x0 = self.y0 = 0.0
+            self.nx = self.ny = 0
+            self.cells = []
+            return
+        if cell_size is None:
+            sizes = sorted(min(r.bbox[2] - r.bbox[0], r.bbox[3] - r.bbox[1])
+                           for r in self.regions)
+            cell_size = min(max(sizes[len(sizes)//2]/4.0, 4.0), 32.0)
+        self.cell_size = cell_size
+
+        # The grid covers the bounding box of all regions
+        self.x0 = min(r.bbox[0] for r in self.regions)
+        self.y0 = min(r.bbox[1] for r in self.regions)
+        x1 = max(r.bbox[2] for r in self.regions)
+        y1 = max(r.bbox[3] for r in self.regions)
+        self.nx = int((x1 - self.x0)//cell_size) + 1
+        self.ny = int((y1 - self.y0)//cell_size) + 1
+
+        full = [[] for i in range(self.nx*self.ny)]
+        partial = [[] for i in range(self.nx*self.ny)]
+        for region in self.regions:
+            left, top, right, bottom = region.bbox
+            ix0, ix1 = self._cell_x(left), self._cell_x(right)
+            iy0, iy1 = self._cell_y(top), self._cell_y(bottom)
+            for iy in range(iy0, iy1 + 1):
+                for ix in range(ix0, ix1 + 1):
+                    test = region.test(self.x0 + ix*cell_size,
+                                       self.y0 + iy*cell_size,
+                                       self.x0 + (ix + 1)*cell_size,
+                                       self.y0 + (iy + 1)*cell_size)
+                    if test is True:
+                        full[iy*self.nx + ix].append(region)
+                    elif test is not False:
+                        partial[iy*self.nx + ix].append(test)
+
+        # A cell without partly covering regions holds the lookup result,
+        # a tuple (empty, or the regions covering the cell); the others
+        # hold a list, [full, partial]
+        self.cells = [tuple(f) if not p else [tuple(f), tuple(p)]
+                      for f, p in zip(full, partial)]
+
+    def _cell_x(self, x):
+        return min(int((x - self.x0)//self.cell_size), self.nx - 1)
+
+    def _cell_y(self, y):
+        return min(int((y - self.y0)//self.cell_size), self.ny - 1)
+
+    def lookup(self, x, y):
+        '''Return the regions that contain (x, y), as a tuple'''
+
+        ix = int((x - self.x0)//self.cell_size)
+        iy = int((y - self.y0)//self.cell_size)
+        nx = self.nx
+        if ix < 0 or iy < 0 or ix >= nx or iy >= self.ny:
+            return ()
+        cell = self.cells[iy*nx + ix]
+        if cell.__class__ is tuple:
+            return cell
+        full, partial = cell
+        return full + tuple([region for region, parity, edges in partial
+                             if (region.contains(x, y) if edges is None
+                                 else crossings(x, y, parity, edges))])
+
+
+class RegionTrigger(object):
+    '''Enter, exit, and dwell triggers for a set of regions'''
+
+    def __init__(self, regions, dwell=300.0, cell_size=None, on_enter=None,
+                 on_exit=None, on_dwell=None):
+        '''regions: a list of Region, see parse_iarea()
+        dwell: dwell time (ms) before on_dwell is called
+        cell_size: size of the grid cells, see GridIndex
+        on_enter, on_exit: called with the region and the sample time
+        on_dwell: called with the region, the sample time, and the time
+        the gaze entered the region
+
+        Samples without gaze data (e.g., blinks) are skipped, so a short
+        blink does not reset the dwell time'''
+
+        self.index = GridIndex(regions, cell_size)
+        self.dwell = dwell
+        self.on_enter = on_enter
+        self.on_exit = on_exit
+        self.on_dwell = on_dwell
+        self.reset()
+
+    def reset(self):
+        '''Forget which regions the gaze is in'''
+
+        self.inside = ()  # the regions the gaze is in
+        self.entered = {}  # region: time the gaze entered the region
+        self.waiting = []  # regions still waiting for the dwell time
+
+    def update(self, samples):
+        '''Process an array of samples, see SAMPLE_DTYPE in sample_ring.py'''
+
+        feed = self.feed
+        for t, x, y, pupil in zip(samples['time'].tolist(),
+                                  samples['gaze_x'].tolist(),
+                                  samples['gaze_y'].tolist(),
+                                  samples['pupil'].tolist()):
+            feed(t, x, y, pupil)
+
+    def feed(self, t, x, y, pupil=1.0):
+        '''Process one sample, t in ms, x and y in pixels'''
+
+        if is_missing(x, y, pupil):
+            return
+        regions = self.index.lookup(x, y)
+        if regions != self.inside:
+            self._change(t, regions)
+        if self.waiting:
+            self._check_dwell(t)
+
+    def _change(self, t, regions):
+        for region in self.inside:
+            if region not in regions:
+                del self.entered[region]
+                if self.on_exit is not None:
+                    self.on_exit(region, t)
+        for region in regions:
+            if region not in self.entered:
+                self.entered[region] = t
+                self.waiting.append(region)
+                if self.on_enter is not None:
+                    self.on_enter(region, t)
+        self.waiting = [r for r in self.waiting if r in self.entered]
+        self.inside = regions
+
+    def _check_dwell(self, t):
+        for region in list(self.waiting):
+            t_enter = self.entered[region]
+            if t - t_enter >= self.dwell:
+                self.waiting.remove(region)
+                if self.on_dwell is not None:
+                    self.on_dwell(region, t, t_enter)
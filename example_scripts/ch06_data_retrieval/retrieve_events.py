@@ -3,9 +3,16 @@
 # Date: 11/7/2020
 #
 # Description:
-# A short script illustrating online retrieval of eye events
+# A short script illustrating online retrieval of eye events; all the
+# events waiting in the link queue are retrieved in one call, see
+# event_drain.py
 
 import pylink
+from event_drain import drain_link, STARTSACC, ENDSACC, STARTFIX, ENDFIX
+
+# The events to log, data type -> message
+EVENT_NAMES = {STARTSACC: 'STARTSACC', ENDSACC: 'ENDSACC',
+               STARTFIX: 'STARTFIX', ENDFIX: 'ENDFIX'}
 
 # Connect to the tracker and open an EDF
 tk = pylink.EyeLink('100.1.1.1')
@@ -32,21 +39,18 @@ while True:
     if tk.trackerTime() - t_start > 5000:
         break
 
-    # Retrieve the oldest event in the buffer
-    dt = tk.getNextData()
-    if dt > 0:
-        # Send a message to the tracker when an event is
-        # received over the link; include the timestamp
-        # in the message to examine the link delay
-        ev = tk.getFloatData()
-        if dt == pylink.STARTSACC:
-            tk.sendMessage('STARTSACC %d' % ev.getTime())
-        if dt == pylink.ENDSACC:
-            tk.sendMessage('ENDSACC %d' % ev.getTime())
-        if dt == pylink.STARTFIX:
-            tk.sendMessage('STARTFIX %d' % ev.getTime())
-        if dt == pylink.ENDFIX:
-            tk.sendMessage('ENDFIX %d' % ev.getTime())
+    # Retrieve all the events in the buffer
+    batch = drain_link(tk, samples=False)
+    # The batch is grouped by event type; merge the saccades and
+    # fixations by time, to handle them in the order they arrived
+    events = [ev for table in ['saccades', 'fixations']
+              for ev in batch[table] if ev['type'] in EVENT_NAMES]
+    events.sort(key=lambda ev: ev['time'])
+    # Send a message to the tracker when an event is received over
+    # the link; include the timestamp in the message to examine the
+    # link delay
+    for ev in events:
+        tk.sendMessage('%s %d' % (EVENT_NAMES[ev['type']], ev['time']))
 
 tk.stopRecording()  # stop recording
 tk.closeDataFile()  # close the EDF data file on the Host
@@ -3,9 +3,12 @@
 # Date: 11/7/2020
 #
 # Description:
-# A short script illustrating online retrieval of eye events
+# A short script illustrating online retrieval of eye events; all the
+# events waiting in the link queue are retrieved in one call, see
+# event_drain.py
 
 import pylink
+from event_drain import drain_link, events_of, ENDSACC
 
 # Connect to the tracker and open an EDF
 tk = pylink.EyeLink('100.1.1.1')
@@ -32,29 +35,28 @@ while True:
     if tk.trackerTime() - t_start > 5000:
         break
 
-    # Retrieve the oldest event in the buffer
-    dt = tk.getNextData()
-    if dt > 0:
-        ev = tk.getFloatData()
-        if dt == pylink.ENDSACC:
-            print('ENDSACC Event: \n',
-                  'Amplitude', ev.getAmplitude(), '\n',
-                  'Angle', ev.getAngle(), '\n',
-                  'AverageVelocity', ev.getAverageVelocity(), '\n',
-                  'PeakVelocity', ev.getPeakVelocity(), '\n',
-                  'StartTime', ev.getStartTime(), '\n',
-                  'StartGaze', ev.getStartGaze(), '\n',
-                  'StartHREF', ev.getStartHREF(), '\n',
-                  'StartPPD', ev.getStartPPD(), '\n',
-                  'StartVelocity', ev.getStartVelocity(), '\n',
-                  'EndTime', ev.getEndTime(), '\n',
-                  'EndGaze', ev.getEndGaze(), '\n',
-                  'EndHREF', ev.getEndHREF(), '\n',
-                  'StartPPD', ev.getStartPPD(), '\n',
-                  'EndVelocity', ev.getEndVelocity(), '\n',
-                  'Eye', ev.getEye(), '\n',
-                  'Time', ev.getTime(), '\n',
-                  'Type', ev.getType(), '\n')
+    # Retrieve all the events in the buffer, and print out the
+    # details of the ENDSACC events
+    batch = drain_link(tk, samples=False)
+    for ev in events_of(batch, 'saccades', ENDSACC):
+        print('ENDSACC Event: \n',
+              'Amplitude', ev['amplitude'], '\n',
+              'Angle', ev['angle'], '\n',
+              'AverageVelocity', ev['avg_vel'], '\n',
+              'PeakVelocity', ev['peak_vel'], '\n',
+              'StartTime', ev['start'], '\n',
+              'StartGaze', (ev['start_x'], ev['start_y']), '\n',
+              'StartHREF', (ev['start_href_x'], ev['start_href_y']), '\n',
+              'StartPPD', (ev['start_ppd_x'], ev['start_ppd_y']), '\n',
+              'StartVelocity', ev['start_vel'], '\n',
+              'EndTime', ev['end'], '\n',
+              'EndGaze', (ev['end_x'], ev['end_y']), '\n',
+              'EndHREF', (ev['end_href_x'], ev['end_href_y']), '\n',
+              'EndPPD', (ev['end_ppd_x'], ev['end_ppd_y']), '\n',
+              'EndVelocity', ev['end_vel'], '\n',
+              'Eye', ev['eye'], '\n',
+              'Time', ev['time'], '\n',
+              'Type', ev['type'], '\n')
 
 tk.stopRecording()  # stop recording
 tk.closeDataFile()  # close the EDF data file on the Host
@@ -3,9 +3,14 @@
 # Date: 11/7/2020
 #
 # Description:
-# A short script illustrating online retrieval of samples
+# A short script illustrating online retrieval of samples. A background
+# thread (see sample_ring.py) retrieves every sample over the link, so
+# no samples are missed, and another one (see sample_writer.py) saves
+# them to file in blocks.
 
 import pylink
+from sample_ring import SampleRing, SampleAcquisition, SAMPLE_DTYPE
+from sample_writer import SampleWriter
 
 # Connect to the tracker and open an EDF
 tk = pylink.EyeLink('100.1.1.1')
@@ -20,46 +25,46 @@ tk.sendCommand('sample_rate 1000')  # set sample rate to 1000 Hz
 
 # Make gaze, HREF, and raw (PUPIL) data available over the link
 sample_flag = 'LEFT,RIGHT,GAZE,GAZERES,PUPIL,HREF,AREA,STATUS,INPUT'
-tk.sendCommand('link_sample_data = %s' % sample_flags)
+tk.sendCommand('link_sample_data = %s' % sample_flag)
 
 # Start recording
 error = tk.startRecording(1, 1, 1, 1)
 pylink.msecDelay(100)  # cache some samples for event parsing
 
-# Open a plain text file to store the retrieved sample data
-text_file = open('sample_data.csv', 'w')
+# Start a thread to retrieve all samples into a ring buffer
+acq = SampleAcquisition(tk, SampleRing())
+acq.start()
 
-t_start = tk.trackerTime()  # current tracker time
-smp_time = -1
+# Save the retrieved sample data to a plain text file (tab delimited), in
+# blocks of 1000 samples; use a .npy file to save the data in binary form
+writer = SampleWriter('sample_data.csv', SAMPLE_DTYPE, block_size=1000)
+
+# pylink is not thread-safe; while the thread is running, call the tracker
+# through acq.call(), which holds the lock that guards the link
+t_start = acq.call(tk.trackerTime)  # current tracker time
+n = 0  # index of the next sample to retrieve from the ring
 while True:
     # Break after 5 seconds have elapsed
-    if tk.trackerTime() - t_start > 5000:
+    if acq.call(tk.trackerTime) - t_start > 5000:
         break
 
-    # Poll the latest samples
-    dt = tk.getNewestSample()
-    if dt is not None:
-        # Grab gaze, HREF, raw, & pupil size data
-        if dt.isRightSample():
-            gaze = dt.getRightEye().getGaze()
-            href = dt.getRightEye().getHREF()
-            raw = dt.getRightEye().getRawPupil()
-            pupil = dt.getRightEye().getPupilSize()
-        elif dt.isLeftSample():
-            gaze = dt.getLeftEye().getGaze()
-            href = dt.getLeftEye().getHREF()
-            raw = dt.getLeftEye().getRawPupil()
-            pupil = dt.getLeftEye().getPupilSize()
+    # Grab all the samples retrieved since the last iteration; each
+    # sample has the gaze, HREF, raw, & pupil data of the tracked eye
+    smp, n_next = acq.ring.since(n)
+    if n_next - n > len(smp):
+        print('Warning: %d samples lost' % (n_next - n - len(smp)))
+    n = n_next
+
+    # Hand the samples over to the writer, this takes microseconds
+    writer.write(smp)
+    pylink.msecDelay(1)
 
-        timestamp = dt.getTime()
-        # Put gaze, HREF, raw, & pupil data to the plain text
-        # file if the sample is new
-        if timestamp > smp_time:
-            smp = map(str, [timestamp, gaze, href, raw, pupil])
-            text_file.write('\t'.join(smp) + '\n')
-            smp_time = timestamp
+# Stop the acquisition thread, then save the remaining samples
+acq.stop()
+writer.write(acq.ring.since(n)[0])
+writer.close()
+print('Sample writer: %s' % writer.stats())
 
 tk.stopRecording()  # stop recording
 tk.closeDataFile()  # close the EDF data file on the Host
-text_file.close()  # close the plain text file
 tk.close()  # close the link to the tracker
@@ -0,0 +1,200 @@
+# Filename: sample_ring.py
+# Author: Zhiguo Wang
+# Date: 10/18/2026
+#
+# Description:
+# Retrieve every sample over the link, in a background thread. Polling
+# getNewestSample() from the main loop drops samples whenever drawing or
+# writing takes longer than one sample period. Here, an acquisition thread
+# drains the link data queue (getNextData/getFloatData) at full rate, and
+# puts the samples in a preallocated NumPy ring buffer. The main loop asks
+# for "all samples since index N" and never waits for the link.
+#
+# The ring has one writer (the acquisition thread) and any number of
+# readers; no locks are needed, a reader checks the write counter after
+# copying the samples, to drop those that were overwritten meanwhile. The
+# ring has a spare slot for the sample being written, so a reader always
+# gets the last "capacity" samples in full.
+#
+# pylink is not thread-safe, so the acquisition thread holds acq.lock
+# while it reads from the link; any other link call made while the thread
+# is running (e.g., trackerTime() in the main loop) must hold it too.
+#
+# Usage:
+# ring = SampleRing()
+# acq = SampleAcquisition(tk, ring)  # tk, a connected pylink.EyeLink
+# tk.startRecording(1, 1, 1, 1)  # samples must be available over the link
+# acq.start()
+# n = 0
+# while ...:
+#     smp, n = ring.since(n)  # a structured array, see SAMPLE_DTYPE
+#     ev_type, ev = acq.events.popleft()  # other link data, if any
+#     t = acq.call(tk.trackerTime)  # or, with acq.lock: t = tk.trackerTime()
+# acq.stop()
+
+import time
+import threading
+from collections import deque
+import numpy as np
+import pylink
+
+# One record per sample; the gaze, HREF, raw (PUPIL), and pupil size data
+# of the right eye, or the left eye if the right eye is not tracked; the
+# timestamps are in ms, with a fraction at 2000 Hz
+SAMPLE_DTYPE = np.dtype([('time', np.float64), ('eye', np.int8),
+                         ('gaze_x', np.float32), ('gaze_y', np.float32),
+                         ('pupil', np.float32),
+                         ('href_x', np.float32), ('href_y', np.float32),
+                         ('raw_x', np.float32), ('raw_y', np.float32)])
+
+LEFT_EYE, RIGHT_EYE = 0, 1
+
+MISSING = -32768.0  # missing gaze data, e.g., during blinks
+
+
+def is_missing(x, y, pupil):
+    '''Check if a sample has no valid gaze data (e.g., during blinks)'''
+
+    return (x == MISSING or y == MISSING or pupil <= 0 or
+            abs(x) > 1e6 or abs(y) > 1e6)
+
+
+def sample_record(smp):
+    '''Convert a pylink Sample into a tuple that fits in the ring'''
+
+    if smp.isRightSample():
+        eye, data = RIGHT_EYE, smp.getRightEye()
+    else:
+        eye, data = LEFT_EYE, smp.getLeftEye()
+
+    return ((smp.getTime(), eye) + tuple(data.getGaze()) +
+            (data.getPupilSize(),) + tuple(data.getHREF()) +
+            tuple(data.getRawPupil()))
+
+
+class SampleRing(object):
+    '''A fixed-size ring buffer of samples, one writer, many readers'''
+
+    def __init__(self, capacity=65536, dtype=SAMPLE_DTYPE):
+        '''capacity: number of samples to keep, e.g., 65536 samples
+        is ~30 secs of data at 2000 Hz'''
+
+        self.capacity = capacity
+        # one spare slot, for the sample the writer is working on
+        self._size = capacity + 1
+        self.data = np.zeros(self._size, dtype=dtype)
+        self.count = 0  # total number of samples written
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def put(self, record):
+        '''Add a sample (a tuple with the fields of SAMPLE_DTYPE); only
+        one thread should ever call put()'''
+
+        self.data[self.count % self._size] = record
+        # Bump the counter after the sample is in place, so readers never
+        # see a half-written sample
+        self.count += 1
+
+    def newest(self):
+        '''Return the newest sample, None if the ring is empty'''
+
+        count = self.count
+        if count == 0:
+            return None
+        return self.data[(count - 1) % self._size].copy()
+
+    def since(self, n):
+        '''Return the samples with index n and up as an array (a copy),
+        and the index to use in the next call
+
+        If the reader falls more than "capacity" samples behind, the
+        oldest samples are lost; the caller can tell by checking if the
+        returned index minus n is larger than the number of samples'''
+
+        count = self.count
+        first = max(n, count - self.capacity)
+        if first >= count:
+            return self.data[:0].copy(), count
+
+        # Copy the samples, in one or two slices
+        start, stop = first % self._size, count % self._size
+        if start < stop:
+            samples = self.data[start:stop].copy()
+        else:
+            samples = np.concatenate((self.data[start:],
+                                      self.data[:stop]))
+
+        # Drop the samples that were overwritten while we were copying,
+        # including the one the writer may be working on right now, i.e.,
+        # the one in the spare slot
+        overwritten = self.count + 1 - self._size - first
+        if overwritten > 0:
+            samples = samples[overwritten:]
+
+        return samples, count
+
+
+class SampleAcquisition(threading.Thread):
+    '''A thread that drains the link data queue into a SampleRing; other
+    data (events, button presses, etc.) are put in the "events" deque, as
+    (data type, data) tuples
+
+    While the thread is running, other threads must hold the "lock" for
+    any call to the link, see call()'''
+
+    def __init__(self, tk, ring=None, idle_sleep=0.0005, max_events=10000,
+                 lock=None):
+        '''tk: a connected pylink.EyeLink (or EyeLinkListener)
+        ring: the SampleRing to fill, a new one if None
+        idle_sleep: how long to sleep (in secs) when the queue is empty
+        max_events: the oldest events are dropped if nobody reads them
+        lock: the lock that guards the link, a new one if None'''
+
+        threading.Thread.__init__(self, daemon=True)
+        self.tk = tk
+        self.ring = SampleRing() if ring is None else ring
+        self.idle_sleep = idle_sleep
+        self.events = deque(maxlen=max_events)
+        self.n_samples = 0
+        self.n_events = 0
+        self.lock = threading.Lock() if lock is None else lock
+        self._stop_event = threading.Event()
+
+    def run(self):
+        '''Keep draining the link data queue until stop() is called'''
+
+        get_next_data = self.tk.getNextData
+        get_float_data = self.tk.getFloatData
+        put = self.ring.put
+        lock = self.lock
+        while not self._stop_event.is_set():
+            with lock:
+                dt = get_next_data()
+                data = get_float_data() if dt else None
+            if not dt:
+                # Nothing in the queue, wait for the next sample
+                time.sleep(self.idle_sleep)
+                continue
+
+            if dt == pylink.SAMPLE_TYPE:
+                put(sample_record(data))
+                self.n_samples += 1
+            else:
+                self.events.append((dt, data))
+                self.n_events += 1
+
+    def call(self, func, *args):
+        '''Call a link method, e.g., acq.call(tk.trackerTime), while the
+        thread is not using the link; return what it returns'''
+
+        with self.lock:
+            return func(*args)
+
+    def stop(self):
+        '''Stop the thread and wait for it to finish'''
+
+        self._stop_event.set()
+        if self.is_alive():
+            self.join()
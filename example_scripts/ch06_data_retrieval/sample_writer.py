@@ -0,0 +1,186 @@
+# Filename: sample_writer.py
+# Author: Zhiguo Wang
+# Date: 10/18/2026
+#
+# Description:
+# Save online samples to file without slowing down data retrieval. Rather
+# than formatting and writing each sample as it comes in, the samples are
+# collected in fixed-size blocks (NumPy structured arrays); full blocks are
+# put in a bounded queue and saved by a background thread, either in binary
+# form (a .npy file that np.load() can read) or as CSV text, one block at a
+# time. If the writer thread falls behind and the queue fills up, the main
+# loop waits (or, optionally, drops the block); both are counted, so we can
+# tell if the disk keeps up with the tracker.
+#
+# Usage:
+# from sample_ring import SAMPLE_DTYPE
+# writer = SampleWriter('sample_data.npy', SAMPLE_DTYPE)
+# writer.write(smp)  # an array of samples, e.g., from SampleRing.since()
+# writer.close()  # save the last block, and wait for the writer thread
+# print(writer.stats())
+
+import time
+import queue
+import threading
+import numpy as np
+
+# Magic string and version of the .npy file format (1.0)
+NPY_MAGIC = b'\x93NUMPY\x01\x00'
+
+
+def npy_header(dtype, n_samples, header_len=None):
+    '''Return the header of a .npy file with n_samples records; the header
+    is padded to header_len bytes, so it can be rewritten in place once
+    the number of samples is known'''
+
+    header = "{'descr': %r, 'fortran_order': False, 'shape': (%d,), }" % \
+        (np.lib.format.dtype_to_descr(np.dtype(dtype)), n_samples)
+    if header_len is None:
+        # room for the largest sample count, aligned to 64 bytes
+        header_len = len(NPY_MAGIC) + 2 + len(header) + 20 + 1
+        header_len = (header_len + 63)//64*64
+    header += ' '*(header_len - len(NPY_MAGIC) - 2 - len(header) - 1)
+    header += '\n'
+
+    return (NPY_MAGIC + (len(header)).to_bytes(2, 'little') +
+            header.encode('latin1'))
+
+
+def csv_formats(dtype, float_fmt='%.2f'):
+    '''Return a format string for each field of a record'''
+
+    return ['%d' if dtype[name].kind in 'iub' else float_fmt
+            for name in dtype.names]
+
+
+class SampleWriter(object):
+    '''Collect samples in blocks and save them in a background thread'''
+
+    def __init__(self, filename, dtype, block_size=4096, max_blocks=32,
+                 file_format=None, drop_when_full=False, delimiter='\t'):
+        '''filename: the file to save the samples in
+        dtype: a structured NumPy dtype, e.g., sample_ring.SAMPLE_DTYPE
+        block_size: number of samples per block
+        max_blocks: number of full blocks that can wait in the queue
+        file_format: 'npy' or 'csv', the file extension if None
+        drop_when_full: drop a full block, rather than waiting, if the
+        queue is full (e.g., when the disk is too slow)
+        delimiter: the column delimiter in CSV files'''
+
+        self.dtype = np.dtype(dtype)
+        self.block_size = block_size
+        if file_format is None:
+            file_format = 'npy' if filename.endswith('.npy') else 'csv'
+        if file_format not in ['npy', 'csv']:
+            raise ValueError('Unknown file format: %s' % file_format)
+        self.file_format = file_format
+        self.drop_when_full = drop_when_full
+        self.delimiter = delimiter
+
+        # The block being filled, and the number of samples in it
+        self.block = np.empty(block_size, dtype=self.dtype)
+        self.n_block = 0
+
+        # Counters, see stats()
+        self.n_samples = 0  # samples handed over to the writer
+        self.n_written = 0  # samples saved to file
+        self.n_dropped = 0  # samples dropped as the queue was full
+        self.n_stalls = 0  # number of times write() had to wait
+        self.stall_time = 0.0  # time spent waiting, in secs
+        self.max_queued = 0  # the longest the queue has been
+
+        self.file = open(filename, 'wb')
+        if self.file_format == 'npy':
+            self.header_len = len(npy_header(self.dtype, 0))
+            self.file.write(npy_header(self.dtype, 0))
+        else:
+            self.file.write((delimiter.join(self.dtype.names) +
+                             '\n').encode())
+        self.queue = queue.Queue(maxsize=max_blocks)
+        self.thread = threading.Thread(target=self._save_blocks, daemon=True)
+        self.thread.start()
+
+    def write(self, samples):
+        '''Add an array of samples (with the writer's dtype)'''
+
+        i = 0
+        n = len(samples)
+        while i < n:
+            k = min(n - i, self.block_size - self.n_block)
+            self.block[self.n_block:self.n_block + k] = samples[i:i + k]
+            self.n_block += k
+            i += k
+            if self.n_block == self.block_size:
+                self._flush_block()
+        self.n_samples += n
+
+    def write_record(self, record):
+        '''Add a single sample, a tuple with the fields of the dtype'''
+
+        self.block[self.n_block] = record
+        self.n_block += 1
+        self.n_samples += 1
+        if self.n_block == self.block_size:
+            self._flush_block()
+
+    def _flush_block(self):
+        '''Hand the current block over to the writer thread'''
+
+        if self.n_block == 0:
+            return
+        block = self.block[:self.n_block]
+        try:
+            self.queue.put_nowait(block)
+        except queue.Full:
+            if self.drop_when_full:
+                self.n_dropped += self.n_block
+            else:
+                # Back-pressure, wait for the writer thread
+                self.n_stalls += 1
+                t_start = time.perf_counter()
+                self.queue.put(block)
+                self.stall_time += time.perf_counter() - t_start
+        self.max_queued = max(self.max_queued, self.queue.qsize())
+
+        # Start a new block; the old one now belongs to the writer thread
+        self.block = np.empty(self.block_size, dtype=self.dtype)
+        self.n_block = 0
+
+    def _save_blocks(self):
+        '''The writer thread, save the blocks in the queue, in order'''
+
+        fmt = csv_formats(self.dtype)
+        while True:
+            block = self.queue.get()
+            if block is None:
+                break
+            if self.file_format == 'npy':
+                self.file.write(block.tobytes())
+            else:
+                np.savetxt(self.file, block, fmt=fmt,
+                           delimiter=self.delimiter)
+            self.n_written += len(block)
+
+    def close(self):
+        '''Save the samples that are left, wait for the writer thread,
+        and close the file'''
+
+        self._flush_block()
+        self.queue.put(None)
+        self.thread.join()
+        if self.file_format == 'npy':
+            # Now we know the number of samples in the file
+            self.file.seek(0)
+            self.file.write(npy_header(self.dtype, self.n_written,
+                                       self.header_len))
+        self.file.close()
+
+    def stats(self):
+        '''Return the sample counts and the back-pressure counters'''
+
+        return {'samples': self.n_samples,
+                'written': self.n_written,
+                'dropped': self.n_dropped,
+                'stalls': self.n_stalls,
+                'stall_time': self.stall_time,
+                'max_queued': self.max_queued}
@@ -0,0 +1,113 @@
+# Filename: test_async_link.py
+# Author: Zhiguo Wang
+# Date: 10/18/2026
+#
+# Description:
+# Tests of the asyncio front-end (async_link.py), run against the simulated
+# tracker (tracker_sim.py), so no EyeLink is needed.
+#
+# Usage:
+# python -m pytest test_async_link.py
+
+import asyncio
+import numpy as np
+import pylink
+from async_link import AsyncEyeLink, EVENT_TABLES
+from tracker_sim import SimulatedEyeLink
+
+SAMPLE_RATE = 1000
+DURATION = 1.5  # secs of recording
+
+
+async def collect(stream):
+    '''Gather everything an async stream yields, until it ends'''
+
+    return [item async for item in stream]
+
+
+async def record(link, duration):
+    '''Record for a while, with the streams subscribed before recording
+    starts; return the start_recording() error code, the samples, and the
+    events'''
+
+    samples = asyncio.ensure_future(collect(link.samples()))
+    events = asyncio.ensure_future(collect(link.events()))
+    error = await link.start_recording(1, 1, 1, 1)
+    await asyncio.sleep(duration)
+    await link.stop_recording()
+    return error, await samples, await events
+
+
+def test_streams():
+    tk = SimulatedEyeLink(sample_rate=SAMPLE_RATE, seed=1)
+
+    async def main():
+        link = AsyncEyeLink(tk)
+        result = await record(link, DURATION)
+        await link.close()
+        return result
+
+    error, samples, events = asyncio.run(main())
+    assert error == 0
+
+    # The samples arrive in order, none is skipped or repeated
+    times = np.array([smp['time'] for smp in samples])
+    assert len(times) > DURATION*SAMPLE_RATE*0.5
+    assert np.allclose(np.diff(times), 1000.0/SAMPLE_RATE)
+
+    # The events come as (table, event), in time order, and include
+    # at least one complete fixation
+    assert events
+    assert all(table in EVENT_TABLES for table, ev in events)
+    ev_times = [ev['time'] for table, ev in events]
+    assert ev_times == sorted(ev_times)
+    end_fix = [ev for table, ev in events
+               if table == 'fixations' and ev['type'] == pylink.ENDFIX]
+    assert end_fix
+    for ev in end_fix:
+        assert times[0] - 1000.0 <= ev['start'] <= ev['end'] <= times[-1]
+    for table, ev in events:
+        if table == 'saccades' and ev['type'] == pylink.ENDSACC:
+            assert ev['amplitude'] > 0
+
+
+def test_two_subscribers():
+    '''Each subscriber of a stream gets all the data'''
+
+    tk = SimulatedEyeLink(sample_rate=SAMPLE_RATE, seed=2)
+
+    async def main():
+        link = AsyncEyeLink(tk)
+        other = asyncio.ensure_future(collect(link.samples()))
+        result = await record(link, 0.3)
+        return result, await other
+
+    (error, samples, events), other = asyncio.run(main())
+    assert len(samples) == len(other) > 0
+    assert [s['time'] for s in samples] == [s['time'] for s in other]
+
+
+def test_messages_and_data_file(tmp_path):
+    tk = SimulatedEyeLink(sample_rate=SAMPLE_RATE, seed=3)
+    dest = str(tmp_path / 'async.asc')
+
+    async def main():
+        link = AsyncEyeLink(tk)
+        assert await link.open_data_file('async.edf') == 0
+        assert await link.send_command('sample_rate 1000') == 0
+        await link.start_recording()
+        await link.send_message('TRIALID 1')
+        await asyncio.sleep(0.1)
+        await link.send_message('TRIAL_RESULT 0')
+        await link.stop_recording()
+        error = await link.receive_data_file('async.edf', dest)
+        await link.close()
+        return error
+
+    assert asyncio.run(main()) == 0
+    assert tk.data_file == 'async.edf'
+    assert tk.commands == ['sample_rate 1000']
+    with open(dest) as f:
+        lines = f.read().splitlines()
+    messages = [line.split(' ', 1)[1] for line in lines]
+    assert messages == ['TRIALID 1', 'TRIAL_RESULT 0']
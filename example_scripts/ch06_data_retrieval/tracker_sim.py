@@ -0,0 +1,553 @@
+# Filename: tracker_sim.py
+# Author: Zhiguo Wang
+# Date: 10/18/2026
+#
+# Description:
+# A simulated tracker, so the online data retrieval scripts can be run
+# (and benchmarked) without an EyeLink. SimulatedEyeLink has the methods
+# of pylink.EyeLink that the example scripts use, e.g., startRecording(),
+# getNewestSample(), getNextData(), getFloatData(), sendMessage(), and
+# trackerTime(). While "recording", it plays back a gaze stream in real
+# time, at 250 to 2000 Hz; samples become available over the "link" at
+# their timestamp, events when the (simulated) parser has detected them.
+#
+# The gaze stream is either synthetic (fixations with a bit of noise,
+# main-sequence saccades, and the occasional blink; see SyntheticGaze), or
+# a recording, e.g., the samples and events of a session parsed with the
+# ch08 scripts (see RecordedGaze).
+#
+# Usage:
+# tk = SimulatedEyeLink(sample_rate=2000)  # instead of pylink.EyeLink()
+# tk.startRecording(1, 1, 1, 1)
+# smp = tk.getNewestSample()
+# print(smp.getTime(), smp.getRightEye().getGaze())
+
+import time
+from bisect import bisect_right
+from math import atan2, degrees, hypot
+import numpy as np
+import pylink
+from sample_ring import MISSING
+
+
+class SimEyeData(object):
+    '''The data of one eye in a sample, as in pylink'''
+
+    def __init__(self, gaze, pupil):
+        self.gaze = gaze
+        self.pupil = pupil
+
+    def getGaze(self):
+        return self.gaze
+
+    def getPupilSize(self):
+        return self.pupil
+
+    def getHREF(self):
+        return self.gaze  # HREF is not simulated
+
+    def getRawPupil(self):
+        return self.gaze  # raw pupil position is not simulated
+
+
+class SimSample(object):
+    '''A sample, with the methods of a pylink Sample'''
+
+    def __init__(self, t, eye, gaze, pupil):
+        self.t = t
+        self.eye = eye
+        self.data = SimEyeData(gaze, pupil)
+
+    def getTime(self):
+        return self.t
+
+    def getType(self):
+        return pylink.SAMPLE_TYPE
+
+    def getEye(self):
+        return self.eye
+
+    def isLeftSample(self):
+        return self.eye == pylink.LEFT_EYE
+
+    def isRightSample(self):
+        return self.eye == pylink.RIGHT_EYE
+
+    def isBinocular(self):
+        return False
+
+    def getLeftEye(self):
+        return self.data if self.eye == pylink.LEFT_EYE else None
+
+    def getRightEye(self):
+        return self.data if self.eye == pylink.RIGHT_EYE else None
+
+
+class SimEvent(object):
+    '''An eye event, with the methods of the pylink event classes; the
+    values that do not apply to an event type are NaN'''
+
+    NAN2 = (float('nan'), float('nan'))
+
+    def __init__(self, ev_type, eye, t, start, end, start_gaze=NAN2,
+                 end_gaze=NAN2, avg_gaze=NAN2, ppd=NAN2, start_pupil=0.0,
+                 avg_pupil=0.0, amplitude=NAN2, peak_vel=float('nan')):
+        self.type = ev_type
+        self.eye = eye
+        self.t = t
+        self.start = start
+        self.end = end
+        self.start_gaze = start_gaze
+        self.end_gaze = end_gaze
+        self.avg_gaze = avg_gaze
+        self.ppd = ppd
+        self.start_pupil = start_pupil
+        self.avg_pupil = avg_pupil
+        self.amplitude = amplitude
+        self.peak_vel = peak_vel
+
+    def getType(self):
+        return self.type
+
+    def getEye(self):
+        return self.eye
+
+    def getTime(self):
+        return self.t
+
+    def getStartTime(self):
+        return self.start
+
+    def getEndTime(self):
+        return self.end
+
+    def getStartGaze(self):
+        return self.start_gaze
+
+    def getEndGaze(self):
+        return self.end_gaze
+
+    def getAverageGaze(self):
+        return self.avg_gaze
+
+    def getStartPPD(self):
+        return self.ppd
+
+    def getEndPPD(self):
+        return self.ppd
+
+    def getStartHREF(self):
+        return self.NAN2  # no HREF data in the simulation
+
+    def getEndHREF(self):
+        return self.NAN2
+
+    def getStartPupilSize(self):
+        return self.start_pupil
+
+    def getAveragePupilSize(self):
+        return self.avg_pupil
+
+    def getAmplitude(self):
+        return self.amplitude
+
+    def getAngle(self):
+        return degrees(atan2(-self.amplitude[1], self.amplitude[0]))
+
+    def getAverageVelocity(self):
+        duration = (self.end - self.start)/1000.0
+        return hypot(*self.amplitude)/duration if duration > 0 else 0.0
+
+    def getPeakVelocity(self):
+        return self.peak_vel
+
+    def getStartVelocity(self):
+        return float('nan')
+
+    def getEndVelocity(self):
+        return float('nan')
+
+
+class GazeStream(object):
+    '''A gaze stream, i.e., samples (t, x, y, pupil) and events
+    (time available over the link, data type, SimEvent); the times are
+    in ms, from the start of the recording'''
+
+    def __init__(self):
+        self.t = []
+        self.x = []
+        self.y = []
+        self.pupil = []
+        self.events = []
+
+    def extend(self, t_until):
+        '''Make sure the stream is available up to t_until; a stream that
+        is generated on the fly adds samples and events here'''
+
+        pass
+
+
+class SyntheticGaze(GazeStream):
+    '''A synthetic gaze stream: fixations (with noise and slow pupil size
+    changes), saccades following the main sequence, and blinks'''
+
+    def __init__(self, sample_rate=1000, scn_w=1920, scn_h=1080, ppd=35.0,
+                 eye=pylink.RIGHT_EYE, event_delay=6.0, update_interval=50,
+                 blink_rate=0.05, seed=None):
+        '''sample_rate: 250, 500, 1000, or 2000 Hz
+        scn_w, scn_h: screen resolution, in pixels
+        ppd: pixels per degree
+        eye: the eye to simulate, pylink.LEFT_EYE or pylink.RIGHT_EYE
+        event_delay: how long it takes the parser to detect an event, ms
+        update_interval: FIXUPDATE interval, in ms (0 to disable)
+        blink_rate: chance of a blink after each fixation
+        seed: seed of the random number generator'''
+
+        GazeStream.__init__(self)
+        self.dt = 1000.0/sample_rate
+        self.scn_w, self.scn_h = scn_w, scn_h
+        self.ppd = ppd
+        self.eye = eye
+        self.event_delay = event_delay
+        self.update_interval = update_interval
+        self.blink_rate = blink_rate
+        self.rng = np.random.default_rng(seed)
+        self.pos = (scn_w/2.0, scn_h/2.0)  # current gaze position
+        self.t_next = 0.0  # time of the next sample
+        self.pupil_size = 900.0
+
+    def extend(self, t_until):
+        while self.t_next <= t_until:
+            self.add_fixation()
+            if self.rng.random() < self.blink_rate:
+                self.add_blink()
+            self.add_saccade()
+
+    def times(self, duration):
+        '''Sample times for the next "duration" ms'''
+
+        n = max(int(round(duration/self.dt)), 1)
+        t = self.t_next + np.arange(n)*self.dt
+        self.t_next = t[-1] + self.dt
+        return t
+
+    def add_samples(self, t, x, y, pupil):
+        self.t.extend(t.tolist())
+        self.x.extend(x.tolist())
+        self.y.extend(y.tolist())
+        self.pupil.extend(pupil.tolist())
+
+    def add_event(self, t_avail, ev_type, t, start, end, **kwargs):
+        self.events.append((t_avail, ev_type,
+                            SimEvent(ev_type, self.eye, t, start, end,
+                                     ppd=(self.ppd, self.ppd), **kwargs)))
+
+    def add_fixation(self):
+        '''A fixation of 150 to 600 ms, with STARTFIX, FIXUPDATE, and
+        ENDFIX events'''
+
+        duration = min(max(self.rng.gamma(6.0, 45.0), 150.0), 600.0)
+        t = self.times(duration)
+        noise = 0.03*self.ppd  # ~0.03 deg of noise
+        x = self.pos[0] + self.rng.normal(0.0, noise, len(t))
+        y = self.pos[1] + self.rng.normal(0.0, noise, len(t))
+        self.pupil_size = min(max(self.pupil_size +
+                                  self.rng.normal(0.0, 20.0), 600.0), 1200.0)
+        pupil = self.pupil_size + self.rng.normal(0.0, 2.0, len(t))
+        self.add_samples(t, x, y, pupil)
+
+        start, end = t[0], t[-1]
+        self.add_event(start + self.event_delay, pylink.STARTFIX, start,
+                       start, start, start_gaze=(x[0], y[0]),
+                       start_pupil=pupil[0])
+        if self.update_interval > 0:
+            for t_upd in np.arange(start + self.update_interval, end,
+                                   self.update_interval):
+                k = t <= t_upd
+                self.add_event(t_upd + self.event_delay, pylink.FIXUPDATE,
+                               t_upd, start, t_upd,
+                               avg_gaze=(x[k].mean(), y[k].mean()),
+                               avg_pupil=pupil[k].mean())
+        self.add_event(end + self.event_delay, pylink.ENDFIX, end, start,
+                       end, start_gaze=(x[0], y[0]),
+                       end_gaze=(x[-1], y[-1]), avg_gaze=(x.mean(), y.mean()),
+                       start_pupil=pupil[0], avg_pupil=pupil.mean())
+
+    def add_saccade(self):
+        '''A saccade of 2 to 15 deg, in a random direction, with a
+        minimum-jerk position profile and main-sequence duration'''
+
+        amp = self.rng.uniform(2.0, 15.0)*self.ppd
+        angle = self.rng.uniform(0.0, 2.0*np.pi)
+        x0, y0 = self.pos
+        x1 = min(max(x0 + amp*np.cos(angle), 0.05*self.scn_w),
+                 0.95*self.scn_w)
+        y1 = min(max(y0 - amp*np.sin(angle), 0.05*self.scn_h),
+                 0.95*self.scn_h)
+        amp_deg = hypot(x1 - x0, y1 - y0)/self.ppd
+        duration = 2.2*amp_deg + 21.0  # main sequence, in ms
+
+        t = self.times(duration)
+        s = (t - t[0] + self.dt)/(len(t)*self.dt)
+        profile = 10*s**3 - 15*s**4 + 6*s**5
+        x = x0 + (x1 - x0)*profile
+        y = y0 + (y1 - y0)*profile
+        pupil = np.full(len(t), self.pupil_size)
+        self.add_samples(t, x, y, pupil)
+        self.pos = (x1, y1)
+
+        start, end = t[0], t[-1]
+        self.add_event(start + self.event_delay, pylink.STARTSACC, start,
+                       start, start, start_gaze=(x0, y0))
+        self.add_event(end + self.event_delay, pylink.ENDSACC, end, start,
+                       end, start_gaze=(x0, y0), end_gaze=(x1, y1),
+                       amplitude=((x1 - x0)/self.ppd, (y1 - y0)/self.ppd),
+                       peak_vel=1.875*amp_deg/(duration/1000.0))
+
+    def add_blink(self):
+        '''A blink of 80 to 200 ms, gaze and pupil data are missing'''
+
+        t = self.times(self.rng.uniform(80.0, 200.0))
+        missing = np.full(len(t), MISSING)
+        self.add_samples(t, missing, missing, np.zeros(len(t)))
+
+        start, end = t[0], t[-1]
+        self.add_event(start + self.event_delay, pylink.STARTBLINK, start,
+                       start, start)
+        self.add_event(end + self.event_delay, pylink.ENDBLINK, end, start,
+                       end)
+
+
+class RecordedGaze(GazeStream):
+    '''Play back recorded samples and events, e.g., a session loaded with
+    ch08_data_visualization/session_cache.py'''
+
+    def __init__(self, t, x, y, pupil, fixations=None, saccades=None,
+                 blinks=None, eye=pylink.RIGHT_EYE, ppd=35.0,
+                 event_delay=6.0):
+        '''t, x, y, pupil: the sample data, t in ms
+        fixations, saccades, blinks: the event tables (dicts of columns)
+        of a session, see ch08_data_visualization/edf_reader.py'''
+
+        GazeStream.__init__(self)
+        t0 = float(t[0])
+        self.t = (np.asarray(t, dtype=float) - t0).tolist()
+        self.x = np.nan_to_num(np.asarray(x, dtype=float),
+                               nan=MISSING).tolist()
+        self.y = np.nan_to_num(np.asarray(y, dtype=float),
+                               nan=MISSING).tolist()
+        self.pupil = np.nan_to_num(np.asarray(pupil, dtype=float)).tolist()
+
+        def add(t_avail, ev_type, t, start, end, **kwargs):
+            self.events.append((t_avail - t0 + event_delay, ev_type,
+                                SimEvent(ev_type, eye, t - t0, start - t0,
+                                         end - t0, ppd=(ppd, ppd), **kwargs)))
+
+        for fix in _rows(fixations):
+            gaze = (fix['x'], fix['y'])
+            add(fix['start'], pylink.STARTFIX, fix['start'], fix['start'],
+                fix['start'], start_gaze=gaze, start_pupil=fix['pupil'])
+            add(fix['end'], pylink.ENDFIX, fix['end'], fix['start'],
+                fix['end'], start_gaze=gaze, end_gaze=gaze, avg_gaze=gaze,
+                start_pupil=fix['pupil'], avg_pupil=fix['pupil'])
+        for sac in _rows(saccades):
+            start_gaze = (sac['start_x'], sac['start_y'])
+            end_gaze = (sac['end_x'], sac['end_y'])
+            add(sac['start'], pylink.STARTSACC, sac['start'], sac['start'],
+                sac['start'], start_gaze=start_gaze)
+            add(sac['end'], pylink.ENDSACC, sac['end'], sac['start'],
+                sac['end'], start_gaze=start_gaze, end_gaze=end_gaze,
+                amplitude=((end_gaze[0] - start_gaze[0])/ppd,
+                           (end_gaze[1] - start_gaze[1])/ppd),
+                peak_vel=sac['peak_vel'])
+        for blk in _rows(blinks):
+            add(blk['start'], pylink.STARTBLINK, blk['start'], blk['start'],
+                blk['start'])
+            add(blk['end'], pylink.ENDBLINK, blk['end'], blk['start'],
+                blk['end'])
+        self.events.sort(key=lambda ev: ev[0])
+
+    @classmethod
+    def from_session(cls, session, **kwargs):
+        '''Play back a session (samples and events) parsed from an EDF'''
+
+        smp = session['samples']
+        return cls(smp['timestamp'], smp['gaze_x'], smp['gaze_y'],
+                   smp['pupil'], session.get('fixations'),
+                   session.get('saccades'), session.get('blinks'), **kwargs)
+
+
+def _rows(table):
+    '''Iterate over the rows of a table (a dict of columns)'''
+
+    if not table:
+        return
+    columns = list(table)
+    for values in zip(*[table[col] for col in columns]):
+        yield dict(zip(columns, values))
+
+
+class SimulatedEyeLink(object):
+    '''A drop-in replacement for pylink.EyeLink, no tracker needed'''
+
+    def __init__(self, sample_rate=1000, stream=None, link_delay=1.0,
+                 seed=None, **kwargs):
+        '''sample_rate: sampling rate of the synthetic gaze stream
+        stream: a function returning a new GazeStream for each recording,
+        by default a SyntheticGaze with the other keyword arguments
+        link_delay: delay of the samples over the link, in ms
+        seed: seed of the synthetic gaze streams'''
+
+        if stream is None:
+            def stream():
+                self._seed = None if seed is None else self._seed + 1
+                return SyntheticGaze(sample_rate, seed=self._seed, **kwargs)
+        self._seed = seed
+        self._new_stream = stream
+        self.link_delay = link_delay
+        self._clock_start = time.perf_counter()
+        self._time_offset = 1000000.0  # tracker time at start up, in ms
+        self._recording = False
+        self._stream = None
+        self._rec_start = 0.0
+        self._link_samples = self._link_events = False
+        self._next_sample = self._next_event = 0
+        self._current = None
+        self.messages = []  # (tracker time, message)
+        self.commands = []
+        self.data_file = None
+
+    # Tracker clock
+    def trackerTimeUsec(self):
+        return (self._time_offset +
+                (time.perf_counter() - self._clock_start)*1000.0)*1000.0
+
+    def trackerTime(self):
+        return int(self.trackerTimeUsec()/1000.0)
+
+    def _now(self):
+        '''Time since the recording started, in ms'''
+
+        return self.trackerTimeUsec()/1000.0 - self._rec_start
+
+    # Connection, commands, and messages
+    def isConnected(self):
+        return 1
+
+    def close(self):
+        self._recording = False
+
+    def sendCommand(self, command):
+        self.commands.append(command)
+        return 0
+
+    def sendMessage(self, message):
+        self.messages.append((self.trackerTime(), message))
+        return 0
+
+    def openDataFile(self, edf_name):
+        self.data_file = edf_name
+        return 0
+
+    def closeDataFile(self):
+        return 0
+
+    def receiveDataFile(self, src, dest):
+        '''There is no EDF data file, save the messages instead'''
+
+        with open(dest, 'w') as f:
+            for t, msg in self.messages:
+                f.write('MSG\t%d %s\n' % (t, msg))
+        return 0
+
+    def doTrackerSetup(self):
+        return 0
+
+    def doDriftCorrect(self, x, y, draw, allow_setup):
+        return 0
+
+    def eyeAvailable(self):
+        return self._stream_eye()
+
+    def getCurrentMode(self):
+        if self._recording:
+            return pylink.IN_RECORD_MODE
+        return pylink.IN_IDLE_MODE
+
+    # Recording
+    def startRecording(self, file_samples, file_events, link_samples,
+                       link_events):
+        self._stream = self._new_stream()
+        self._rec_start = self.trackerTimeUsec()/1000.0
+        self._link_samples = bool(link_samples)
+        self._link_events = bool(link_events)
+        self._next_sample = self._next_event = 0
+        self._recording = True
+        return 0
+
+    def stopRecording(self):
+        self._recording = False
+
+    def isRecording(self):
+        return 0 if self._recording else pylink.TRIAL_ERROR
+
+    def _stream_eye(self):
+        return getattr(self._stream, 'eye', pylink.RIGHT_EYE)
+
+    def _sample(self, i):
+        stream = self._stream
+        return SimSample(self._rec_start + stream.t[i], self._stream_eye(),
+                         (stream.x[i], stream.y[i]), stream.pupil[i])
+
+    def _event(self, i):
+        ev = self._stream.events[i][2]
+        # Event times are relative to the start of the recording
+        return SimEvent(ev.type, ev.eye, self._rec_start + ev.t,
+                        self._rec_start + ev.start, self._rec_start + ev.end,
+                        ev.start_gaze, ev.end_gaze, ev.avg_gaze, ev.ppd,
+                        ev.start_pupil, ev.avg_pupil, ev.amplitude,
+                        ev.peak_vel)
+
+    def getNewestSample(self):
+        '''The newest sample available over the link, None if not
+        recording'''
+
+        if not self._recording:
+            return None
+        t_avail = self._now() - self.link_delay
+        self._stream.extend(t_avail)
+        i = bisect_right(self._stream.t, t_avail) - 1
+        return self._sample(i) if i >= 0 else None
+
+    def getNextData(self):
+        '''Move on to the next item in the link queue, i.e., the oldest
+        sample or event not retrieved yet; return its data type, or 0 if
+        the queue is empty'''
+
+        if not self._recording:
+            return 0
+        now = self._now()
+        stream = self._stream
+        stream.extend(now)
+
+        # The next sample and event, if they are available by now
+        t_smp = t_ev = float('inf')
+        if self._link_samples and self._next_sample < len(stream.t):
+            t_smp = stream.t[self._next_sample] + self.link_delay
+        if self._link_events and self._next_event < len(stream.events):
+            t_ev = stream.events[self._next_event][0]
+        if min(t_smp, t_ev) > now:
+            return 0
+
+        if t_smp <= t_ev:
+            self._current = self._sample(self._next_sample)
+            self._next_sample += 1
+            return pylink.SAMPLE_TYPE
+        self._current = self._event(self._next_event)
+        self._next_event += 1
+        return self._current.type
+
+    def getFloatData(self):
+        '''The item selected by the last getNextData() call'''
+
+        return self._current
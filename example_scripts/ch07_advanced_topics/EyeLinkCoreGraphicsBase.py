@@ -0,0 +1,279 @@
+# Filename: EyeLinkCoreGraphicsBase.py
+# Author: Zhiguo Wang
+# Date: 10/18/2026
+#
+# Description:
+# The parts of a CoreGraphics library that do not depend on the graphics
+# backend: translating key presses into pylink key codes, the colors of
+# the camera image overlay (cross hairs, boxes), and converting the camera
+# image with its palette. The key and color maps are dictionaries, built
+# once, rather than a chain of if/elif tests run for every key press and
+# every line drawn.
+#
+# A renderer, e.g., EyeLinkCoreGraphicsPsychoPy (coregraphics_PsychoPy) or
+# EyeLinkCoreGraphicsPyGame (coregraphics_Pygame), subclasses the base and
+# provides the backend-specific parts:
+# keyMap: a dictionary, key reported by the backend -> pylink key code
+# poll_keys(): return the key presses, a list of (key, modifier)
+# make_color(rgba): convert a color (0-255 RGBA) to a backend color
+# new_image(width, height): called when the camera image size changes
+# show_image(frame): show the camera image, once all lines are in
+# along with the calibration target and the other drawing routines.
+# This is the only copy of the base; the PsychoPy renderers in
+# ch05_data_viewer and ch06_data_retrieval import it from this folder.
+#
+# The overlay of the camera image (cross hairs, boxes, and the search
+# limits) is redrawn for every frame, but rarely changes from one frame to
+# the next. A renderer can keep the objects it draws in a DrawingPool, to
+# reuse them, and only update those that changed; lozenge_vertices()
+# scales a cached unit lozenge, rather than computing the arcs each time.
+#
+# Usage:
+# class EyeLinkCoreGraphicsMyBackend(EyeLinkCoreGraphicsBase):
+#     keyMap = {...}
+#     def poll_keys(self): ...
+
+import time
+from math import pi
+import numpy as np
+import pylink
+
+# pylink key codes of the special keys, by the key names used in PsychoPy
+PYLINK_KEYS = {
+    'f1': pylink.F1_KEY, 'f2': pylink.F2_KEY, 'f3': pylink.F3_KEY,
+    'f4': pylink.F4_KEY, 'f5': pylink.F5_KEY, 'f6': pylink.F6_KEY,
+    'f7': pylink.F7_KEY, 'f8': pylink.F8_KEY, 'f9': pylink.F9_KEY,
+    'f10': pylink.F10_KEY,
+    'pageup': pylink.PAGE_UP, 'pagedown': pylink.PAGE_DOWN,
+    'up': pylink.CURS_UP, 'down': pylink.CURS_DOWN,
+    'left': pylink.CURS_LEFT, 'right': pylink.CURS_RIGHT,
+    'backspace': ord('\b'), 'return': pylink.ENTER_KEY, 'space': ord(' '),
+    'escape': pylink.ESC_KEY, 'tab': ord('\t'),
+    # plus/equal & minus signs for CR threshold adjustment
+    'equal': ord('+'), 'num_add': ord('+'),
+    'minus': ord('-'), 'num_subtract': ord('-')}
+
+# Colors of the elements in the camera image, RGBA (0-255)
+OVERLAY_COLORS = {
+    pylink.CR_HAIR_COLOR: (255, 255, 255, 255),
+    pylink.PUPIL_HAIR_COLOR: (255, 255, 255, 255),
+    pylink.PUPIL_BOX_COLOR: (0, 255, 0, 255),
+    pylink.SEARCH_LIMIT_BOX_COLOR: (255, 0, 0, 255),
+    pylink.MOUSE_CURSOR_COLOR: (255, 0, 0, 255)}
+DEFAULT_COLOR = (128, 128, 128, 255)
+
+# Unit lozenges (a radius of 1), by orientation and aspect ratio
+_unit_lozenges = {}
+
+
+def _unit_lozenge(horizontal, ratio, n):
+    '''The vertices of a lozenge with a radius of 1, "ratio" times as long
+    as it is wide, the top-left corner of its bounding box at (0, 0), and
+    the y axis pointing up'''
+
+    if horizontal:
+        # two arcs, on the left and right
+        t1 = np.linspace(pi/2, pi*3/2, n)
+        t2 = np.linspace(pi*3/2, pi*5/2, n)
+        cx, cy = np.repeat([1.0, 2*ratio - 1], n), -1.0
+    else:
+        # two arcs, at the top and bottom
+        t1 = np.linspace(0, pi, n)
+        t2 = np.linspace(pi, 2*pi, n)
+        cx, cy = 1.0, np.repeat([-1.0, 1 - 2*ratio], n)
+    t = np.concatenate((t1, t2))
+    return np.column_stack((np.cos(t) + cx, np.sin(t) + cy))
+
+
+def lozenge_vertices(x, y, width, height, n=72):
+    '''Return the vertices of a lozenge (e.g., the search limits), an
+    (n*2, 2) array, or None if it is too small to draw
+
+    x, y: the top-left corner of the bounding box, the y axis pointing up
+    width, height: size of the bounding box
+    n: number of vertices per arc'''
+
+    rad = min(width, height)/2.0
+    if rad <= 0:
+        return None
+    key = (width > height, max(width, height)/(rad*2), n)
+    unit = _unit_lozenges.get(key)
+    if unit is None:
+        if len(_unit_lozenges) >= 64:
+            _unit_lozenges.clear()
+        unit = _unit_lozenges[key] = _unit_lozenge(*key)
+    return unit*rad + (x, y)
+
+
+class DrawingPool(object):
+    '''Objects drawn at every frame, e.g., the lines of the cross hair,
+    reused from one frame to the next'''
+
+    def __init__(self, make):
+        '''make: a function that creates a new object'''
+
+        self.make = make
+        self.items = []  # [object, key]
+        self.n = 0  # the number of objects drawn in this frame
+
+    def reset(self):
+        '''Start a new frame'''
+
+        self.n = 0
+
+    def get(self, key):
+        '''Return the next object, and True if it needs updating, i.e.,
+        if its key (e.g., position and color) differs from the key of the
+        object drawn at the same point of the previous frame'''
+
+        n = self.n
+        self.n += 1
+        if n == len(self.items):
+            self.items.append([self.make(), key])
+            return self.items[n][0], True
+        item = self.items[n]
+        if item[1] == key:
+            return item[0], False
+        item[1] = key
+        return item[0], True
+
+
+class EyeLinkCoreGraphicsBase(pylink.EyeLinkCustomDisplay):
+    '''Backend-neutral base of the CoreGraphics libraries'''
+
+    keyMap = {}  # key reported by the backend -> pylink key code
+    bottomUp = False  # store the camera image from the bottom row up
+
+    def __init__(self):
+        pylink.EyeLinkCustomDisplay.__init__(self)
+
+        # Overlay colors, converted once for the backend
+        self.colorMap = dict((index, self.make_color(rgba))
+                             for index, rgba in OVERLAY_COLORS.items())
+        self.defaultColor = self.make_color(DEFAULT_COLOR)
+
+        # The palette, a lookup table from palette index to color, and
+        # the camera image, preallocated once its size is known
+        self.pal = None
+        self.frame = None
+
+        # The DrawingPools of the camera image overlay, see draw_overlay()
+        self.overlayPools = []
+
+        # Frames-per-second counter for the camera image; set showFPS to
+        # True to print the frame rate every second
+        self.showFPS = False
+        self.cameraFPS = 0.0
+        self.frameCount = 0
+        self.fpsStart = time.perf_counter()
+        self.frameStart = self.fpsStart  # when the latest frame started
+
+    def poll_keys(self):
+        '''Return the key presses, a list of (key, modifier)'''
+
+        return []
+
+    def default_key(self, key):
+        '''The pylink key code of a key not in keyMap'''
+
+        return 0
+
+    def make_color(self, rgba):
+        '''Convert a color, (r, g, b, a) from 0 to 255, to a backend color'''
+
+        return rgba
+
+    def make_palette(self, rgb):
+        '''Convert the palette, a (256, 3) uint8 array, to a lookup table in
+        the format of the backend'''
+
+        return rgb
+
+    def new_image(self, width, height):
+        '''Called when the size of the camera image changes'''
+
+        pass
+
+    def show_image(self, frame):
+        '''Show the camera image, and draw the cross hair'''
+
+        pass
+
+    def get_input_key(self):
+        '''Translate the key presses into pylink key codes'''
+
+        key_map = self.keyMap
+        ky = []
+        for key, mod in self.poll_keys():
+            k = key_map.get(key)
+            if k is None:
+                k = self.default_key(key)
+            ky.append(pylink.KeyInput(k, mod))
+
+        return ky
+
+    def getColorFromIndex(self, colorindex):
+        '''Return the backend color of an element in the camera image'''
+
+        return self.colorMap.get(colorindex, self.defaultColor)
+
+    def set_image_palette(self, r, g, b):
+        '''Build the lookup table from palette index to color; indices
+        beyond the palette are shown in black'''
+
+        rgb = np.column_stack((r, g, b))[:256]
+        pal = np.zeros((256, 3), dtype=np.uint8)
+        pal[:len(rgb)] = rgb
+        self.pal = self.make_palette(pal)
+
+    def draw_image_line(self, width, line, totlines, buff):
+        '''Convert a line of the camera image with the palette lookup
+        table, straight into the preallocated frame; show the image once
+        all lines are in'''
+
+        if self.pal is None:
+            return
+        if line == 1:
+            self.frameStart = time.perf_counter()
+
+        # (Re)allocate the frame if the image size changes
+        if self.frame is None or self.frame.shape[:2] != (totlines, width):
+            self.frame = np.zeros((totlines, width, 3), dtype=self.pal.dtype)
+            self.new_image(width, totlines)
+
+        # Look up the colors of the whole line at once
+        try:
+            indices = np.frombuffer(buff, dtype=np.uint8, count=width)
+        except (TypeError, ValueError):
+            indices = np.asarray(buff[:width], dtype=np.uint8)
+        row = totlines - line if self.bottomUp else line - 1
+        self.frame[row, :len(indices)] = self.pal[indices]
+
+        if line == totlines:
+            self.show_image(self.frame)
+            self.count_frame()
+
+    def draw_overlay(self):
+        '''Draw the cross hair, reusing the objects in overlayPools'''
+
+        for pool in self.overlayPools:
+            pool.reset()
+        self.draw_cross_hair()
+
+    def reset_frame_count(self):
+        '''Restart the frames-per-second counter'''
+
+        self.frameCount = 0
+        self.fpsStart = time.perf_counter()
+
+    def count_frame(self):
+        '''Update the frame rate of the camera image, once a second'''
+
+        self.frameCount += 1
+        t = time.perf_counter()
+        if t - self.fpsStart >= 1.0:
+            self.cameraFPS = self.frameCount/(t - self.fpsStart)
+            if self.showFPS:
+                print('Camera image: %.1f fps' % self.cameraFPS)
+            self.frameCount = 0
+            self.fpsStart = t
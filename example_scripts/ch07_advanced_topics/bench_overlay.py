@@ -0,0 +1,181 @@
+# Filename: bench_overlay.py
+# Author: Zhiguo Wang
+# Date: 10/18/2026
+#
+# Description:
+# Benchmark the overlay of the camera image (cross hairs, pupil box, and
+# the search limits) of EyeLinkCoreGraphicsPsychoPy. For each camera frame,
+# pylink calls draw_line() for the cross hairs and boxes, and
+# draw_lozenge() for the search limits. We time one frame of overlay, 8
+# lines and a lozenge, drawn
+# - the old way: the lozenge arcs computed with list comprehensions, a new
+#   ShapeStim for the lozenge, and a single Line updated for every line;
+# - the new way: a cached unit lozenge, scaled with NumPy (see
+#   lozenge_vertices in EyeLinkCoreGraphicsBase.py), and the lines and
+#   lozenges kept in DrawingPools, updated only when they change.
+# The pupil box and cross hairs move with the pupil, so we time a still
+# overlay and one where 6 of the 8 lines move in every frame, and the
+# lozenge vertices alone, for a lozenge that moves in every frame. If
+# PsychoPy is not installed, only the geometry is timed.
+#
+# Usage:
+# python bench_overlay.py
+
+import time
+from math import sin, cos, pi
+from numpy import linspace
+from EyeLinkCoreGraphicsBase import DrawingPool, lozenge_vertices
+
+try:
+    from psychopy import visual
+except ImportError:
+    visual = None
+
+N_FRAMES = 2000
+LOZENGE = (-150.0, 120.0, 300.0, 240.0)  # x, y, width, height
+
+
+def old_lozenge(x, y, width, height):
+    '''The lozenge vertices, computed as draw_lozenge used to'''
+
+    if width > height:
+        rad = height / 2
+        Xs1 = [rad*cos(t) + x + rad for t in linspace(pi/2, pi/2+pi, 72)]
+        Ys1 = [rad*sin(t) + y - rad for t in linspace(pi/2, pi/2+pi, 72)]
+        Xs2 = [rad*cos(t) + x - rad + width
+               for t in linspace(pi/2+pi, pi/2+2*pi, 72)]
+        Ys2 = [rad*sin(t) + y - rad for t in linspace(pi/2+pi, pi/2+2*pi, 72)]
+    else:
+        rad = width / 2
+        Xs1 = [rad*cos(t) + x + rad for t in linspace(0, pi, 72)]
+        Ys1 = [rad*sin(t) + y - rad for t in linspace(0, pi, 72)]
+        Xs2 = [rad*cos(t) + x + rad for t in linspace(pi, 2*pi, 72)]
+        Ys2 = [rad*sin(t) + y + rad - height for t in linspace(pi, 2*pi, 72)]
+    return list(zip(Xs1 + Xs2, Ys1 + Ys2))
+
+
+def overlay_lines(frame, moving):
+    '''The 8 lines of a frame, (x1, y1, x2, y2, color); the pupil cross
+    hair and box move if "moving" is True'''
+
+    dx = (frame % 20) - 10.0 if moving else 0.0
+    lines = [(-40 + dx, 0, 40 + dx, 0, 1), (dx, -40, dx, 40, 1),
+             (-30 + dx, -30, 30 + dx, -30, 3), (-30 + dx, 30, 30 + dx, 30, 3),
+             (-30 + dx, -30, -30 + dx, 30, 3), (30 + dx, -30, 30 + dx, 30, 3),
+             (50, 10, 70, 10, 2), (60, 0, 60, 20, 2)]
+    return lines
+
+
+def bench_geometry(moving):
+    '''Time the geometry only, return the cost per frame (us) of the old
+    and new ways'''
+
+    t0 = time.perf_counter()
+    for frame in range(N_FRAMES):
+        overlay_lines(frame, moving)
+        old_lozenge(*LOZENGE)
+    t_old = (time.perf_counter() - t0)/N_FRAMES*1e6
+
+    lines = DrawingPool(lambda: None)
+    lozenges = DrawingPool(lambda: None)
+    t0 = time.perf_counter()
+    for frame in range(N_FRAMES):
+        lines.reset()
+        lozenges.reset()
+        for line in overlay_lines(frame, moving):
+            lines.get(line)
+        lozenge, changed = lozenges.get(LOZENGE)
+        if changed:
+            lozenge_vertices(*LOZENGE)
+    t_new = (time.perf_counter() - t0)/N_FRAMES*1e6
+    return t_old, t_new
+
+
+def bench_lozenge():
+    '''Time the lozenge vertices alone, for a lozenge that moves in every
+    frame (the cached unit lozenge is scaled and shifted); return the cost
+    per call (us) of the old and new ways'''
+
+    x, y, width, height = LOZENGE
+    t0 = time.perf_counter()
+    for frame in range(N_FRAMES):
+        old_lozenge(x + frame % 20, y, width, height)
+    t_old = (time.perf_counter() - t0)/N_FRAMES*1e6
+
+    t0 = time.perf_counter()
+    for frame in range(N_FRAMES):
+        lozenge_vertices(x + frame % 20, y, width, height)
+    t_new = (time.perf_counter() - t0)/N_FRAMES*1e6
+    return t_old, t_new
+
+
+def bench_psychopy(win, moving):
+    '''Time the geometry and the stimuli, return the cost per frame (us) of
+    the old and new ways; the window flips are not timed'''
+
+    colors = {1: (1, 1, 1), 2: (1, 1, 1), 3: (-1, 1, -1)}
+    line = visual.Line(win, start=(0, 0), end=(0, 0), lineWidth=2.0,
+                       units='pix')
+    t_old = 0.0
+    for frame in range(N_FRAMES):
+        t0 = time.perf_counter()
+        for x1, y1, x2, y2, color in overlay_lines(frame, moving):
+            line.start = (x1, y1)
+            line.end = (x2, y2)
+            line.lineColor = colors[color]
+            line.draw()
+        lozenge = visual.ShapeStim(win, vertices=old_lozenge(*LOZENGE),
+                                   lineWidth=2.0, lineColor=(1, -1, -1),
+                                   closeShape=True, units='pix')
+        lozenge.draw()
+        t_old += time.perf_counter() - t0
+        win.flip()
+
+    lines = DrawingPool(lambda: visual.Line(win, start=(0, 0), end=(0, 0),
+                                            lineWidth=2.0, units='pix'))
+    lozenges = DrawingPool(lambda: visual.ShapeStim(
+        win, vertices=[(0, 0)]*3, lineWidth=2.0, closeShape=True,
+        units='pix'))
+    t_new = 0.0
+    for frame in range(N_FRAMES):
+        t0 = time.perf_counter()
+        lines.reset()
+        lozenges.reset()
+        for x1, y1, x2, y2, color in overlay_lines(frame, moving):
+            line, changed = lines.get((x1, y1, x2, y2, color))
+            if changed:
+                line.start = (x1, y1)
+                line.end = (x2, y2)
+                line.lineColor = colors[color]
+            line.draw()
+        lozenge, changed = lozenges.get(LOZENGE)
+        if changed:
+            lozenge.vertices = lozenge_vertices(*LOZENGE)
+            lozenge.lineColor = (1, -1, -1)
+        lozenge.draw()
+        t_new += time.perf_counter() - t0
+        win.flip()
+
+    return t_old/N_FRAMES*1e6, t_new/N_FRAMES*1e6
+
+
+if __name__ == '__main__':
+    print('Overlay cost per camera frame, in us')
+    print('%-26s  %8s  %8s' % ('', 'old', 'new'))
+    for moving in [False, True]:
+        label = 'moving' if moving else 'still'
+        t_old, t_new = bench_geometry(moving)
+        print('%-26s  %8.1f  %8.1f' % ('geometry, %s' % label, t_old, t_new))
+    t_old, t_new = bench_lozenge()
+    print('%-26s  %8.1f  %8.1f' % ('lozenge vertices, moving', t_old, t_new))
+
+    if visual is None:
+        print('PsychoPy is not installed, the stimuli are not timed')
+    else:
+        win = visual.Window((800, 600), units='pix', allowGUI=False)
+        for moving in [False, True]:
+            label = 'moving' if moving else 'still'
+            t_old, t_new = bench_psychopy(win, moving)
+            print('%-26s  %8.1f  %8.1f' % ('PsychoPy stimuli, %s' % label,
+                                           t_old, t_new))
+        win.close()
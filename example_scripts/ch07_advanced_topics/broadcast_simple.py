@@ -4,9 +4,23 @@
 #
 # Description:
 # Broadcast allows users to retrieve realtime eye movement data
-# on a second computer
+# on a second computer. The samples are retrieved in a background thread
+# (see sample_ring.py in ch06_data_retrieval), so no samples are missed,
+# and saved to file in blocks (see sample_writer.py).
 
+import os
+import sys
+import threading
+import numpy as np
 import pylink
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             '..', 'ch06_data_retrieval'))
+from sample_ring import SampleAcquisition
+from sample_writer import SampleWriter
+
+# The columns to save, i.e., timestamp and gaze position
+GAZE_DTYPE = np.dtype([('time', np.int64), ('gaze_x', np.float32),
+                       ('gaze_y', np.float32)])
 listener = pylink.EyeLinkListener()
 
 print('Wait for a primary connection to the tracker...')
@@ -33,12 +47,19 @@ listener.broadcastOpen()
 
 # If there is a primary connection, check the current operation mode
 # and save the sample data (gaze position) to file if in recording mode
-smp_data = open('sample_data.csv', 'w')
+smp_data = SampleWriter('sample_data.csv', GAZE_DTYPE, delimiter=', ')
 mode = -1  # initial tracker operation mode
-smp_t = -32768  # initial timestamp for samples
-while listener.isConnected():
+acq = None  # the acquisition thread, running in RECORD_MODE
+n = 0  # index of the next sample to retrieve from the ring
+# pylink is not thread-safe, so the link calls made here and those of the
+# acquisition thread all hold the same lock
+link_lock = threading.Lock()
+while True:
     # Get the current Host mode and print it out
-    current_mode = listener.getTrackerMode()  
+    with link_lock:
+        if not listener.isConnected():
+            break
+        current_mode = listener.getTrackerMode()
     if current_mode is not mode:
         mode = current_mode
         if current_mode == pylink.EL_SETUP_MENU_MODE:
@@ -54,14 +75,26 @@ while listener.isConnected():
         if current_mode == pylink.EL_RECORD_MODE:
             print('Current mode: %d - EL_RECORD_MODE' % mode)
 
-    # Retrieve sample data if the tracker is in RECORD_MODE
-    if current_mode == pylink.EL_RECORD_MODE:
-        smp = listener.getNewestSample()
-        if (smp is not None) and (smp.getTime() != smp_t):
-            smp_t = smp.getTime()
-            if smp.isRightSample():
-                gaze_x, gaze_y = smp.getRightEye().getGaze()
-            elif smp.isLeftSample():
-                gaze_x, gaze_y = smp.getLeftEye().getGaze()
-            # Write the gaze position to file
-            smp_data.write('%d, %d, %d\n' % (smp_t, gaze_x, gaze_y))
+        # Retrieve the samples in a background thread in RECORD_MODE
+        if current_mode == pylink.EL_RECORD_MODE and acq is None:
+            acq = SampleAcquisition(listener, lock=link_lock)
+            acq.start()
+            n = 0
+        elif current_mode != pylink.EL_RECORD_MODE and acq is not None:
+            acq.stop()
+
+    # Hand the new samples (gaze position) over to the writer
+    if acq is not None:
+        smp, n = acq.ring.since(n)
+        smp_data.write(smp[list(GAZE_DTYPE.names)])
+        if not acq.is_alive():
+            acq = None  # all samples written, wait for the next recording
+    pylink.msecDelay(1)
+
+# The link is closed, write the remaining samples
+if acq is not None:
+    acq.stop()
+    smp, n = acq.ring.since(n)
+    smp_data.write(smp[list(GAZE_DTYPE.names)])
+smp_data.close()
+print('Sample writer: %s' % smp_data.stats())
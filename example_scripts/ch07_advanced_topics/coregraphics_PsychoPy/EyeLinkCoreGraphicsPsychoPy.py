@@ -11,12 +11,18 @@ prefs.hardware['audioLib'] = ['pyo', 'pygame']
 
 from psychopy import visual, event, core, sound
 from psychopy.tools.coordinatetools import pol2cart
-from math import sin, cos, pi
 from PIL import Image
-from numpy import linspace
-import array, string, pylink, os, numpy
+import array, string, pylink, os, sys, numpy
+# the backend-neutral base, in ch07_advanced_topics
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from EyeLinkCoreGraphicsBase import EyeLinkCoreGraphicsBase, PYLINK_KEYS, DrawingPool, lozenge_vertices
+
+class EyeLinkCoreGraphicsPsychoPy(EyeLinkCoreGraphicsBase):
+    # PsychoPy key names -> pylink key codes, the special keys and the letters
+    keyMap = dict(PYLINK_KEYS, **dict((k, ord(k)) for k in string.ascii_letters))
+    # PsychoPy shows the first row of an image array at the bottom
+    bottomUp = True
 
-class EyeLinkCoreGraphicsPsychoPy(pylink.EyeLinkCustomDisplay):
     def __init__(self, tracker, win):
         
         '''Initialize a Custom EyeLinkCoreGraphics  
@@ -24,7 +30,7 @@ class EyeLinkCoreGraphicsPsychoPy(pylink.EyeLinkCustomDisplay):
         tracker: an eye-tracker instance
         win: the Psychopy display we plan to use for stimulus presentation  '''
         
-        pylink.EyeLinkCustomDisplay.__init__(self)
+        EyeLinkCoreGraphicsBase.__init__(self)
 
         # calibration background color and target color
         self.backgroundColor = win.color
@@ -53,9 +59,10 @@ class EyeLinkCoreGraphicsPsychoPy(pylink.EyeLinkCustomDisplay):
         self.__target_beep__error__ = sound.Sound('E', octave=6, secs=0.1)
         
         self.imgBuffInitType = 'I'
-        self.imagebuffer = array.array(self.imgBuffInitType)
-        self.resizeImagebuffer = array.array(self.imgBuffInitType)
-        self.pal = None
+        self.imagebuffer = array.array(self.imgBuffInitType) # the old camera image path
+        self.palPacked = []
+        self.legacyImage = False # use the old, pixel by pixel, camera image path
+        self.imgStim = None # a single ImageStim to show the camera image
         self.img_scaling_factor = 3
         self.size = (192*self.img_scaling_factor, 160*self.img_scaling_factor)
         
@@ -81,9 +88,13 @@ class EyeLinkCoreGraphicsPsychoPy(pylink.EyeLinkCustomDisplay):
                                         'Up/Down: Pupil threshold\n' + 
                                         'Alt+arrows: Search limit')
         
-        # lines for drawing cross hair etc.
-        self.line = visual.Line(self.display, start=(0, 0), end=(0,0),
-                                lineWidth=2.0, lineColor=[0,0,0], units='pix')
+        # lines and lozenges for drawing cross hair etc., reused from one camera
+        # frame to the next (see draw_overlay)
+        self.linePool = DrawingPool(lambda: visual.Line(self.display, start=(0, 0), end=(0,0),
+                                                        lineWidth=2.0, lineColor=[0,0,0], units='pix'))
+        self.lozengePool = DrawingPool(lambda: visual.ShapeStim(self.display, vertices=[(0, 0)]*3,
+                                                                lineWidth=2.0, closeShape=True, units='pix'))
+        self.overlayPools = [self.linePool, self.lozengePool]
 
         # configure the calibration target
         self.targetSize = self.w/128.
@@ -91,6 +102,14 @@ class EyeLinkCoreGraphicsPsychoPy(pylink.EyeLinkCustomDisplay):
         self.animatedTarget = False # this is like a switch, when it's turned on the animated target is displayed
         self.movieTargetFile = None
         self.pictureTargetFile = None
+        self.calibTar = None # the target stimulus, built once in preload_targets()
+        self.targetConfig = None # the configuration the target was built with
+
+        # target-draw latency, from the draw_cal_target() call to the flip that shows
+        # the target; set logTargetLatency = True to print the latency of each target
+        self.logTargetLatency = False
+        self.targetLatency = [] # (x, y, latency in ms)
+        self.targetOnset = None # (call time, x, y) of an animated target not yet shown
 
         # make sure the tracker know the correct screen resolution being used
         self.tracker = tracker
@@ -100,10 +119,11 @@ class EyeLinkCoreGraphicsPsychoPy(pylink.EyeLinkCustomDisplay):
     def setup_cal_display(self):
         '''Set up the calibration display before entering the calibration/validation routine'''
 
+        self.preload_targets()
         self.display.clearBuffer()
         self.clear_cal_display()
         self.calibInst.autoDraw = True
-        self.animatedTarget = False
+        self.stop_animation()
 
     def clear_cal_display(self):
         '''Clear the calibration display'''
@@ -120,7 +140,7 @@ class EyeLinkCoreGraphicsPsychoPy(pylink.EyeLinkCustomDisplay):
         
         self.display.setUnits(self.units)
         self.clear_cal_display()
-        self.animatedTarget = False
+        self.stop_animation()
 
     def record_abort_hide(self):
         '''This function is called if aborted'''
@@ -131,24 +151,28 @@ class EyeLinkCoreGraphicsPsychoPy(pylink.EyeLinkCustomDisplay):
         '''Erase the calibration/validation & drift-check target'''
 
         self.clear_cal_display()
-        self.animatedTarget = False
+        self.stop_animation()
         self.display.flip()
 
-    def draw_cal_target(self, x, y):
-        '''Draw the calibration/validation & drift-check  target'''
-        
-        self.clear_cal_display()
-        xVis = (x -  self.w/2)
-        yVis = (self.h/2 - y)
-        
-        if self.calTarget is 'picture':
+    def preload_targets(self):
+        '''Build the calibration target once, before the calibration starts, so that
+        only its position changes from one calibration point to the next; the picture
+        is decoded, and the movie is opened and pre-rolled here. The target is built
+        again only if its configuration (calTarget, targetSize, etc.) changes.'''
+
+        config = (self.calTarget, self.targetSize, self.pictureTargetFile, self.movieTargetFile,
+                  str(self.foregroundColor), str(self.backgroundColor))
+        if config == self.targetConfig:
+            return
+
+        if self.calTarget == 'picture':
             if self.pictureTargetFile is None:
                 print('ERROR: Clibration target is None, please provide a picture')
                 core.quit()
             else:
                 self.calibTar = visual.ImageStim(self.display, self.pictureTargetFile, size=self.targetSize)
                 
-        elif self.calTarget is 'spiral':
+        elif self.calTarget == 'spiral':
             thetas = numpy.arange(0,1440,10)
             N=len(thetas)
             radii = numpy.linspace(0,1.0,N)*self.targetSize
@@ -156,29 +180,70 @@ class EyeLinkCoreGraphicsPsychoPy(pylink.EyeLinkCustomDisplay):
             xys = numpy.array([x,y]).transpose()
             self.calibTar = visual.ElementArrayStim(self.display, nElements=N, sizes=self.targetSize,
                                                     sfs=3.0, xys=xys, oris=-thetas)
-        elif self.calTarget is 'movie':
+        elif self.calTarget == 'movie':
             if self.movieTargetFile is None:
                 print('ERROR: Clibration target is None, please provide a movie clip')
                 core.quit()
             else:
                 self.calibTar = visual.MovieStim3(self.display, self.movieTargetFile, loop=True, size=self.targetSize)
+                # pre-roll, i.e., decode the first frame without showing it
+                self.calibTar.draw()
+                self.calibTar.pause()
+                self.display.clearBuffer()
                 
         else: #'use the default 'circle'
             self.calibTar = visual.Circle(self.display, radius=self.targetSize/2, lineColor=self.foregroundColor,
                                           fillColor=self.backgroundColor, lineWidth=self.targetSize/2., units='pix')
 
+        self.targetConfig = config
+
+    def stop_animation(self):
+        '''Stop drawing the animated target, and pause the movie'''
+
+        if self.animatedTarget and self.calTarget == 'movie':
+            self.calibTar.pause()
+        self.animatedTarget = False
+        self.targetOnset = None
+
+    def draw_cal_target(self, x, y):
+        '''Draw the calibration/validation & drift-check  target'''
+        
+        t_call = core.getTime()
+        self.preload_targets() # nothing to do, unless the target was reconfigured
+
+        # the target replaces the instructions; the flip that shows the target also
+        # clears the screen, so there is no need for an extra flip here
+        self.calibInst.autoDraw = False
+        self.title.autoDraw = False
+        xVis = (x -  self.w/2)
+        yVis = (self.h/2 - y)
+
         # update the target position
-        if self.calTarget is 'spiral':
+        if self.calTarget == 'spiral':
             self.calibTar.fieldPos = (xVis, yVis)
         else:
             self.calibTar.pos = (xVis, yVis)
 
         # handle the drawing
         if self.calTarget in ['movie', 'spiral']:
+            if self.calTarget == 'movie':
+                self.calibTar.play()
             self.animatedTarget = True # hand over drawing to get_input_key
+            self.targetOnset = (t_call, x, y) # logged at the first flip
         else:
             self.calibTar.draw()
             self.display.flip()
+            self.log_target_onset(t_call, x, y)
+
+    def log_target_onset(self, t_call, x, y):
+        '''Log the target-draw latency, i.e., the time from the draw_cal_target() call
+        to the flip that shows the target, in ms and in frames'''
+
+        latency = (core.getTime() - t_call)*1000.0
+        self.targetLatency.append((x, y, latency))
+        if self.logTargetLatency:
+            frames = latency/1000.0/self.display.monitorFramePeriod
+            print('Target at (%d, %d) shown after %.1f ms (%.2f frames)' % (x, y, latency, frames))
 
     def play_beep(self, beepid):
         ''' Play a sound during calibration/drift correct.'''
@@ -193,16 +258,6 @@ class EyeLinkCoreGraphicsPsychoPy(pylink.EyeLinkCustomDisplay):
         else:
             pass
 
-    def getColorFromIndex(self, colorindex):
-         '''Return psychopy colors for elements in the camera image'''
-         
-         if colorindex   ==  pylink.CR_HAIR_COLOR:          return (1, 1, 1)
-         elif colorindex ==  pylink.PUPIL_HAIR_COLOR:       return (1, 1, 1)
-         elif colorindex ==  pylink.PUPIL_BOX_COLOR:        return (-1, 1, -1)
-         elif colorindex ==  pylink.SEARCH_LIMIT_BOX_COLOR: return (1, -1, -1)
-         elif colorindex ==  pylink.MOUSE_CURSOR_COLOR:     return (1, -1, -1)
-         else:                                              return (0,0,0)
-
     def draw_line(self, x1, y1, x2, y2, colorindex):
         '''Draw a line. This is used for drawing crosshairs/squares'''
         
@@ -212,11 +267,13 @@ class EyeLinkCoreGraphicsPsychoPy(pylink.EyeLinkCustomDisplay):
         x1 = (+x1  - self.size[0]/2)* self.img_scaling_factor 
         y2 = (-y2  + self.size[1]/2)* self.img_scaling_factor 
         x2 = (+x2  - self.size[0]/2)* self.img_scaling_factor 
-        color = self.getColorFromIndex(colorindex)
-        self.line.start     = (x1, y1)
-        self.line.end       = (x2, y2)
-        self.line.lineColor = color
-        self.line.draw()
+        # reuse the line drawn at the same point of the previous frame
+        line, changed = self.linePool.get((x1, y1, x2, y2, colorindex))
+        if changed:
+            line.start     = (x1, y1)
+            line.end       = (x2, y2)
+            line.lineColor = self.getColorFromIndex(colorindex)
+        line.draw()
 
     def draw_lozenge(self, x, y, width, height, colorindex):
         ''' draw a lozenge to show the defined search limits
@@ -229,25 +286,14 @@ class EyeLinkCoreGraphicsPsychoPy(pylink.EyeLinkCustomDisplay):
         height = height* self.img_scaling_factor
         y = (-y + self.size[1]/2)* self.img_scaling_factor 
         x = (+x - self.size[0]/2)* self.img_scaling_factor       
-        color = self.getColorFromIndex(colorindex)
-        
-        if width > height:
-            rad = height / 2
-            if rad == 0: return #cannot draw the circle with 0 radius
-            Xs1 = [rad*cos(t) + x + rad for t in numpy.linspace(pi/2, pi/2+pi, 72)]
-            Ys1 = [rad*sin(t) + y - rad for t in numpy.linspace(pi/2, pi/2+pi, 72)]
-            Xs2 = [rad*cos(t) + x - rad + width for t in linspace(pi/2+pi, pi/2+2*pi, 72)]
-            Ys2 = [rad*sin(t) + y - rad for t in numpy.linspace(pi/2+pi, pi/2+2*pi, 72)]
-        else:
-            rad = width / 2
-            if rad == 0: return #cannot draw sthe circle with 0 radius
-            Xs1 = [rad*cos(t) + x + rad for t in numpy.linspace(0, pi, 72)]
-            Ys1 = [rad*sin(t) + y - rad for t in numpy.linspace(0, pi, 72)]
-            Xs2 = [rad*cos(t) + x + rad for t in numpy.linspace(pi, 2*pi, 72)]
-            Ys2 = [rad*sin(t) + y + rad - height for t in numpy.linspace(pi, 2*pi, 72)]
-
-        lozenge = visual.ShapeStim(self.display, vertices = list(zip(Xs1+Xs2, Ys1+Ys2)),
-                                    lineWidth=2.0, lineColor=color, closeShape=True, units='pix')    
+        if min(width, height) <= 0: return #cannot draw the circle with 0 radius
+
+        # reuse the ShapeStim drawn at the same point of the previous frame, and
+        # only update it if the lozenge has changed
+        lozenge, changed = self.lozengePool.get((x, y, width, height, colorindex))
+        if changed:
+            lozenge.vertices = lozenge_vertices(x, y, width, height)
+            lozenge.lineColor = self.getColorFromIndex(colorindex)
         lozenge.draw()
 
     def get_mouse_state(self):
@@ -281,44 +327,11 @@ class EyeLinkCoreGraphicsPsychoPy(pylink.EyeLinkCustomDisplay):
                 self.calibTar.phases -=0.02
             self.calibTar.draw()
             self.display.flip()
+            if self.targetOnset is not None:
+                self.log_target_onset(*self.targetOnset)
+                self.targetOnset = None
 
-        ky=[]
-        for keycode, modifier in event.getKeys(modifiers=True):
-            k= pylink.JUNK_KEY
-            if keycode   == 'f1': k = pylink.F1_KEY
-            elif keycode == 'f2': k = pylink.F2_KEY
-            elif keycode == 'f3': k = pylink.F3_KEY
-            elif keycode == 'f4': k = pylink.F4_KEY
-            elif keycode == 'f5': k = pylink.F5_KEY
-            elif keycode == 'f6': k = pylink.F6_KEY
-            elif keycode == 'f7': k = pylink.F7_KEY
-            elif keycode == 'f8': k = pylink.F8_KEY
-            elif keycode == 'f9': k = pylink.F9_KEY
-            elif keycode == 'f10': k = pylink.F10_KEY
-            elif keycode == 'pageup': k = pylink.PAGE_UP
-            elif keycode == 'pagedown': k = pylink.PAGE_DOWN
-            elif keycode == 'up': k = pylink.CURS_UP
-            elif keycode == 'down': k = pylink.CURS_DOWN
-            elif keycode == 'left': k = pylink.CURS_LEFT
-            elif keycode == 'right': k = pylink.CURS_RIGHT
-            elif keycode == 'backspace': k = ord('\b')
-            elif keycode == 'return': k = pylink.ENTER_KEY
-            elif keycode == 'space': k = ord(' ')
-            elif keycode == 'escape': k = pylink.ESC_KEY
-            elif keycode == 'tab': k = ord('\t')
-            elif keycode in string.ascii_letters: k = ord(keycode)
-            elif k== pylink.JUNK_KEY: k = 0
-
-            # plus/equal & minux signs for CR adjustment
-            if keycode in ['num_add', 'equal']: k = ord('+')
-            if keycode in ['num_subtract', 'minus']: k = ord('-')
-
-            if modifier['alt']==True: mod = 256
-            else: mod = 0
-            
-            ky.append(pylink.KeyInput(k, mod))
-            #event.clearEvents()
-        return ky
+        return EyeLinkCoreGraphicsBase.get_input_key(self)
 
     def exit_image_display(self):
         '''Clcear the camera image'''
@@ -339,46 +352,90 @@ class EyeLinkCoreGraphicsPsychoPy(pylink.EyeLinkCustomDisplay):
         self.size = (width, height)
         self.title.autoDraw = True
         self.calibInst.autoDraw=True
+        self.reset_frame_count()
         
     def image_title(self, text):
         '''Draw title text below the camera image'''
         
         self.title.text = text
         
+    def poll_keys(self):
+        '''Return the key presses, with the alt key as the modifier'''
+
+        return [(keycode, 256 if modifier['alt'] else 0)
+                for keycode, modifier in event.getKeys(modifiers=True)]
+
+    def make_color(self, rgba):
+        '''Convert a color from 0-255 RGBA to PsychoPy RGB (-1 to 1)'''
+
+        return tuple(c/127.5 - 1.0 for c in rgba[:3])
+
+    def make_palette(self, rgb):
+        '''The palette lookup table, with the colors from -1 to 1 as PsychoPy expects'''
+
+        return rgb.astype(numpy.float32)/127.5 - 1.0
+
+    def new_image(self, width, height):
+        '''Create a single ImageStim for the camera image, once per image size'''
+
+        self.imgStim = visual.ImageStim(self.display, image=self.frame, units='pix',
+                                        size=(width*self.img_scaling_factor, height*self.img_scaling_factor))
+
+    def show_image(self, frame):
+        '''Draw the camera image, i.e., upload the new frame to the existing texture;
+        PsychoPy shows the first row of an array at the bottom, see bottomUp'''
+
+        self.size = (frame.shape[1], frame.shape[0])
+        self.imgStim.image = frame
+        self.imgStim.draw()
+        self.draw_overlay()
+        self.display.flip()
+
     def draw_image_line(self, width, line, totlines, buff):
-        '''Display image pixel by pixel, line by line'''
+        '''Display the camera image line by line, see EyeLinkCoreGraphicsBase; set
+        self.legacyImage = True to use the old, pixel by pixel, path and compare the
+        frame rates'''
+
+        if self.legacyImage:
+            self.draw_image_line_legacy(width, line, totlines, buff)
+        else:
+            EyeLinkCoreGraphicsBase.draw_image_line(self, width, line, totlines, buff)
+
+    def draw_image_line_legacy(self, width, line, totlines, buff):
+        '''Display image pixel by pixel, line by line (the old path)'''
 
         self.size = (width, totlines)
 
         i =0
         for i in range(width):
-            try: self.imagebuffer.append(self.pal[buff[i]])
+            try: self.imagebuffer.append(self.palPacked[buff[i]])
             except: pass
             
         if line == totlines:
-            bufferv = self.imagebuffer.tostring()
+            bufferv = self.imagebuffer.tobytes()
             img = Image.frombytes("RGBX", (width, totlines), bufferv) # Pillow
             imgResize = img.resize((width*self.img_scaling_factor, totlines*self.img_scaling_factor))
             imgResizeVisual = visual.ImageStim(self.display, image=imgResize, units='pix')
             imgResizeVisual.draw()
-            self.draw_cross_hair()
+            self.draw_overlay()
             self.display.flip()
             self.imagebuffer = array.array(self.imgBuffInitType)
-            
+            self.count_frame()
             
     def set_image_palette(self, r,g,b):
-        '''Given a set of RGB colors, create a list of 24bit numbers representing the pallet.
-        I.e., RGB of (1,64,127) would be saved as 82047, or the number 00000001 01000000 011111111'''
+        '''Build the palette lookup table (see EyeLinkCoreGraphicsBase), and for the old
+        path, a list of 24bit numbers representing the pallet. I.e., RGB of (1,64,127)
+        would be saved as 82047, or the number 00000001 01000000 011111111'''
         
+        EyeLinkCoreGraphicsBase.set_image_palette(self, r, g, b)
+
         self.imagebuffer = array.array(self.imgBuffInitType)
-        self.resizeImagebuffer = array.array(self.imgBuffInitType)
-        #self.clear_cal_display()
         sz = len(r)
         i =0
-        self.pal = []
+        self.palPacked = []
         while i < sz:
             rf = int(b[i])
             gf = int(g[i])
             bf = int(r[i])
-            self.pal.append((rf<<16) | (gf<<8) | (bf))
+            self.palPacked.append((rf<<16) | (gf<<8) | (bf))
             i = i+1
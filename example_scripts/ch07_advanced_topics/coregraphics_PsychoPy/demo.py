@@ -33,6 +33,8 @@ genv.calTarget = 'spiral'
 # provide a movie clip if genv.calTarget = 'movie'
 # genv.movieTargetFile = 'starjumps100.avi'
 genv.targetSize = 32
+# print how long each calibration target takes to appear on screen
+# genv.logTargetLatency = True
 
 # Open the calibration window
 pylink.openGraphicsEx(genv)
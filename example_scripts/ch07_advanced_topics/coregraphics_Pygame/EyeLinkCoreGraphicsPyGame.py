@@ -5,16 +5,31 @@
 # Description:
 # An example CoreGraphics library implemented in Pygame
 
+import os
+import sys
+import time
 import pygame
 from pygame.locals import *
 from math import pi
-import array
 import pylink
+# the backend-neutral base, in ch07_advanced_topics
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             '..'))
+from EyeLinkCoreGraphicsBase import EyeLinkCoreGraphicsBase, PYLINK_KEYS
 
+# Pygame constants of the keys in PYLINK_KEYS, where the names differ
+PYGAME_KEY_NAMES = {'equal': 'EQUALS', 'num_add': 'KP_PLUS',
+                    'num_subtract': 'KP_MINUS'}
+
+
+class EyeLinkCoreGraphicsPyGame(EyeLinkCoreGraphicsBase):
+    # Pygame key constants -> pylink key codes
+    keyMap = dict(
+        (getattr(pygame, 'K_' + PYGAME_KEY_NAMES.get(name, name.upper())),
+         code) for name, code in PYLINK_KEYS.items())
 
-class EyeLinkCoreGraphicsPyGame(pylink.EyeLinkCustomDisplay):
     def __init__(self, tracker, win):
-        pylink.EyeLinkCustomDisplay.__init__(self)
+        EyeLinkCoreGraphicsBase.__init__(self)
 
         self.win = win  # screen to use for calibration
         self.tracker = tracker  # connection to the tracker
@@ -29,10 +44,19 @@ class EyeLinkCoreGraphicsPyGame(pylink.EyeLinkCustomDisplay):
         self.__target_beep__error__ = pygame.mixer.Sound("error.wav")
 
         self.size = (384, 320)  # size of the camera image
-        self.imagebuffer = array.array('I')  # buffer to store camera image
 
-        # Image palette; we use its indices to recreate the camera image
-        self.pal = []
+        # The camera image (see EyeLinkCoreGraphicsBase) is copied to a
+        # Surface that is reused for every frame, and then scaled into a
+        # cached Surface
+        self.__img__ = None
+        self.__scaled__ = None
+        self.title_rect = None  # screen area of the camera image title
+
+        # Frame timing overlay, showing the frame rate of the camera image
+        # and the time it takes to draw a frame; True or False
+        self.showTiming = False
+        self.draw_time = 0.0  # time to draw the latest frame, in ms
+        self.timing_rect = None
 
         self.fnt = pygame.font.SysFont('Arial', 26)  # a font object
 
@@ -76,31 +100,15 @@ class EyeLinkCoreGraphicsPyGame(pylink.EyeLinkCustomDisplay):
         '''Play warning beeps if being requested'''
 
         if self.enableBeep:
-            if beepid == pylink.DC_TARG_BEEP or
-            beepid == pylink.CAL_TARG_BEEP:
+            if (beepid == pylink.DC_TARG_BEEP or
+                    beepid == pylink.CAL_TARG_BEEP):
                 self.__target_beep__.play()
-            elif beepid == pylink.CAL_ERR_BEEP or
-            beepid == pylink.DC_ERR_BEEP:
+            elif (beepid == pylink.CAL_ERR_BEEP or
+                  beepid == pylink.DC_ERR_BEEP):
                 self.__target_beep__error__.play()
             else:  # CAL_GOOD_BEEP or DC_GOOD_BEEP
                 self.__target_beep__done__.play()
 
-    def getColorFromIndex(self, colorindex):
-        ''' Color scheme for different elements '''
-
-        if colorindex == pylink.CR_HAIR_COLOR:
-            return (255, 255, 255, 255)
-        elif colorindex == pylink.PUPIL_HAIR_COLOR:
-            return (255, 255, 255, 255)
-        elif colorindex == pylink.PUPIL_BOX_COLOR:
-            return (0, 255, 0, 255)
-        elif colorindex == pylink.SEARCH_LIMIT_BOX_COLOR:
-            return (255, 0, 0, 255)
-        elif colorindex == pylink.MOUSE_CURSOR_COLOR:
-            return (255, 0, 0, 255)
-        else:
-            return (0, 0, 0, 0)
-
     def draw_line(self, x1, y1, x2, y2, colorindex):
         ''' Draw lines for crosshair etc.'''
 
@@ -167,60 +175,16 @@ class EyeLinkCoreGraphicsPyGame(pylink.EyeLinkCustomDisplay):
 
         return (pos, state[0])
 
-    def get_input_key(self):
-        ''' Handle key input and send it over to the tracker'''
-
-        ky = []
-        for ev in pygame.event.get():
-            if ev.type == KEYDOWN:
-                keycode = ev.key
-                if keycode == K_F1:
-                    keycode = pylink.F1_KEY
-                elif keycode == K_F2:
-                    keycode = pylink.F2_KEY
-                elif keycode == K_F3:
-                    keycode = pylink.F3_KEY
-                elif keycode == K_F4:
-                    keycode = pylink.F4_KEY
-                elif keycode == K_F5:
-                    keycode = pylink.F5_KEY
-                elif keycode == K_F6:
-                    keycode = pylink.F6_KEY
-                elif keycode == K_F7:
-                    keycode = pylink.F7_KEY
-                elif keycode == K_F8:
-                    keycode = pylink.F8_KEY
-                elif keycode == K_F9:
-                    keycode = pylink.F9_KEY
-                elif keycode == K_F10:
-                    keycode = pylink.F10_KEY
-                elif keycode == K_PAGEUP:
-                    keycode = pylink.PAGE_UP
-                elif keycode == K_PAGEDOWN:
-                    keycode = pylink.PAGE_DOWN
-                elif keycode == K_UP:
-                    keycode = pylink.CURS_UP
-                elif keycode == K_DOWN:
-                    keycode = pylink.CURS_DOWN
-                elif keycode == K_LEFT:
-                    keycode = pylink.CURS_LEFT
-                elif keycode == K_RIGHT:
-                    keycode = pylink.CURS_RIGHT
-                elif keycode == K_BACKSPACE:
-                    keycode = ord('\b')
-                elif keycode == K_RETURN:
-                    keycode = pylink.ENTER_KEY
-                elif keycode == K_ESCAPE:
-                    keycode = pylink.ESC_KEY
-                elif keycode == K_TAB:
-                    keycode = ord('\t')
-                elif(keycode == pylink.JUNK_KEY):
-                    keycode = 0
-                else:
-                    pass
-                ky.append(pylink.KeyInput(keycode, ev.mod))
-
-        return ky
+    def poll_keys(self):
+        ''' Return the key presses, a list of (key, modifier)'''
+
+        return [(ev.key, ev.mod) for ev in pygame.event.get()
+                if ev.type == KEYDOWN]
+
+    def default_key(self, key):
+        ''' Keys not in keyMap are passed on as they are'''
+
+        return 0 if key == pylink.JUNK_KEY else key
 
     def exit_image_display(self):
         ''' Exit the camera image display'''
@@ -238,6 +202,7 @@ class EyeLinkCoreGraphicsPyGame(pylink.EyeLinkCustomDisplay):
         self.size = (width, height)
         self.clear_cal_display()
         self.last_mouse_state = -1
+        self.reset_frame_count()
 
         return 1
 
@@ -254,45 +219,54 @@ class EyeLinkCoreGraphicsPyGame(pylink.EyeLinkCustomDisplay):
         pygame.draw.rect(self.win, self.bgColor,
                          pygame.Rect(0, txt_pos[1], win_w, win_h))
         self.win.blit(txt_surf, txt_pos)  # draw the camera title
+        self.title_rect = pygame.Rect(0, txt_pos[1], win_w, txt_h)
+
+    def new_image(self, width, height):
+        ''' Create the Surface of the camera image, once per image size'''
 
-    def draw_image_line(self, width, line, totlines, buff):
+        self.__img__ = pygame.Surface((width, height), 0, 24)
+
+    def show_image(self, frame):
         ''' Draw the camera image'''
 
-        for i in range(width):
-            try:
-                self.imagebuffer.append(self.pal[buff[i]])
-            except:
-                pass
-
-        if line == totlines:
-            cam_img = pygame.image.frombuffer(self.imagebuffer.tostring(),
-                                              (width, totlines), 'RGBX')
-            self.__img__ = cam_img
-            self.draw_cross_hair()
-
-            # Scale the image, if needed
-            cam_img = pygame.transform.scale(cam_img, self.size)
-
-            # Draw the camera image on screen
-            cam_img_pos = ((self.win.get_width()-self.size[0])/2,
-                           (self.win.get_height()-self.size[1])/2)
-            surf = pygame.display.get_surface()
-            surf.blit(cam_img, cam_img_pos)
-            # Redraw in the back buffer
+        # pygame.surfarray indexes the pixels by (x, y)
+        pygame.surfarray.blit_array(self.__img__, frame.swapaxes(0, 1))
+        self.draw_cross_hair()
+
+        # Scale the image into the cached Surface
+        if self.__scaled__ is None or self.__scaled__.get_size() != self.size:
+            self.__scaled__ = pygame.Surface(self.size, 0, self.__img__)
+        pygame.transform.scale(self.__img__, self.size, self.__scaled__)
+
+        # Draw the camera image on screen, and only update the screen
+        # areas that have changed
+        cam_img_pos = ((self.win.get_width() - self.size[0])//2,
+                       (self.win.get_height() - self.size[1])//2)
+        surf = pygame.display.get_surface()
+        dirty = [surf.blit(self.__scaled__, cam_img_pos)]
+        if self.title_rect is not None:
+            dirty.append(self.title_rect)
+        self.draw_time = (time.perf_counter() - self.frameStart)*1000.0
+        if self.showTiming:
+            dirty.append(self.draw_timing(surf))
+        if surf.get_flags() & (DOUBLEBUF | OPENGL):
+            # a double-buffered display has to be flipped as a whole
             pygame.display.flip()
-            surf.blit(cam_img, cam_img_pos)
-
-            self.imagebuffer = array.array('I')
-
-    def set_image_palette(self, r, g, b):
-        ''' Get the color palette for the camera image'''
-
-        sz = len(r)
-        i = 0
-        self.pal = []
-        while i < sz:
-            rf = int(b[i])
-            gf = int(g[i])
-            bf = int(r[i])
-            self.pal.append((rf << 16) | (gf << 8) | (bf))
-            i = i + 1
+            surf.blit(self.__scaled__, cam_img_pos)
+        else:
+            pygame.display.update(dirty)
+
+    def draw_timing(self, surf):
+        ''' Show the frame rate and the draw time in the top-left corner
+        of the screen, return the screen area it covers'''
+
+        text = 'Camera image: %.1f fps, %.1f ms/frame' % (
+            self.cameraFPS, self.draw_time)
+        txt_surf = self.fnt.render(text, True, self.fgColor, self.bgColor)
+        # clear the area of the previous overlay, which may be wider
+        rect = txt_surf.get_rect(topleft=(10, 10))
+        if self.timing_rect is not None:
+            surf.fill(self.bgColor, self.timing_rect)
+            rect = rect.union(self.timing_rect)
+        self.timing_rect = surf.blit(txt_surf, (10, 10))
+        return rect
@@ -3,14 +3,43 @@
 # Date: 11/7/2020
 #
 # Description:
-# Playback the recording from the previous trial
+# Playback the recording from the previous trial; the saccade towards the
+# target is detected online, from the samples (see online_detector.py in
+# ch06_data_retrieval), as soon as the gaze has moved 2 deg, rather than
+# waiting for the ENDSACC event of the Host
 
+import os
+import sys
 import pylink
 import pygame
-from math import hypot
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             '..', 'ch06_data_retrieval'))
+from event_drain import drain_link
+from online_detector import OnlineDetector
 
 # Monitor resolution
 SCN_WIDTH, SCN_HEIGHT = (800, 600)
+# Pixels per degree, only used if the samples over the link have no
+# resolution data (GAZERES)
+PPD = 30.0
+SAMPLE_RATE = 1000  # sampling rate of the tracker
+
+
+def link_ppd(tk, timeout=100):
+    '''Pixels per degree, from the resolution data (GAZERES) of the newest
+    sample over the link; PPD if no valid sample arrives within timeout
+    (ms)'''
+
+    t_start = pylink.currentTime()
+    while pylink.currentTime() - t_start < timeout:
+        smp = tk.getNewestSample()
+        if smp is not None:
+            ppd_x, ppd_y = smp.getPPD()
+            if 0 < ppd_x < 1e4 and 0 < ppd_y < 1e4:
+                return (ppd_x + ppd_y)/2.0
+        pylink.msecDelay(1)
+    return PPD
+
 
 # Connect to the tracker
 tk = pylink.EyeLink('100.1.1.1')
@@ -18,6 +47,10 @@ tk = pylink.EyeLink('100.1.1.1')
 # Send screen pixel coordinates to the tracker
 tk.sendCommand('screen_pixel_coords 0 0 %d %d' % (SCN_WIDTH, SCN_HEIGHT))
 
+# Set the sampling rate, and make the gaze samples available over the link
+tk.sendCommand('sample_rate %d' % SAMPLE_RATE)
+tk.sendCommand('link_sample_data = LEFT,RIGHT,GAZE,GAZERES,PUPIL,AREA,STATUS')
+
 # Open a Pygame window to force openGraphics() to use a
 # non-fullscreen window
 win = pygame.display.set_mode((SCN_WIDTH, SCN_HEIGHT))
@@ -43,16 +76,19 @@ for i in range(3):
                         [(521, 159), (541, 139), (561, 159), (541, 179)])
     pygame.display.flip()
 
-    # Wait for a saccade towards the green target
+    # Wait for a saccade towards the green target; the resolution of
+    # the samples tells us how many pixels per degree
     got_sac = False
+    detector = OnlineDetector(link_ppd(tk), SAMPLE_RATE)
     while not got_sac:
-        dt = tk.getNextData()
-        if dt == pylink.ENDSACC:
-            ev_data = tk.getFloatData()
-            amp_x, amp_y = ev_data.getAmplitude()
-            # Break if a saccade > 2 deg is detected
-            if hypot(amp_x, amp_y) > 2.0:
-                got_sac = True
+        # Retrieve all the samples in the link queue at once, and pass
+        # them to the saccade detector
+        batch = drain_link(tk)
+        detector.update(batch['samples'])
+        # Break once the gaze has moved > 2 deg in a saccade
+        sac = detector.current_saccade
+        if sac is not None and sac.amplitude > 2.0:
+            got_sac = True
 
     tk.stopRecording()  # stop recording
 
@@ -0,0 +1,188 @@
+# Filename: asc_parser.py
+# Author: Zhiguo Wang
+# Date: 10/18/2026
+#
+# Description:
+# A single-pass, streaming parser for ASC files. Each line is dispatched
+# on its first token (EFIX, ESACC, EBLINK, MSG, or the timestamp of a
+# sample line), so we no longer run regular expressions on every line.
+# Records are yielded one at a time, so even a multi-gigabyte ASC file
+# can be processed with a small, constant memory footprint.
+#
+# The layout of the sample lines is read from the SAMPLES line, as in
+# sample_store.py: a monocular recording gives Sample records, a binocular
+# one BinocularSample records, both with the resolution data if the EDF was
+# converted with the "-res" option.
+#
+# Usage:
+# from asc_parser import parse_asc, Fixation
+# for rec in parse_asc('Picture/results/zw/zw.asc'):
+#     if type(rec) is Fixation:
+#         print(rec.start, rec.duration, rec.x, rec.y)
+
+from collections import namedtuple
+
+NAN = float('nan')
+
+# Typed records returned by the parser; the x_res and y_res fields are only
+# available when the EDF was converted with the "-res" option
+# EFIX R 80790054 80790349 296 981.3 554.5 936 63.50 63.50
+Fixation = namedtuple('Fixation', ['eye', 'start', 'end', 'duration',
+                                   'x', 'y', 'pupil', 'x_res', 'y_res'],
+                      defaults=(NAN, NAN))
+# ESACC R 80790350 80790372 23 982.6 551.8 864.9 587.9 1.94 151 63.55 63.60
+Saccade = namedtuple('Saccade', ['eye', 'start', 'end', 'duration',
+                                 'start_x', 'start_y', 'end_x', 'end_y',
+                                 'amplitude', 'peak_vel', 'x_res', 'y_res'],
+                     defaults=(NAN, NAN))
+# EBLINK R 80809948 80810048 101
+Blink = namedtuple('Blink', ['eye', 'start', 'end', 'duration'])
+# MSG 80790106 -3 SYNCTIME
+Message = namedtuple('Message', ['time', 'text'])
+# 80855874  1506.4  269.0  729.0  ...
+Sample = namedtuple('Sample', ['time', 'x', 'y', 'pupil', 'x_res', 'y_res'],
+                    defaults=(NAN, NAN))
+# 80855874  1506.4  269.0  729.0  1498.1  274.2  702.0  ...
+BinocularSample = namedtuple('BinocularSample',
+                             ['time', 'x_l', 'y_l', 'pupil_l',
+                              'x_r', 'y_r', 'pupil_r', 'x_res', 'y_res'],
+                             defaults=(NAN, NAN))
+
+
+def to_float(value):
+    '''Convert a data field to float, missing values (".") become NaN'''
+
+    if value == '.':
+        return NAN
+    return float(value)
+
+
+def parse_fixation(line):
+    '''Parse an EFIX line'''
+
+    fields = line.split()
+    return Fixation(fields[1], int(fields[2]), int(fields[3]), int(fields[4]),
+                    *[to_float(v) for v in fields[5:10]])
+
+
+def parse_saccade(line):
+    '''Parse an ESACC line'''
+
+    fields = line.split()
+    return Saccade(fields[1], int(fields[2]), int(fields[3]), int(fields[4]),
+                   *[to_float(v) for v in fields[5:13]])
+
+
+def parse_blink(line):
+    '''Parse an EBLINK line'''
+
+    fields = line.split()
+    return Blink(fields[1], int(fields[2]), int(fields[3]), int(fields[4]))
+
+
+def parse_message(line):
+    '''Parse a MSG line; the text includes the (optional) time offset'''
+
+    fields = line.split(None, 2)
+    if len(fields) < 3:
+        return Message(int(fields[1]), '')
+    return Message(int(fields[1]), fields[2].rstrip())
+
+
+def parse_sample(line):
+    '''Parse a monocular sample line, i.e., timestamp, gaze x, gaze y,
+    pupil size; the other columns (if any) are ignored'''
+
+    t, x, y, p = line.split(None, 4)[:4]
+    return Sample(int(t), NAN if x == '.' else float(x),
+                  NAN if y == '.' else float(y),
+                  NAN if p == '.' else float(p))
+
+
+def sample_parser(samples_line):
+    '''Return the parser of the sample lines that follow a SAMPLES line
+
+    SAMPLES GAZE LEFT RIGHT VEL RES RATE 1000.00 TRACKING CR FILTER 2
+    monocular: time, x, y, pupil, [x_vel, y_vel], [x_res, y_res]
+    binocular: time, x_l, y_l, pupil_l, x_r, y_r, pupil_r,
+    [x_vel_l, y_vel_l, x_vel_r, y_vel_r], [x_res, y_res]'''
+
+    tokens = samples_line.split()
+    binocular = 'LEFT' in tokens and 'RIGHT' in tokens
+    if not binocular and 'RES' not in tokens:
+        return parse_sample
+
+    # Timestamp, gaze and pupil columns, then the velocity and resolution
+    # columns; res is the index of the first resolution column
+    n_eye = 7 if binocular else 4
+    res = None
+    if 'RES' in tokens:
+        res = n_eye
+        if 'VEL' in tokens:
+            res += 4 if binocular else 2
+    record = BinocularSample if binocular else Sample
+
+    def parse(line):
+        fields = line.split()
+        values = [to_float(v) for v in fields[1:n_eye]]
+        if res is not None:
+            values += [to_float(v) for v in fields[res:res + 2]]
+        return record(int(fields[0]), *values)
+
+    return parse
+
+
+# Look-up table mapping the first token of a line to its parser
+PARSERS = {'EFIX': parse_fixation,
+           'ESACC': parse_saccade,
+           'EBLINK': parse_blink,
+           'MSG': parse_message}
+
+
+def parse_asc(asc, samples=True, events=None):
+    '''Parse an ASC file and yield typed records, one line at a time
+
+    asc: path to an ASC file, or any iterable of text lines (e.g., an
+    open file object)
+    samples: set to False to skip the sample lines, this is much faster if
+    you only need the events
+    events: the event types to yield, e.g., ['EFIX', 'MSG'];
+    None (default) to yield all supported events'''
+
+    if events is None:
+        parsers = PARSERS
+    else:
+        parsers = {tag: PARSERS[tag] for tag in events}
+
+    if isinstance(asc, str):
+        with open(asc, 'r') as lines:
+            yield from _parse_lines(lines, samples, parsers)
+    else:
+        yield from _parse_lines(asc, samples, parsers)
+
+
+def _parse_lines(lines, samples, parsers):
+    '''Dispatch each line to its parser based on the first token'''
+
+    get_parser = parsers.get
+    parse_smp = parse_sample  # monocular, until a SAMPLES line says not
+    for line in lines:
+        # Sample lines always start with a timestamp
+        if line[:1].isdigit():
+            if samples:
+                yield parse_smp(line)
+            continue
+
+        # The SAMPLES line tells us the layout of the sample lines
+        if line.startswith('SAMPLES'):
+            parse_smp = sample_parser(line)
+            continue
+
+        # For other lines, the first token tells us what to do
+        space = line.find(' ')
+        tab = line.find('\t')
+        if space < 0 or (0 <= tab < space):
+            space = tab
+        parser = get_parser(line[:space])
+        if parser is not None:
+            yield parser(line)
@@ -0,0 +1,197 @@
+# Filename: batch_process.py
+# Author: Zhiguo Wang
+# Date: 10/18/2026
+#
+# Description:
+# Process all the participants of an experiment in one go. We look for EDF
+# data files under a results folder (e.g., Picture/results/), and load each
+# of them in a process pool (see session_cache.py; the EDF is converted and
+# parsed on the first run only). The fixations and saccades of each
+# participant are saved in a per-subject CSV file, then combined into one
+# table, with the subject ID in the first column. Subjects with an output
+# file are skipped, so a crashed run can be resumed, and the time spent on
+# each file is logged, so the slow ones stand out.
+#
+# Usage:
+# python batch_process.py Picture/results -o batch_results -j 4
+# python batch_process.py Picture/results --ext asc  (ASC files)
+# python batch_process.py Picture/results --restart  (start over)
+
+import os
+import sys
+import glob
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+import pandas as pd
+from edf_reader import read_asc, trial_windows
+from session_cache import load_session, read_meta, cache_is_valid
+
+# The tables to extract from each session
+TABLES = ['fixations', 'saccades']
+
+
+def find_data_files(results_dir, ext='edf'):
+    '''Return the data files (.edf or .asc) under a folder, in a
+    {subject ID: path} dict; the subject ID is the file name without
+    the extension, e.g., "zw" for Picture/results/zw/zw.edf'''
+
+    pattern = os.path.join(results_dir, '**', '*.' + ext)
+    data_files = {}
+    for data_file in sorted(glob.glob(pattern, recursive=True)):
+        subject = os.path.splitext(os.path.basename(data_file))[0]
+        if subject in data_files:
+            # Two files with the same name, use the relative path instead
+            subject = os.path.splitext(
+                os.path.relpath(data_file, results_dir))[0]
+        data_files[subject] = data_file
+
+    return data_files
+
+
+def subject_file(out_dir, subject, table):
+    '''The per-subject output file of a table'''
+
+    name = '%s_%s.csv' % (subject.replace(os.sep, '_'), table)
+    return os.path.join(out_dir, 'subjects', name)
+
+
+def label_trials(times, windows):
+    '''Return the trial number (1, 2, ...) of each timestamp; 0 for
+    timestamps outside of the (onset, offset) trial windows'''
+
+    trial = np.zeros(len(times), dtype=np.int64)
+    for trial_number, (onset, offset) in enumerate(windows, 1):
+        trial[(times >= onset) & (times <= offset)] = trial_number
+    return trial
+
+
+def process_subject(subject, data_file, out_dir):
+    '''Load a session and save the fixations and saccades in per-subject
+    CSV files, return the subject ID and the time (in secs) spent on
+    loading and extracting the data'''
+
+    t_start = time.perf_counter()
+    if data_file.endswith('.asc'):
+        session = read_asc(data_file, samples=False)
+        cached = False
+    else:
+        cached = cache_is_valid(data_file, read_meta(data_file), False)
+        session = load_session(data_file, samples=False)
+    t_loaded = time.perf_counter()
+
+    windows = trial_windows(session['messages'])
+    for table in TABLES:
+        frame = pd.DataFrame({col: np.asarray(values) for col, values
+                              in session[table].items()})
+        # an event belongs to the trial in which it ended, see select()
+        frame.insert(0, 'trial', label_trials(frame['end'].values,
+                                              windows))
+        frame.insert(0, 'subject', subject)
+        # Write to a temporary file first, so a crash never leaves a
+        # half-written file behind (which would be skipped on resume)
+        out_file = subject_file(out_dir, subject, table)
+        frame.to_csv(out_file + '.tmp', index=False)
+        os.replace(out_file + '.tmp', out_file)
+    t_done = time.perf_counter()
+
+    return {'subject': subject, 'file': data_file, 'cached': cached,
+            'load': t_loaded - t_start, 'extract': t_done - t_loaded,
+            'total': t_done - t_start}
+
+
+def is_done(out_dir, subject):
+    '''A subject is done if all its output files exist'''
+
+    return all(os.path.exists(subject_file(out_dir, subject, table))
+               for table in TABLES)
+
+
+def combine(out_dir, subjects):
+    '''Combine the per-subject files into one table per event type,
+    indexed by subject (and trial)'''
+
+    for table in TABLES:
+        frames = [pd.read_csv(subject_file(out_dir, s, table),
+                              dtype={'subject': str}) for s in subjects]
+        frame = pd.concat(frames, ignore_index=True)
+        frame.to_csv(os.path.join(out_dir, table + '.csv'), index=False)
+        print('%s.csv: %d rows, %d subjects' % (table, len(frame),
+                                                len(subjects)))
+
+
+def log_timing(timing_file, t):
+    '''Append the timing of a subject to the timing file'''
+
+    pd.DataFrame([t]).to_csv(timing_file, mode='a', index=False,
+                             header=not os.path.exists(timing_file))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Extract the fixations and saccades of all subjects')
+    parser.add_argument('results_dir', help='folder with the data files')
+    parser.add_argument('-o', '--out_dir', default='batch_results',
+                        help='output folder (default: batch_results)')
+    parser.add_argument('-j', '--workers', type=int, default=None,
+                        help='number of worker processes (default: all '
+                        'CPU cores)')
+    parser.add_argument('--ext', default='edf', choices=['edf', 'asc'],
+                        help='type of data file to look for')
+    parser.add_argument('--restart', action='store_true',
+                        help='process all subjects again, instead of '
+                        'resuming from where the last run stopped')
+    args = parser.parse_args(argv)
+
+    data_files = find_data_files(args.results_dir, args.ext)
+    if not data_files:
+        print('No .%s files found in %s' % (args.ext, args.results_dir))
+        return 1
+    os.makedirs(os.path.join(args.out_dir, 'subjects'), exist_ok=True)
+
+    todo = [s for s in data_files
+            if args.restart or not is_done(args.out_dir, s)]
+    print('Found %d subjects, %d to process' % (len(data_files), len(todo)))
+
+    # Process the subjects in parallel; the timing of each file is
+    # printed as soon as it is done, and appended to timing.csv, so an
+    # interrupted run keeps the rows of the subjects already done
+    t_start = time.perf_counter()
+    timing_file = os.path.join(args.out_dir, 'timing.csv')
+    timing = []
+    failed = []
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        jobs = {pool.submit(process_subject, s, data_files[s],
+                            args.out_dir): s for s in todo}
+        for job in as_completed(jobs):
+            try:
+                t = job.result()
+            except Exception as e:
+                failed.append(jobs[job])
+                print('%-20s FAILED: %s' % (jobs[job], e))
+                continue
+            timing.append(t)
+            log_timing(timing_file, t)
+            print('%-20s load %6.2f s%s  extract %6.2f s  total %6.2f s' %
+                  (t['subject'], t['load'], ' (cached)' if t['cached']
+                   else '', t['extract'], t['total']))
+
+    if timing:
+        slowest = sorted(timing, key=lambda t: t['total'], reverse=True)
+        print('Slowest files: %s' % ', '.join(
+            '%s (%.2f s)' % (t['subject'], t['total']) for t in slowest[:5]))
+    print('Processed %d subjects in %.2f secs' %
+          (len(timing), time.perf_counter() - t_start))
+
+    if failed:
+        print('%d subjects failed, run again to retry: %s' %
+              (len(failed), ', '.join(failed)))
+        return 1
+
+    combine(args.out_dir, sorted(data_files))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,104 @@
+# Filename: bench_asc_parser.py
+# Author: Zhiguo Wang
+# Date: 10/18/2026
+#
+# Description:
+# Compare the streaming parser in asc_parser.py with the regular
+# expression approach used in the earlier versions of the ch08 scripts,
+# on a synthetic ASC file.
+#
+# Usage:
+# python bench_asc_parser.py  (1000 Hz samples)
+# python bench_asc_parser.py 2000  (sampling rate, in Hz)
+
+import os
+import sys
+import re
+import time
+import tempfile
+from asc_parser import parse_asc, Fixation, Saccade, Sample
+from synthetic_asc import write_synthetic_asc
+
+N_TRIALS = 40  # 40 trials of 8 secs @ 1000 Hz, ~20 MB
+RATE = 1000  # sampling rate, in Hz
+
+
+def read_only(asc_file):
+    '''Read the lines without parsing them, i.e., the disk/IO speed'''
+
+    n = 0
+    with open(asc_file, 'r') as asc:
+        for line in asc:
+            n += 1
+    return n
+
+
+def regex_parse(asc_file):
+    '''The per-line regex loop in the earlier parse_ASC_re.py and
+    gaze_trace_plot.py'''
+
+    efix = []
+    esac = []
+    smp = []
+    with open(asc_file, 'r') as asc:
+        for line in asc:
+            tmp_data = [float(x) for x in re.findall(r'-?\d+\.?\d*', line)]
+            if re.search('^EFIX', line):
+                efix.append(tmp_data)
+            elif re.search('^ESACC', line):
+                esac.append(tmp_data)
+            elif re.search('SYNCTIME', line):
+                pass
+            elif re.search(r'^\d', line):
+                smp.append(tmp_data)
+    return len(efix) + len(esac) + len(smp)
+
+
+def stream_parse(asc_file, samples=True):
+    '''The streaming parser in asc_parser.py'''
+
+    efix = []
+    esac = []
+    smp = []
+    for rec in parse_asc(asc_file, samples=samples):
+        rec_type = type(rec)
+        if rec_type is Sample:
+            smp.append(rec)
+        elif rec_type is Fixation:
+            efix.append(rec)
+        elif rec_type is Saccade:
+            esac.append(rec)
+    return len(efix) + len(esac) + len(smp)
+
+
+def time_it(func, *args):
+    '''Return the best of three runs, in seconds'''
+
+    best = float('inf')
+    for i in range(3):
+        t0 = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+if __name__ == '__main__':
+    tmp_dir = tempfile.mkdtemp()
+    asc_file = os.path.join(tmp_dir, 'synthetic.asc')
+    rate = int(sys.argv[1]) if len(sys.argv) > 1 else RATE
+    write_synthetic_asc(asc_file, n_trials=N_TRIALS, rate=rate)
+    size_mb = os.path.getsize(asc_file)/1024.0/1024.0
+    print('Synthetic ASC file: %.1f MB, %d lines, %d Hz' %
+          (size_mb, read_only(asc_file), rate))
+
+    tests = [('read lines only', read_only, (asc_file,)),
+             ('regex loop', regex_parse, (asc_file,)),
+             ('streaming parser', stream_parse, (asc_file,)),
+             ('streaming parser, events only', stream_parse,
+              (asc_file, False))]
+    for label, func, args in tests:
+        t = time_it(func, *args)
+        print('%-32s %7.3f s  %7.1f MB/s' % (label, t, size_mb/t))
+
+    os.remove(asc_file)
+    os.rmdir(tmp_dir)
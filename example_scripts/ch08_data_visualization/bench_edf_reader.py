@@ -0,0 +1,61 @@
+# Filename: bench_edf_reader.py
+# Author: Zhiguo Wang
+# Date: 10/18/2026
+#
+# Description:
+# Compare the throughput of reading an EDF data file directly through the
+# EDF Access API (edf_reader.py) with converting it with edf2asc and then
+# parsing the ASC file. Both edf2asc and the edfapi library come with the
+# EyeLink Developers Kit.
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+import subprocess
+from edf_reader import load_edfapi, read_edf_api, read_asc
+
+# EDF data file to test with; pass another file on the command line
+edf_file = 'Picture/results/zw/zw.edf'
+if len(sys.argv) > 1:
+    edf_file = sys.argv[1]
+
+
+def edf2asc_and_parse(edf_file):
+    '''Convert the EDF to a temporary ASC file, then parse it'''
+
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        subprocess.call(['edf2asc', '-y', '-res', '-p', tmp_dir, edf_file],
+                        stdout=subprocess.DEVNULL)
+        asc_name = os.path.splitext(os.path.basename(edf_file))[0] + '.asc'
+        return read_asc(os.path.join(tmp_dir, asc_name))
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+def report(label, func):
+    '''Run func three times, print the best time and the sample count'''
+
+    best = float('inf')
+    for i in range(3):
+        t0 = time.perf_counter()
+        session = func(edf_file)
+        best = min(best, time.perf_counter() - t0)
+    n_smp = len(session['samples']['timestamp'])
+    size_mb = os.path.getsize(edf_file)/1024.0/1024.0
+    print('%-24s %7.3f s  %8.1f MB/s  %10.0f samples/s' %
+          (label, best, size_mb/best, n_smp/best))
+
+
+print('EDF data file: %s' % edf_file)
+if shutil.which('edf2asc') is not None:
+    report('edf2asc + parse', edf2asc_and_parse)
+else:
+    print('edf2asc not found, skipping the edf2asc + parse test')
+
+if load_edfapi() is not None:
+    report('EDF Access API', read_edf_api)
+else:
+    print('edfapi library not found, skipping the EDF Access API test')
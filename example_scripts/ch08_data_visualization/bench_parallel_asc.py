@@ -0,0 +1,48 @@
+# Filename: bench_parallel_asc.py
+# Author: Zhiguo Wang
+# Date: 10/18/2026
+#
+# Description:
+# Scaling test of the parallel ASC parser (parallel_asc.py) with 1, 2, 4,
+# and 8 worker processes, on a synthetic ASC file. The session returned
+# by each run is checked against the serial parse (edf_reader.read_asc).
+
+import os
+import time
+import tempfile
+from edf_reader import read_asc
+from parallel_asc import read_asc_parallel, sessions_equal
+from synthetic_asc import write_synthetic_asc
+
+N_TRIALS = 120  # 120 trials of 8 secs @ 1000 Hz, ~35 MB
+WORKERS = [1, 2, 4, 8]
+
+
+def time_it(func, *args, **kwargs):
+    '''Return the result and the time (in secs) of a function call'''
+
+    t0 = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - t0
+
+
+if __name__ == '__main__':
+    tmp_dir = tempfile.mkdtemp()
+    asc_file = os.path.join(tmp_dir, 'synthetic.asc')
+    write_synthetic_asc(asc_file, n_trials=N_TRIALS)
+    size_mb = os.path.getsize(asc_file)/1024.0/1024.0
+    print('Synthetic ASC file: %.1f MB, %d CPU cores' %
+          (size_mb, os.cpu_count()))
+
+    serial, t_serial = time_it(read_asc, asc_file)
+    print('%-16s %7.3f s  %7.1f MB/s' % ('serial', t_serial,
+                                         size_mb/t_serial))
+    for n_workers in WORKERS:
+        session, t = time_it(read_asc_parallel, asc_file,
+                             n_workers=n_workers)
+        print('%-16s %7.3f s  %7.1f MB/s  speedup %4.2fx  identical: %s' %
+              ('%d worker(s)' % n_workers, t, size_mb/t, t_serial/t,
+               sessions_equal(serial, session)))
+
+    os.remove(asc_file)
+    os.rmdir(tmp_dir)
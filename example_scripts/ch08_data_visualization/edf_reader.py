@@ -0,0 +1,407 @@
+# Filename: edf_reader.py
+# Author: Zhiguo Wang
+# Date: 10/18/2026
+#
+# Description:
+# Read samples, events, and messages from an EDF data file into NumPy
+# arrays, without converting it to an ASC file first. We call the EDF
+# Access API (the edfapi library that comes with the EyeLink Developers
+# Kit) through ctypes; the sample and event records are copied from the
+# API in their binary form and converted to arrays in one go. If the
+# edfapi library is not installed, we fall back to edf2asc, convert the
+# EDF into a temporary folder, and parse the ASC file. Without edf2asc, we
+# parse the ASC file next to the EDF (e.g., zw.asc for zw.edf), if there
+# is one, so the ch08 scripts still run on the example data.
+#
+# The data are returned as a "session", i.e., a dict of tables, each table
+# is a dict of column arrays:
+# 'fixations': eye, start, end, duration, x, y, pupil, x_res, y_res
+# 'saccades': eye, start, end, duration, start_x, start_y, end_x, end_y,
+#             amplitude, peak_vel, x_res, y_res
+# 'blinks': eye, start, end, duration
+# 'messages': time, text
+# 'samples': see sample_store.py for the columns
+#
+# Usage:
+# from edf_reader import read_edf, session_frames
+# session = read_edf('Picture/results/zw/zw.edf')
+# fix_df = session_frames(session)['fixations']
+
+import os
+import shutil
+import subprocess
+import tempfile
+import ctypes
+import ctypes.util
+import numpy as np
+import pandas as pd
+from asc_parser import parse_asc, Fixation, Saccade, Blink, Message
+from sample_store import load_samples
+
+# Data types returned by edf_get_next_data(), see edf_data_types.h
+NO_PENDING_ITEMS = 0
+STARTBLINK, ENDBLINK = 3, 4
+STARTSACC, ENDSACC = 5, 6
+STARTFIX, ENDFIX = 7, 8
+MESSAGEEVENT = 24
+RECORDING_INFO = 30
+SAMPLE_TYPE = 200
+
+# Sample flags, and the value used for missing data
+SAMPLE_LEFT = 0x8000
+SAMPLE_RIGHT = 0x4000
+MISSING_DATA = -32768
+
+c_float2 = ctypes.c_float*2
+
+
+class FSAMPLE(ctypes.Structure):
+    '''A sample, as defined in edf_data.h'''
+
+    _fields_ = [('time', ctypes.c_uint32),
+                ('px', c_float2), ('py', c_float2),
+                ('hx', c_float2), ('hy', c_float2),
+                ('pa', c_float2),
+                ('gx', c_float2), ('gy', c_float2),
+                ('rx', ctypes.c_float), ('ry', ctypes.c_float),
+                ('gxvel', c_float2), ('gyvel', c_float2),
+                ('hxvel', c_float2), ('hyvel', c_float2),
+                ('rxvel', c_float2), ('ryvel', c_float2),
+                ('fgxvel', c_float2), ('fgyvel', c_float2),
+                ('fhxvel', c_float2), ('fhyvel', c_float2),
+                ('frxvel', c_float2), ('fryvel', c_float2),
+                ('hdata', ctypes.c_int16*8),
+                ('flags', ctypes.c_uint16),
+                ('input', ctypes.c_uint16),
+                ('buttons', ctypes.c_uint16),
+                ('htype', ctypes.c_int16),
+                ('errors', ctypes.c_uint16)]
+
+
+class FEVENT(ctypes.Structure):
+    '''An event (or a message), as defined in edf_data.h'''
+
+    _fields_ = [('time', ctypes.c_uint32),
+                ('type', ctypes.c_int16),
+                ('read', ctypes.c_uint16),
+                ('sttime', ctypes.c_uint32), ('entime', ctypes.c_uint32),
+                ('hstx', ctypes.c_float), ('hsty', ctypes.c_float),
+                ('gstx', ctypes.c_float), ('gsty', ctypes.c_float),
+                ('sta', ctypes.c_float),
+                ('henx', ctypes.c_float), ('heny', ctypes.c_float),
+                ('genx', ctypes.c_float), ('geny', ctypes.c_float),
+                ('ena', ctypes.c_float),
+                ('havx', ctypes.c_float), ('havy', ctypes.c_float),
+                ('gavx', ctypes.c_float), ('gavy', ctypes.c_float),
+                ('ava', ctypes.c_float),
+                ('avel', ctypes.c_float), ('pvel', ctypes.c_float),
+                ('svel', ctypes.c_float), ('evel', ctypes.c_float),
+                ('supd_x', ctypes.c_float), ('eupd_x', ctypes.c_float),
+                ('supd_y', ctypes.c_float), ('eupd_y', ctypes.c_float),
+                ('eye', ctypes.c_int16),
+                ('status', ctypes.c_uint16),
+                ('flags', ctypes.c_uint16),
+                ('input', ctypes.c_uint16),
+                ('buttons', ctypes.c_uint16),
+                ('parsedby', ctypes.c_uint16),
+                ('message', ctypes.c_void_p)]  # pointer to an LSTRING
+
+
+class RECORDINGS(ctypes.Structure):
+    '''Start/end of a recording block, as defined in edf_data.h'''
+
+    _fields_ = [('time', ctypes.c_uint32),
+                ('sample_rate', ctypes.c_float),
+                ('eflags', ctypes.c_uint16),
+                ('sflags', ctypes.c_uint16),
+                ('state', ctypes.c_ubyte),  # 0 = end, 1 = start
+                ('record_type', ctypes.c_ubyte),
+                ('pupil_type', ctypes.c_ubyte),
+                ('recording_mode', ctypes.c_ubyte),
+                ('filter_type', ctypes.c_ubyte),
+                ('pos_type', ctypes.c_ubyte),
+                ('eye', ctypes.c_ubyte)]  # 1 = left, 2 = right, 3 = both
+
+
+# NumPy views of the binary sample and event records
+SAMPLE_DTYPE = np.dtype(FSAMPLE)
+EVENT_DTYPE = np.dtype(FEVENT)
+
+_edfapi = None
+
+
+def load_edfapi():
+    '''Load the edfapi library, return None if it is not installed'''
+
+    global _edfapi
+    if _edfapi is not None:
+        return _edfapi or None
+
+    candidates = [ctypes.util.find_library('edfapi64'),
+                  ctypes.util.find_library('edfapi'),
+                  'libedfapi.so', 'edfapi64.dll', 'edfapi.dll',
+                  '/Library/Frameworks/edfapi.framework/edfapi']
+    _edfapi = False
+    for name in candidates:
+        if not name:
+            continue
+        try:
+            lib = ctypes.CDLL(name)
+        except OSError:
+            continue
+        lib.edf_open_file.restype = ctypes.c_void_p
+        lib.edf_open_file.argtypes = [ctypes.c_char_p, ctypes.c_int,
+                                      ctypes.c_int, ctypes.c_int,
+                                      ctypes.POINTER(ctypes.c_int)]
+        lib.edf_close_file.argtypes = [ctypes.c_void_p]
+        lib.edf_get_next_data.argtypes = [ctypes.c_void_p]
+        lib.edf_get_float_data.restype = ctypes.c_void_p
+        lib.edf_get_float_data.argtypes = [ctypes.c_void_p]
+        _edfapi = lib
+        break
+
+    return _edfapi or None
+
+
+def read_edf(edf_file, samples=True):
+    '''Read an EDF data file, return a session (a dict of tables)
+
+    samples: set to False to only read the events and messages'''
+
+    if load_edfapi() is not None:
+        return read_edf_api(edf_file, samples)
+    return read_edf_asc(edf_file, samples)
+
+
+def read_edf_api(edf_file, samples=True):
+    '''Read an EDF data file with the EDF Access API'''
+
+    lib = load_edfapi()
+    err = ctypes.c_int(0)
+    edf = lib.edf_open_file(edf_file.encode(), 0, 1, int(samples),
+                            ctypes.byref(err))
+    if not edf or err.value:
+        raise IOError('Cannot open %s (error %d)' % (edf_file, err.value))
+
+    # Copy the binary records, we convert them to arrays at the end
+    string_at = ctypes.string_at
+    smp_size = SAMPLE_DTYPE.itemsize
+    ev_size = EVENT_DTYPE.itemsize
+    records = {SAMPLE_TYPE: bytearray(), ENDFIX: bytearray(),
+               ENDSACC: bytearray(), ENDBLINK: bytearray()}
+    msg_time = []
+    msg_text = []
+    binocular = False
+    get_next_data = lib.edf_get_next_data
+    get_float_data = lib.edf_get_float_data
+    try:
+        while True:
+            data_type = get_next_data(edf)
+            if data_type == NO_PENDING_ITEMS:
+                break
+            if data_type == SAMPLE_TYPE:
+                records[SAMPLE_TYPE] += string_at(get_float_data(edf),
+                                                  smp_size)
+            elif data_type in records:
+                records[data_type] += string_at(get_float_data(edf),
+                                                ev_size)
+            elif data_type == MESSAGEEVENT:
+                ev = FEVENT.from_address(get_float_data(edf))
+                # LSTRING: a 16-bit length, followed by the characters
+                n = ctypes.c_int16.from_address(ev.message).value
+                text = string_at(ev.message + 2, n).split(b'\0')[0]
+                msg_time.append(ev.sttime)
+                msg_text.append(text.decode('utf-8', 'replace').rstrip())
+            elif data_type == RECORDING_INFO:
+                rec = RECORDINGS.from_address(get_float_data(edf))
+                if rec.state == 1 and rec.eye == 3:
+                    binocular = True
+    finally:
+        lib.edf_close_file(edf)
+
+    session = {}
+    fix = np.frombuffer(records[ENDFIX], EVENT_DTYPE)
+    session['fixations'] = dict(event_columns(fix),
+                                x=missing(fix['gavx']),
+                                y=missing(fix['gavy']),
+                                pupil=missing(fix['ava']),
+                                **resolution(fix))
+    sac = np.frombuffer(records[ENDSACC], EVENT_DTYPE)
+    res = resolution(sac)
+    dx = (missing(sac['genx']) - missing(sac['gstx']))/res['x_res']
+    dy = (missing(sac['geny']) - missing(sac['gsty']))/res['y_res']
+    session['saccades'] = dict(event_columns(sac),
+                               start_x=missing(sac['gstx']),
+                               start_y=missing(sac['gsty']),
+                               end_x=missing(sac['genx']),
+                               end_y=missing(sac['geny']),
+                               amplitude=np.hypot(dx, dy),
+                               peak_vel=missing(sac['pvel']), **res)
+    blk = np.frombuffer(records[ENDBLINK], EVENT_DTYPE)
+    session['blinks'] = event_columns(blk)
+    session['messages'] = {'time': np.array(msg_time, dtype=np.int64),
+                           'text': np.array(msg_text, dtype=str)}
+    if samples:
+        smp = np.frombuffer(records[SAMPLE_TYPE], SAMPLE_DTYPE)
+        session['samples'] = sample_columns(smp, binocular)
+
+    return session
+
+
+def missing(values):
+    '''Convert a float column to float32, missing values become NaN'''
+
+    values = values.astype(np.float32)
+    values[(values <= MISSING_DATA) | (values >= 1e8)] = np.nan
+    return values
+
+
+def event_columns(events):
+    '''Columns shared by all event types'''
+
+    start = events['sttime'].astype(np.int64)
+    end = events['entime'].astype(np.int64)
+    return {'eye': np.where(events['eye'] == 0, 'L', 'R'),
+            'start': start, 'end': end, 'duration': end - start + 1}
+
+
+def resolution(events):
+    '''Average resolution (pixels per degree) over an event'''
+
+    return {'x_res': (events['supd_x'] + events['eupd_x'])/2,
+            'y_res': (events['supd_y'] + events['eupd_y'])/2}
+
+
+def sample_columns(smp, binocular):
+    '''Convert the binary samples into the columns used in sample_store.py'''
+
+    columns = {'timestamp': smp['time'].astype(np.int64)}
+    if binocular:
+        for i, s in enumerate(['_l', '_r']):
+            columns['gaze_x' + s] = missing(smp['gx'][:, i])
+            columns['gaze_y' + s] = missing(smp['gy'][:, i])
+            columns['pupil' + s] = missing(smp['pa'][:, i])
+    else:
+        # pick the eye that was recorded in each sample
+        eye = np.where(smp['flags'] & SAMPLE_LEFT, 0, 1)
+        rows = np.arange(len(smp))
+        columns['gaze_x'] = missing(smp['gx'][rows, eye])
+        columns['gaze_y'] = missing(smp['gy'][rows, eye])
+        columns['pupil'] = missing(smp['pa'][rows, eye])
+    columns['res_x'] = missing(smp['rx'])
+    columns['res_y'] = missing(smp['ry'])
+
+    return columns
+
+
+def read_edf_asc(edf_file, samples=True):
+    '''The fallback: convert the EDF with edf2asc into a temporary folder,
+    then parse the ASC file; without edf2asc, parse the ASC file next to
+    the EDF (e.g., zw.asc for zw.edf), if there is one'''
+
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        # the -p option tells edf2asc where to save the ASC file
+        asc_name = os.path.splitext(os.path.basename(edf_file))[0] + '.asc'
+        asc_file = os.path.join(tmp_dir, asc_name)
+        cmd = ['edf2asc', '-y', '-res', '-p', tmp_dir, edf_file]
+        if not samples:
+            cmd.insert(1, '-e')
+        try:
+            subprocess.call(cmd, stdout=subprocess.DEVNULL)
+        except OSError:
+            pass  # edf2asc is not installed
+        if not os.path.exists(asc_file):
+            # No edf2asc; use the ASC file next to the EDF, if any
+            asc_file = os.path.splitext(edf_file)[0] + '.asc'
+            if not os.path.exists(asc_file):
+                raise IOError('Cannot convert %s, is edf2asc installed?'
+                              % edf_file)
+        return read_asc(asc_file, samples)
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+def read_asc(asc_file, samples=True):
+    '''Read an ASC file (converted with the -res option) into a session'''
+
+    session = event_tables(parse_asc(asc_file, samples=False))
+    if samples:
+        store = load_samples(asc_file)
+        session['samples'] = {col: store.column(col)
+                              for col in store.columns}
+
+    return session
+
+
+def event_tables(records):
+    '''Sort parsed records into the fixation, saccade, blink and message
+    tables of a session'''
+
+    fix = []
+    sac = []
+    blk = []
+    msg = []
+    for ev in records:
+        if type(ev) is Fixation:
+            fix.append(ev)
+        elif type(ev) is Saccade:
+            sac.append(ev)
+        elif type(ev) is Blink:
+            blk.append(ev)
+        elif type(ev) is Message:
+            msg.append(ev)
+
+    return {'fixations': record_columns(fix, Fixation),
+            'saccades': record_columns(sac, Saccade),
+            'blinks': record_columns(blk, Blink),
+            'messages': record_columns(msg, Message)}
+
+
+def record_columns(records, record_type):
+    '''Convert a list of parsed records into a dict of column arrays'''
+
+    columns = {}
+    for i, field in enumerate(record_type._fields):
+        values = [rec[i] for rec in records]
+        if field in ['eye', 'text']:
+            columns[field] = np.array(values, dtype=str)
+        elif field in ['start', 'end', 'duration', 'time']:
+            columns[field] = np.array(values, dtype=np.int64)
+        else:
+            columns[field] = np.array(values, dtype=np.float32)
+
+    return columns
+
+
+def trial_windows(messages, start='SYNCTIME', end='blank_screen'):
+    '''Return the (onset, offset) times of all trials in a session, a trial
+    starts with a message containing "start" and ends with a message
+    containing "end"'''
+
+    windows = []
+    onset = None
+    for t, text in zip(messages['time'], messages['text']):
+        if start in text:
+            onset = int(t)
+        elif end in text and onset is not None:
+            windows.append((onset, int(t)))
+            onset = None
+
+    return windows
+
+
+def select(table, t_start, t_end, column='end'):
+    '''Return the rows of a table with "column" in [t_start, t_end]; by
+    default, the events that ended in the time window, the rule of the
+    ASC scripts, which use the EFIX/ESACC lines between two messages'''
+
+    values = np.asarray(table[column])
+    mask = (values >= t_start) & (values <= t_end)
+    return {col: np.asarray(v)[mask] for col, v in table.items()}
+
+
+def session_frames(session):
+    '''Put each table of a session in a pandas data frame'''
+
+    return {name: pd.DataFrame(table) for name, table in session.items()}
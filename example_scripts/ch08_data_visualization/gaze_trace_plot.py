@@ -3,62 +3,37 @@
 # Date: 11/11/2020
 #
 # Description:
-# Extract sample data from the ASC file, then plot a gaze trace plot.
+# Extract sample data from the EDF data file, then plot a gaze trace plot.
 
-import os
-import re
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
+from edf_reader import trial_windows
+from session_cache import load_session
+from sample_store import eye_columns
 
 edf_dir = 'Picture/results/zw/'  # path to the EDF data file
-os.system('edf2asc -y %s' % (edf_dir + 'zw.edf'))  # convert the EDF
-asc = open(edf_dir + 'zw.asc', 'r')  # open converted ASC file
+# Load the samples and messages; the EDF is only parsed if the cache
+# (next to the EDF) is out of date. The samples are typed NumPy arrays
+# (timestamp, x, y, pupil); missing samples have NaN gaze positions.
+session = load_session(edf_dir + 'zw.edf')
+samples = session['samples']
+# The gaze and pupil columns of the recorded eye; in a binocular
+# recording, the columns are per eye (e.g., gaze_x_r), we use the right eye
+gaze_x, gaze_y, pupil = eye_columns(list(samples), eye='R')
 
-scn_w, scn_h = [-32768, -32768]
-trial_start = False
 trial_DFs = {}  # data frames from all trials in a tuple
-trial_number = 0
-for line in asc:
-    # Extract values from data lines
-    tmp_data = [float(x) for x in re.findall(r'-?\d+\.?\d*', line)]
-
-    # Message marking image onset
-    if re.search('SYNCTIME', line):
-        trial_start = True
-        trial_number += 1
-        # Store sample data in lists (timestamp, x, y, pupil size)
-        t = []
-        x = []
-        y = []
-        p = []
-        print('processing trial # %d...' % trial_number)
-
-    # Sample lines always start with timestamps
-    if trial_start and re.search('^\d', line):
-        # 80855874	 1506.4	  269.0	  729.0	...
-        # 80855875	   .	   .	    0.0	...
-        if len(tmp_data) == 4:  # normal sample line
-            s_t, s_x, s_y, s_pu = tmp_data
-        else:
-            st, s_pu = tmp_data  # missing samples
-            s_x = np.nan
-            s_y = np.nan
-
-        # Add sample data to lists t, x, y, p
-        t.append(s_t)
-        x.append(s_x)
-        y.append(s_y)
-        p.append(s_pu)
-
-    if re.search('blank_screen', line):  # message marking image offset
-        # Put samples in a pandas data frame and store it in trial_DFs
-        trial_DFs[trial_number] = pd.DataFrame({'timestamp': t,
-                                                'gaze_x': x, 'gaze_y': y,
-                                                'pupil': p})
-        trial_start = False
-
-asc.close()  # close the ASC file
+# Trials start with SYNCTIME (image onset) and end with blank_screen
+for trial_number, (onset, offset) in enumerate(
+        trial_windows(session['messages']), 1):
+    print('processing trial # %d...' % trial_number)
+    # Put samples in a pandas data frame and store it in trial_DFs
+    start, stop = np.searchsorted(samples['timestamp'], [onset, offset + 1])
+    trial_DFs[trial_number] = pd.DataFrame(
+        {'timestamp': samples['timestamp'][start:stop],
+         'gaze_x': samples[gaze_x][start:stop],
+         'gaze_y': samples[gaze_y][start:stop],
+         'pupil': samples[pupil][start:stop]})
 
 # Plot the gaze trace and pupil size data from trial # 4
 trial_DFs[4].plot(y=['gaze_x', 'gaze_y', 'pupil'])
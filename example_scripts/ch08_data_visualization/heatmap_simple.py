@@ -3,69 +3,79 @@
 # Date: 11/11/2020
 #
 # Description:
-# Extract fixations from the ASC file to create a heatmap
+# Extract fixations from the EDF data file to create a heatmap
 
-import os
-import re
-from PIL import Image
 import numpy as np
-from matplotlib import cm  # colormap from matplotlib
+from edf_reader import trial_windows, select
+from fixation_heatmap import fixation_heatmap, blend_heatmap
+from session_cache import load_session
+from vcl_cache import shared_cache
 
 edf_dir = 'Picture/results/zw/'  # path to the EDF data file
-os.system('edf2asc -e -y -res %s' % (edf_dir + 'zw.edf'))  # convert the EDF
-asc = open(edf_dir + 'zw.asc', 'r')  # open converted ASC file
+# Load the fixations and messages; the EDF is only parsed if the cache
+# (next to the EDF) is out of date
+session = load_session(edf_dir + 'zw.edf', samples=False)
+messages = session['messages']
+fixations = session['fixations']
+msg_time = messages['time']
 
-scn_w, scn_h = [-32768, -32768]
-trial_start = False
-trial_number = 0
-for line in asc:
-    # Extract values from data lines
-    tmp_data = [int(float(x)) for x in re.findall(r'-?\d+\.?\d*', line)]
+# The resolution data tell us how many pixels per degree; we use the
+# average over the session, so trials without fixations still render
+ppd = (np.nanmean(fixations['x_res']), np.nanmean(fixations['y_res']))
 
-    if re.search('GAZE_COORDS', line):  # get screen resolution
-        scn_w, scn_h = [int(x+1) for x in tmp_data[-2:]]
-    if re.search('SYNCTIME', line):  # message marking image onset
-        trial_start = True
-        trial_number += 1
-        print('processing trial # %d...' % trial_number)
+# Screen resolution, from the latest GAZE_COORDS message before a trial
+# MSG 80790046 GAZE_COORDS 0.00 0.00 1919.00 1079.00
+coords = [(t, text) for t, text in zip(msg_time, messages['text'])
+          if 'GAZE_COORDS' in text]
+coords_time = np.array([t for t, text in coords], dtype=np.int64)
 
-        sigma_x, sigma_y = (0.1, 0.1)  # width of the 2-D gaussian-Y
-        alpha = 0.5  # transparency for the heatmap
-        w, h = np.meshgrid(np.linspace(0, scn_w, scn_w),
-                           np.linspace(0, scn_h, scn_h))
-        heatmap = 0.0*np.exp(-1.0*(w - 0)**2/(2*sigma_x**2) -
-                             1.0*(h - 0)**2/(2*sigma_y**2))
+sigma = 1.0  # width of the 2-D gaussian, in degrees
+alpha = 0.5  # transparency for the heatmap
+# Trials start with SYNCTIME (image onset) and end with blank_screen
+for trial_number, (onset, offset) in enumerate(trial_windows(messages), 1):
+    print('processing trial # %d...' % trial_number)
 
-    if trial_start:
-        if re.search('^EFIX', line):  # add fixation summary data to efix
-            # EFIX R 80790373 80790527 155 855.5 596.0 881 63.60 63.75
-            start_t, end_t, duration, gaze_x, gaze_y,\
-                     peak_vel, sigma_x, sigma_y = tmp_data
-            heatmap += duration*np.exp(-1.0*(w - gaze_x)**2/(2*sigma_x**2) -
-                                       1.0*(h - gaze_y)**2/(2*sigma_y**2))
+    # Get screen resolution
+    i = np.searchsorted(coords_time, onset, side='right') - 1
+    if i < 0:
+        print('no GAZE_COORDS message before trial # %d, skipped'
+              % trial_number)
+        continue
+    scn_w, scn_h = [int(float(x)) + 1 for x in coords[i][1].split()[-2:]]
 
-        # Get background image from the .VCL file
-        if re.search('DRAW_LIST', line):
-            # MSG 80790106 -3 !V DRAW_LIST ../../runtime/dataviewer/
-            # zw/graphics/VC_1.vcl
-            vcl = open(edf_dir + line.split()[-1], 'r')
-            for draw_commands in vcl:
-                if 'IMGLOAD' in draw_commands:
-                    # 0 IMGLOAD TOP_LEFT  ../../runtime/images/
-                    # 5495090083862704888.png 0 0 1920 1080
-                    # get the path to the .png image
-                    bg_image = draw_commands.split()[3]
-            vcl.close()  # close VCL file
+    # Get background image from the .VCL file, looking only at the
+    # messages of this trial
+    # MSG 80790106 -3 !V DRAW_LIST ../../runtime/dataviewer/
+    # zw/graphics/VC_1.vcl
+    bg_image = None
+    start = np.searchsorted(msg_time, onset, side='left')
+    stop = np.searchsorted(msg_time, offset, side='right')
+    for text in messages['text'][start:stop]:
+        if 'DRAW_LIST' in text:
+            # look for the IMGLOAD command in the VCL file; the VCL
+            # file is only parsed the first time we see it
+            # 0 IMGLOAD TOP_LEFT  ../../runtime/images/
+            # 5495090083862704888.png 0 0 1920 1080
+            bg_image = shared_cache.background(edf_dir, text.split()[-1])
+    if bg_image is None:
+        print('no background image in trial # %d, skipped' % trial_number)
+        continue
 
-    if re.search('blank_screen', line):  # message marking image offset
-        background_pic = Image.open(edf_dir + bg_image).convert('RGBA')
-        # Apply a colormap (from the colormap library in MatplotLib)
-        heatmap = heatmap/np.max(heatmap)
-        heatmap = Image.fromarray(np.uint8(cm.seismic(heatmap)*255))
-        heatmap = heatmap.convert('RGBA')
-        heatmap = Image.blend(background_pic, heatmap, alpha)  # blending
-        # Save the heatmap as an PNG file
-        heatmap.save('heatmap_trial_%d.png' % trial_number, 'PNG')
-        trial_start = False
+    # The fixations that ended during the trial (as in the ASC scripts,
+    # where the EFIX lines between SYNCTIME and blank_screen are used)
+    # EFIX R 80790373 80790527 155 855.5 596.0 881 63.60 63.75
+    fix = select(fixations, onset, offset, column='end')
+    # Accumulate the fixations, then blur them with a gaussian
+    # kernel (sigma = 1 deg); a trial without fixations gives a
+    # blank heatmap
+    heatmap = fixation_heatmap(
+        np.column_stack([fix['x'], fix['y'], fix['duration']]),
+        scn_w, scn_h, sigma=sigma, units='deg', ppd=ppd)
+    # Apply a colormap and blend the heatmap with the background;
+    # decoded background images are cached, as trials may share them
+    heatmap = blend_heatmap(heatmap, shared_cache.image(bg_image), alpha)
+    # Save the heatmap as an PNG file
+    heatmap.save('heatmap_trial_%d.png' % trial_number, 'PNG')
 
-asc.close()  # close the ASC file
+# Show how often the cached VCL files and images were reused
+print('Image cache: %s' % shared_cache.stats())
@@ -0,0 +1,157 @@
+# Filename: parallel_asc.py
+# Author: Zhiguo Wang
+# Date: 10/18/2026
+#
+# Description:
+# Parse a large ASC file on multiple CPU cores. The file is split into
+# byte ranges that start at a TRIALID message (or at a line boundary, if
+# there are too few trials), each range is parsed in a worker process,
+# and the tables returned by the workers are concatenated in file order,
+# i.e., timestamp order. The session is identical to the one returned by
+# edf_reader.read_asc().
+#
+# Usage:
+# from parallel_asc import read_asc_parallel
+# session = read_asc_parallel('Picture/results/zw/zw.asc', n_workers=4)
+
+import os
+import mmap
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from asc_parser import parse_asc
+from edf_reader import event_tables
+from sample_store import load_samples, sample_columns, MONOCULAR
+from trial_index import build_index
+
+
+def chunk_ranges(asc_file, n_chunks, index=None):
+    '''Split an ASC file into (at most) n_chunks byte ranges of about the
+    same size; a range starts at a TRIALID message if there is one nearby,
+    otherwise at the start of a line'''
+
+    size = os.path.getsize(asc_file)
+    if size == 0:
+        return [(0, 0)]  # an empty file cannot be mapped
+    if index is None:
+        index = build_index(asc_file, ['TRIALID'])
+    trial_offsets = [offset for offset, t in index['messages']['TRIALID']]
+    chunk_size = size//max(n_chunks, 1)
+
+    bounds = [0]
+    with open(asc_file, 'rb') as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            for i in range(1, n_chunks):
+                target = i*chunk_size
+                # The first trial after the target, if it is not too far
+                j = bisect_left(trial_offsets, target)
+                if (j < len(trial_offsets) and
+                        trial_offsets[j] < target + chunk_size//2):
+                    bound = trial_offsets[j]
+                else:
+                    bound = mm.find(b'\n', target) + 1
+                    if bound == 0:
+                        bound = size
+                if bounds[-1] < bound < size:
+                    bounds.append(bound)
+        finally:
+            mm.close()
+    bounds.append(size)
+
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def sample_layout(asc_file, index):
+    '''The sample columns of the file, from the SAMPLES lines; raise a
+    ValueError if the layout changes, as load_samples() does'''
+
+    layouts = []
+    with open(asc_file, 'rb') as f:
+        for offset in index['samples_lines']:
+            f.seek(offset)
+            layout = sample_columns(f.readline().decode())
+            if layouts and layout != layouts[0]:
+                raise ValueError('The sample layout changed from %s to %s'
+                                 % (layouts[0], layout))
+            layouts.append(layout)
+
+    return layouts[0] if layouts else MONOCULAR
+
+
+def parse_chunk(asc_file, start, stop, samples, columns):
+    '''Parse the lines in a byte range, return a (partial) session'''
+
+    with open(asc_file, 'rb') as f:
+        f.seek(start)
+        lines = f.read(stop - start).decode().splitlines(True)
+
+    session = event_tables(parse_asc(lines, samples=False))
+    if samples:
+        store = load_samples(lines, columns=columns)
+        session['samples'] = {col: store.column(col)
+                              for col in store.columns}
+
+    return session
+
+
+def merge_sessions(sessions):
+    '''Concatenate the tables of the partial sessions, in order'''
+
+    merged = {}
+    for table in sessions[0]:
+        merged[table] = {col: np.concatenate([s[table][col]
+                                              for s in sessions])
+                         for col in sessions[0][table]}
+    return merged
+
+
+def read_asc_parallel(asc_file, samples=True, n_workers=None,
+                      n_chunks=None):
+    '''Read an ASC file into a session, in parallel
+
+    n_workers: number of worker processes; None to use all CPU cores,
+    1 to parse the chunks one by one in the current process
+    n_chunks: number of byte ranges, defaults to 4 per worker so that the
+    workers are kept busy if some chunks take longer than others'''
+
+    if n_workers is None:
+        n_workers = os.cpu_count() or 1
+    if n_chunks is None:
+        n_chunks = 4*n_workers
+
+    index = build_index(asc_file, ['TRIALID'])
+    columns = sample_layout(asc_file, index) if samples else None
+    ranges = chunk_ranges(asc_file, n_chunks, index)
+
+    if n_workers == 1:
+        sessions = [parse_chunk(asc_file, start, stop, samples, columns)
+                    for start, stop in ranges]
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers) as pool:
+            jobs = [pool.submit(parse_chunk, asc_file, start, stop,
+                                samples, columns) for start, stop in ranges]
+            sessions = [job.result() for job in jobs]
+
+    return merge_sessions(sessions)
+
+
+def sessions_equal(session_a, session_b):
+    '''Check if two sessions have the same tables, columns, and values
+    (NaN equals NaN)'''
+
+    if set(session_a) != set(session_b):
+        return False
+    for table in session_a:
+        if list(session_a[table]) != list(session_b[table]):
+            return False
+        for col in session_a[table]:
+            a = np.asarray(session_a[table][col])
+            b = np.asarray(session_b[table][col])
+            if a.dtype.kind != b.dtype.kind or a.shape != b.shape:
+                return False
+            equal_nan = a.dtype.kind == 'f'
+            if not np.array_equal(a, b, equal_nan=equal_nan):
+                return False
+
+    return True
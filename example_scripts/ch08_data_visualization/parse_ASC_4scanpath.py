@@ -6,8 +6,9 @@
 # Parse the ASC file to extract fixations, then plot the scan path.
 
 import os
-from PIL import Image, ImageDraw
+from PIL import ImageDraw
 from math import sqrt
+from vcl_cache import shared_cache
 
 # Path to the EDF data file
 edf_dir = 'Picture/results/zw/'
@@ -41,17 +42,11 @@ for line in asc:
         # MSG 80790106 -3 !V DRAW_LIST ../../runtime/
         # dataviewer/zw/graphics/VC_1.vcl
         if 'DRAW_LIST' in line:
-            # Open the VCL file
-            vcl = open(edf_dir + tmp_data[-1], 'r')
-            for draw_commands in vcl:
-                # Looking for the IMGLOAD command
-                # MSG 0 IMGLOAD TOP_LEFT  ../../runtime/images/
-                # 5495090083862704888.png 0 0 1920 1080
-                if 'IMGLOAD' in draw_commands:
-                    tmp_list = draw_commands.split()
-                    bg_image = [s for s in tmp_list if 'png' in s][0]
-            # Close the VCL file
-            vcl.close()
+            # Look for the IMGLOAD command in the VCL file; the VCL file
+            # is only parsed the first time we see it
+            # MSG 0 IMGLOAD TOP_LEFT  ../../runtime/images/
+            # 5495090083862704888.png 0 0 1920 1080
+            bg_image = shared_cache.background(edf_dir, tmp_data[-1])
 
         # Retrieve the coordinates and duration of all fixation
         # EFIX R 80790054 80790349 296 981.3 554.5 936 63.50 63.50
@@ -62,7 +57,8 @@ for line in asc:
 
     # Message marking image offset
     if 'blank_screen' in line:
-        bg = Image.open(edf_dir + bg_image)
+        # Decoded background images are cached, as trials may share them
+        bg = shared_cache.image(bg_image)
         draw = ImageDraw.Draw(bg)
         # Draw the scan path
         draw.line(fixations, fill=(0, 0, 255), width=3)
@@ -76,3 +72,6 @@ for line in asc:
 
 # Close the ASC file
 asc.close()
+
+# Show how often the cached VCL files and images were reused
+print('Image cache: %s' % shared_cache.stats())
@@ -3,40 +3,32 @@
 # Date: 11/11/2020
 #
 # Description:
-# Parse the ASC file with regular expressions (re).
+# Extract fixations and saccades from the EDF data file. Earlier versions
+# of this script converted the EDF with edf2asc, then ran regular
+# expressions (re) on every line of the ASC file. Here we load a parsed
+# session (see edf_reader.py); the parsed data are cached next to the EDF,
+# so only the first run needs to convert and parse the EDF.
 
-import os
-import re
 import pandas as pd
+from session_cache import load_session
 
 # Path to the EDF data file
 edf_dir = 'Picture/results/zw/'
-# Convert the edf file
-os.system('edf2asc -e -y %s' % (edf_dir + 'zw.edf'))
-# Open converted ASC file
-asc = open(edf_dir + 'zw.asc', 'r')
-
-efix = []  # fixation end
-esac = []  # saccade end
-for line in asc:
-    # Extract all numbers and put it in a list
-    tmp_data = [float(x) for x in re.findall(r'-?\d+\.?\d*', line)]
-
-    if re.search('^EFIX', line):
-        efix.append(tmp_data)
-    elif re.search('^ESACC', line):
-        esac.append(tmp_data)
-    else:
-        pass
+# Load the events, the EDF is only parsed if the cache is out of date
+session = load_session(edf_dir + 'zw.edf', samples=False)
+efix = session['fixations']  # fixation end
+esac = session['saccades']  # saccade end
 
 # Put the extracted data into pandas data frames
 # EFIX R 80790054 80790349 296 981.3 554.5 936
-efixFRM = pd.DataFrame(efix, columns=['startT', 'endT', 'duration',
-                                      'avgX', 'avgY', 'pupil'])
+efixFRM = pd.DataFrame({'startT': efix['start'], 'endT': efix['end'],
+                        'duration': efix['duration'],
+                        'avgX': efix['x'], 'avgY': efix['y'],
+                        'pupil': efix['pupil']})
 # ESACC R 80790350 80790372 23 982.6 551.8 864.9 587.9 1.94 151
-esacFRM = pd.DataFrame(esac, columns=['startT', 'endT', 'duration',
-                                      'startX', 'startY', 'endX',
-                                      'endY', 'amplitude', 'peakVel'])
-
-# Close the ASC file
-asc.close()
+esacFRM = pd.DataFrame({'startT': esac['start'], 'endT': esac['end'],
+                        'duration': esac['duration'],
+                        'startX': esac['start_x'], 'startY': esac['start_y'],
+                        'endX': esac['end_x'], 'endY': esac['end_y'],
+                        'amplitude': esac['amplitude'],
+                        'peakVel': esac['peak_vel']})
@@ -0,0 +1,197 @@
+# Filename: sample_store.py
+# Author: Zhiguo Wang
+# Date: 10/18/2026
+#
+# Description:
+# Load the sample lines of an ASC file into a columnar store, i.e., one
+# typed NumPy array per data column (int64 timestamps, float32 gaze,
+# pupil, velocity, and resolution data). The arrays are preallocated and
+# grow as needed; sample lines are converted chunk by chunk, and pandas
+# receives views of the arrays rather than copies.
+#
+# Usage:
+# from sample_store import load_samples, eye_columns
+# smp = load_samples('Picture/results/zw/zw.asc')
+# trial_df = smp.between(80790106, 80798104)  # samples in a time window
+# x, y, pupil = eye_columns(smp.columns)  # e.g., gaze_x_r, if binocular
+
+import io
+import numpy as np
+import pandas as pd
+
+# Columns for a monocular recording, i.e., timestamp, gaze x, gaze y, pupil
+MONOCULAR = ['timestamp', 'gaze_x', 'gaze_y', 'pupil']
+
+
+def sample_columns(samples_line):
+    '''Work out the data columns from the SAMPLES line in the ASC file
+
+    SAMPLES GAZE LEFT RIGHT VEL RES RATE 1000.00 TRACKING CR FILTER 2
+    monocular: time, x, y, pupil, [x_vel, y_vel], [x_res, y_res]
+    binocular: time, x_l, y_l, pupil_l, x_r, y_r, pupil_r,
+    [x_vel_l, y_vel_l, x_vel_r, y_vel_r], [x_res, y_res]'''
+
+    tokens = samples_line.split()
+    if 'LEFT' in tokens and 'RIGHT' in tokens:
+        suffixes = ['_l', '_r']
+    else:
+        suffixes = ['']
+
+    columns = ['timestamp']
+    for s in suffixes:
+        columns += ['gaze_x' + s, 'gaze_y' + s, 'pupil' + s]
+    if 'VEL' in tokens:
+        for s in suffixes:
+            columns += ['vel_x' + s, 'vel_y' + s]
+    if 'RES' in tokens:
+        columns += ['res_x', 'res_y']
+
+    return columns
+
+
+def eye_columns(columns, eye='R'):
+    '''Return the names of the gaze x, gaze y, and pupil columns of an eye,
+    e.g., ('gaze_x_r', 'gaze_y_r', 'pupil_r') in a binocular recording;
+    in a monocular recording, the recorded eye is the only one
+
+    columns: column names, see sample_columns()
+    eye: 'L' or 'R', the eye to use in a binocular recording'''
+
+    if 'gaze_x' in columns:
+        return ('gaze_x', 'gaze_y', 'pupil')
+    s = '_' + eye.lower()
+    if 'gaze_x' + s not in columns:
+        raise ValueError('No %s eye data in columns %s' % (eye, columns))
+    return ('gaze_x' + s, 'gaze_y' + s, 'pupil' + s)
+
+
+class SampleStore(object):
+    '''One growable, typed NumPy array per data column'''
+
+    def __init__(self, columns, capacity=65536):
+        '''columns: column names, the first one must be the timestamp
+        capacity: number of samples to preallocate memory for'''
+
+        self.columns = list(columns)
+        self.n = 0  # number of samples in the store
+        self.capacity = capacity
+        self.data = {}
+        for col in self.columns:
+            if col == 'timestamp':
+                self.data[col] = np.empty(capacity, dtype=np.int64)
+            else:
+                self.data[col] = np.empty(capacity, dtype=np.float32)
+
+    def __len__(self):
+        return self.n
+
+    def grow(self, capacity):
+        '''Reallocate all columns to hold (at least) capacity samples'''
+
+        # Double the capacity, so the cost of copying is amortized
+        capacity = max(capacity, self.capacity*2)
+        for col in self.columns:
+            new_array = np.empty(capacity, dtype=self.data[col].dtype)
+            new_array[:self.n] = self.data[col][:self.n]
+            self.data[col] = new_array
+        self.capacity = capacity
+
+    def append(self, block):
+        '''Append a block of samples
+
+        block: 2-D array, one row per sample, one column per data column'''
+
+        m = block.shape[0]
+        if self.n + m > self.capacity:
+            self.grow(self.n + m)
+        for i, col in enumerate(self.columns):
+            self.data[col][self.n:self.n + m] = block[:, i]
+        self.n += m
+
+    def column(self, col):
+        '''Return a view of a column (valid until more samples are added)'''
+
+        return self.data[col][:self.n]
+
+    def to_dataframe(self, start=0, stop=None):
+        '''Return a data frame of the samples in [start, stop); the data
+        frame shares memory with the store, so no data is copied'''
+
+        if stop is None:
+            stop = self.n
+        return pd.DataFrame({col: self.data[col][start:stop]
+                             for col in self.columns}, copy=False)
+
+    def between(self, t_start, t_end):
+        '''Return a data frame of the samples in [t_start, t_end]'''
+
+        timestamp = self.column('timestamp')
+        start = np.searchsorted(timestamp, t_start, side='left')
+        stop = np.searchsorted(timestamp, t_end, side='right')
+        return self.to_dataframe(start, stop)
+
+
+def convert_chunk(rows, ncols):
+    '''Convert a list of sample lines into a 2-D float array, with
+    np.loadtxt() doing the heavy lifting; the missing values (".") become
+    NaN, the trailing flags (e.g., "...") are dropped'''
+
+    text = ''.join(rows)
+    text = text.replace(' .\t', ' nan\t')
+    # Two adjacent missing values share a tab ("\t.\t.\t"), so a single
+    # pass skips the second one; replace until there are none left
+    while '\t.\t' in text:
+        text = text.replace('\t.\t', '\tnan\t')
+    text = text.replace(' .\n', ' nan\n').replace('\t.\n', '\tnan\n')
+    return np.loadtxt(io.StringIO(text), usecols=range(ncols), ndmin=2)
+
+
+def load_samples(asc, columns=None, chunk_size=65536):
+    '''Load the samples in an ASC file into a SampleStore
+
+    asc: path to an ASC file, or any iterable of text lines
+    columns: column names; None (default) to read the column layout from
+    the SAMPLES line in the ASC file (monocular if there is none)
+    chunk_size: number of sample lines to convert at a time'''
+
+    if isinstance(asc, str):
+        with open(asc, 'r') as lines:
+            return _load_lines(lines, columns, chunk_size)
+    return _load_lines(asc, columns, chunk_size)
+
+
+def _load_lines(lines, columns, chunk_size):
+    '''Collect sample lines in chunks and add them to the store'''
+
+    store = None
+    if columns is not None:
+        store = SampleStore(columns, chunk_size)
+    ncols = 0 if store is None else len(store.columns)
+    rows = []
+    for line in lines:
+        # Sample lines always start with timestamps
+        if line[:1].isdigit():
+            if store is None:
+                store = SampleStore(MONOCULAR, chunk_size)
+                ncols = len(MONOCULAR)
+            rows.append(line)
+            if len(rows) == chunk_size:
+                store.append(convert_chunk(rows, ncols))
+                rows = []
+
+        # The SAMPLES line tells us what data columns are available
+        elif columns is None and line.startswith('SAMPLES'):
+            layout = sample_columns(line)
+            if store is None:
+                store = SampleStore(layout, chunk_size)
+                ncols = len(layout)
+            elif layout != store.columns:
+                raise ValueError('The sample layout changed from %s to %s'
+                                 % (store.columns, layout))
+
+    if rows:
+        store.append(convert_chunk(rows, ncols))
+    if store is None:
+        store = SampleStore(MONOCULAR if columns is None else columns, 0)
+
+    return store
@@ -0,0 +1,135 @@
+# Filename: session_cache.py
+# Author: Zhiguo Wang
+# Date: 10/18/2026
+#
+# Description:
+# A persistent cache of parsed sessions. The first time an EDF data file
+# is loaded, the session returned by edf_reader.read_edf() is saved next to
+# the EDF, in a folder with one .npy file per column (e.g., zw.edf.cache/).
+# Later runs memory-map the .npy files, which takes milliseconds. The cache
+# is keyed by the content hash of the EDF and the parser version, so it is
+# rebuilt automatically when the EDF changes or the parser is updated.
+#
+# Usage:
+# from session_cache import load_session
+# session = load_session('Picture/results/zw/zw.edf')
+# fix_x = session['fixations']['x']
+
+import os
+import json
+import shutil
+import hashlib
+import numpy as np
+from edf_reader import read_edf
+
+# Bump this number whenever a change in edf_reader.py, asc_parser.py or
+# sample_store.py changes the parsed data, to invalidate existing caches
+PARSER_VERSION = 1
+
+
+def file_hash(filename):
+    '''SHA-1 hash of the content of a file'''
+
+    sha1 = hashlib.sha1()
+    with open(filename, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            sha1.update(block)
+    return sha1.hexdigest()
+
+
+def cache_dir(edf_file):
+    '''The cache folder of an EDF data file'''
+
+    return edf_file + '.cache'
+
+
+def read_meta(edf_file):
+    '''Read the meta data of the cache, None if there is no cache'''
+
+    meta_file = os.path.join(cache_dir(edf_file), 'meta.json')
+    try:
+        with open(meta_file, 'r') as f:
+            return json.load(f)
+    except (IOError, ValueError):
+        return None
+
+
+def cache_is_valid(edf_file, meta, samples):
+    '''Check if the cache matches the EDF data file and the parser'''
+
+    if meta is None or meta['parser_version'] != PARSER_VERSION:
+        return False
+    if samples and not meta['samples']:
+        return False
+    st = os.stat(edf_file)
+    # Skip hashing if the file size and modification time are unchanged
+    if st.st_size == meta['size'] and st.st_mtime_ns == meta['mtime_ns']:
+        return True
+    if file_hash(edf_file) != meta['sha1']:
+        return False
+
+    # Same content, but the file was touched (e.g., copied); update the
+    # modification time so we do not hash the file again next time
+    meta['size'], meta['mtime_ns'] = st.st_size, st.st_mtime_ns
+    with open(os.path.join(cache_dir(edf_file), 'meta.json'), 'w') as f:
+        json.dump(meta, f, indent=1)
+    return True
+
+
+def save_session(edf_file, session, samples):
+    '''Save a session in the cache folder, one .npy file per column'''
+
+    st = os.stat(edf_file)
+    meta = {'parser_version': PARSER_VERSION,
+            'sha1': file_hash(edf_file),
+            'size': st.st_size,
+            'mtime_ns': st.st_mtime_ns,
+            'samples': samples,
+            'tables': {}}
+
+    # Write to a temporary folder first, so an interrupted run never
+    # leaves a half-written cache behind
+    tmp_dir = cache_dir(edf_file) + '.tmp'
+    if os.path.exists(tmp_dir):
+        shutil.rmtree(tmp_dir)
+    os.mkdir(tmp_dir)
+    for table, columns in session.items():
+        meta['tables'][table] = list(columns)
+        for col, values in columns.items():
+            np.save(os.path.join(tmp_dir, '%s.%s.npy' % (table, col)),
+                    np.ascontiguousarray(values))
+    with open(os.path.join(tmp_dir, 'meta.json'), 'w') as f:
+        json.dump(meta, f, indent=1)
+
+    if os.path.exists(cache_dir(edf_file)):
+        shutil.rmtree(cache_dir(edf_file))
+    os.rename(tmp_dir, cache_dir(edf_file))
+
+
+def load_cached(edf_file, meta):
+    '''Memory-map the columns in the cache folder'''
+
+    session = {}
+    for table, columns in meta['tables'].items():
+        session[table] = {}
+        for col in columns:
+            npy_file = os.path.join(cache_dir(edf_file),
+                                    '%s.%s.npy' % (table, col))
+            session[table][col] = np.load(npy_file, mmap_mode='r')
+    return session
+
+
+def load_session(edf_file, samples=True):
+    '''Load a session from the cache, (re)build the cache if needed
+
+    samples: set to False if you only need the events and messages'''
+
+    meta = read_meta(edf_file)
+    if not cache_is_valid(edf_file, meta, samples):
+        save_session(edf_file, read_edf(edf_file, samples), samples)
+        meta = read_meta(edf_file)
+
+    session = load_cached(edf_file, meta)
+    if not samples:
+        session.pop('samples', None)
+    return session
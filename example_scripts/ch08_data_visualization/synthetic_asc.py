@@ -0,0 +1,120 @@
+# Filename: synthetic_asc.py
+# Author: Zhiguo Wang
+# Date: 10/18/2026
+#
+# Description:
+# Write a synthetic ASC file that mimics the output of edf2asc, so the
+# parsing routines can be benchmarked on recordings of any length
+# without access to an EyeLink tracker.
+
+import random
+
+
+def write_synthetic_asc(filename, n_trials=10, trial_duration=8000,
+                        rate=1000, binocular=False, seed=0):
+    '''Write a synthetic ASC file with samples, events, and messages
+
+    filename: name of the ASC file to write
+    n_trials: number of trials; each trial starts with a SYNCTIME message
+    and ends with a blank_screen message, as in the Picture example
+    trial_duration: trial duration, in ms
+    rate: sampling rate, in Hz
+    binocular: write binocular (True) or monocular (False) samples
+    seed: seed for the random number generator'''
+
+    rnd = random.Random(seed)
+    # The sample interval, in ms; at 2000 Hz it is 0.5 ms, so the time is
+    # kept in float ms, and written out as whole ms, as edf2asc does
+    # (without the -ftime option)
+    step = 1000.0/rate
+    eyes = ['L', 'R'] if binocular else ['R']
+    t = 80753943
+
+    asc = open(filename, 'w')
+    asc.write('** CONVERTED FROM synthetic.edf\n')
+    asc.write('** RECORDED BY synthetic_asc.py\n**\n\n')
+    asc.write('MSG\t%d DISPLAY_COORDS 0 0 1919 1079\n' % t)
+    for trial in range(n_trials):
+        t += 1500
+        asc.write('MSG\t%d TRIALID %d\n' % (t, trial))
+        asc.write('MSG\t%d GAZE_COORDS 0.00 0.00 1919.00 1079.00\n' % t)
+        asc.write('START\t%d \t%s\tSAMPLES\tEVENTS\n' % (t, '\t'.join(
+            'LEFT' if e == 'L' else 'RIGHT' for e in eyes)))
+        asc.write('SAMPLES\tGAZE\t%s\tRATE\t%7.2f\tTRACKING\tCR\tFILTER\t2\n'
+                  % ('\t'.join('LEFT' if e == 'L' else 'RIGHT'
+                               for e in eyes), rate))
+        t += 60
+        asc.write('MSG\t%d -3 SYNCTIME\n' % t)
+        asc.write('MSG\t%d -3 !V DRAW_LIST ../../runtime/dataviewer/zw/'
+                  'graphics/VC_%d.vcl\n' % (t, trial % 8 + 1))
+
+        trial_end = t + trial_duration
+        gx, gy = 960.0, 540.0
+        while t < trial_end:
+            # A fixation, followed by a saccade to a new location
+            fix_dur = rnd.randint(150, 400)
+            pupil = rnd.uniform(700, 1000)
+            for e in eyes:
+                asc.write('SFIX %s   %d\n' % (e, t))
+            fix_start = t
+            for i in range(n_samples(fix_dur, rate)):
+                _write_sample(asc, t, eyes, gx + rnd.gauss(0, 2),
+                              gy + rnd.gauss(0, 2), pupil)
+                t += step
+            for e in eyes:
+                asc.write('EFIX %s   %d\t%d\t%d\t%7.1f\t%7.1f\t%7d\n' %
+                          (e, fix_start, t - step, fix_dur, gx, gy, pupil))
+
+            sac_dur = rnd.randint(20, 50)
+            nx, ny = rnd.uniform(0, 1919), rnd.uniform(0, 1079)
+            for e in eyes:
+                asc.write('SSACC %s  %d\n' % (e, t))
+            sac_start = t
+            for i in range(n_samples(sac_dur, rate)):
+                r = i*step/sac_dur
+                _write_sample(asc, t, eyes, gx + (nx - gx)*r,
+                              gy + (ny - gy)*r, pupil)
+                t += step
+            amp = ((nx - gx)**2 + (ny - gy)**2)**0.5/35.0
+            for e in eyes:
+                asc.write('ESACC %s  %d\t%d\t%d\t%7.1f\t%7.1f\t%7.1f\t'
+                          '%7.1f\t%7.2f\t%7d\n' %
+                          (e, sac_start, t - step, sac_dur, gx, gy, nx, ny,
+                           amp, amp*40))
+            gx, gy = nx, ny
+
+            # An occasional blink, with missing samples
+            if rnd.random() < 0.05:
+                blk_dur = rnd.randint(80, 150)
+                for e in eyes:
+                    asc.write('SBLINK %s %d\n' % (e, t))
+                blk_start = t
+                for i in range(n_samples(blk_dur, rate)):
+                    _write_sample(asc, t, eyes, None, None, 0.0)
+                    t += step
+                for e in eyes:
+                    asc.write('EBLINK %s %d\t%d\t%d\n' %
+                              (e, blk_start, t - step, blk_dur))
+
+        asc.write('MSG\t%d -5 blank_screen\n' % t)
+        t += 25
+        asc.write('END\t%d \tSAMPLES\tEVENTS\tRES\t  64.78\t  64.34\n' % t)
+        t += 50
+        asc.write('MSG\t%d TRIAL_RESULT 0\n' % t)
+    asc.close()
+
+
+def n_samples(duration, rate):
+    '''Number of samples in an event lasting duration (ms), at least one'''
+
+    return max(int(round(duration*rate/1000.0)), 1)
+
+
+def _write_sample(asc, t, eyes, x, y, pupil):
+    '''Write a sample line; x and y are None for missing samples'''
+
+    if x is None:
+        gaze = '\t   .\t   .\t    0.0' * len(eyes)
+    else:
+        gaze = '\t%7.1f\t%7.1f\t%7.1f' % (x, y, pupil) * len(eyes)
+    asc.write('%d%s\t...\n' % (t, gaze))
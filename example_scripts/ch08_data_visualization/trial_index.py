@@ -0,0 +1,151 @@
+# Filename: trial_index.py
+# Author: Zhiguo Wang
+# Date: 10/18/2026
+#
+# Description:
+# Random access to the trials in a large ASC file. In one fast pass over
+# the (memory-mapped) file, we record the byte offsets of the TRIALID,
+# SYNCTIME, TRIAL_RESULT, and any custom marker messages, and save them in
+# a sidecar file (e.g., zw.asc.idx). To read a trial, we look up its byte
+# range in the index and parse that part of the file only.
+#
+# Usage:
+# from trial_index import read_trial, trial_samples
+# events = read_trial('Picture/results/zw/zw.asc', 4)  # trial # 4
+# samples = trial_samples('Picture/results/zw/zw.asc', 4)  # a SampleStore
+
+import os
+import json
+import mmap
+from asc_parser import parse_asc
+from sample_store import load_samples
+
+# Messages to index by default; add your own markers as needed
+MARKERS = ['TRIALID', 'SYNCTIME', 'TRIAL_RESULT', 'blank_screen']
+
+
+def index_file(asc_file):
+    '''The sidecar file that stores the index'''
+
+    return asc_file + '.idx'
+
+
+def build_index(asc_file, markers=MARKERS):
+    '''Scan the ASC file, return the index, i.e., a dict with the byte
+    offset and timestamp of each marker message, and the byte offset of
+    each SAMPLES line (which tells us the layout of the sample data)'''
+
+    index = {'markers': list(markers),
+             'messages': {m: [] for m in markers},
+             'samples_lines': []}
+    st = os.stat(asc_file)
+    index['size'], index['mtime_ns'] = st.st_size, st.st_mtime_ns
+    if st.st_size == 0:
+        return index
+
+    encoded = [(m, m.encode()) for m in markers]
+    with open(asc_file, 'rb') as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            # mmap.find() jumps from one MSG line to the next at memchr
+            # speed, so the sample lines are never looked at in Python
+            pos = 0 if mm[:3] == b'MSG' else mm.find(b'\nMSG') + 1
+            while pos > 0 or mm[:3] == b'MSG':
+                eol = mm.find(b'\n', pos)
+                if eol < 0:
+                    eol = len(mm)
+                line = mm[pos:eol]
+                for m, m_bytes in encoded:
+                    if m_bytes in line:
+                        # MSG	80790106 -3 SYNCTIME
+                        t = int(line.split(None, 2)[1])
+                        index['messages'][m].append((pos, t))
+                pos = mm.find(b'\nMSG', eol) + 1
+                if pos == 0:
+                    break
+
+            # The SAMPLES lines, at the start of each recording block
+            pos = mm.find(b'\nSAMPLES\t')
+            while pos >= 0:
+                index['samples_lines'].append(pos + 1)
+                pos = mm.find(b'\nSAMPLES\t', pos + 1)
+        finally:
+            mm.close()
+
+    return index
+
+
+def load_index(asc_file, markers=MARKERS):
+    '''Load the index from the sidecar file; the index is (re)built, and
+    saved, if the ASC file has changed or a marker is missing'''
+
+    st = os.stat(asc_file)
+    try:
+        with open(index_file(asc_file), 'r') as f:
+            index = json.load(f)
+        if (index['size'] == st.st_size and
+                index['mtime_ns'] == st.st_mtime_ns and
+                set(markers) <= set(index['markers'])):
+            return index
+    except (IOError, ValueError, KeyError):
+        pass
+
+    index = build_index(asc_file, markers)
+    with open(index_file(asc_file), 'w') as f:
+        json.dump(index, f)
+    return index
+
+
+def trial_range(index, trial, start='SYNCTIME', end='blank_screen'):
+    '''Return the byte offsets (start, end) of a trial, i.e., from the
+    n-th "start" message to the first "end" message that follows it;
+    trial numbers start from 1, as in the ch08 scripts'''
+
+    starts = index['messages'][start]
+    if not 1 <= trial <= len(starts):
+        raise IndexError('Trial # %d not found, the file has %d trials'
+                         % (trial, len(starts)))
+    offset = starts[trial - 1][0]
+    for end_offset, t in index['messages'][end]:
+        if end_offset > offset:
+            return offset, end_offset
+    raise IndexError('No %s message after trial # %d' % (end, trial))
+
+
+def trial_lines(asc_file, trial, start='SYNCTIME', end='blank_screen'):
+    '''Return the lines of a trial, from the "start" message to the
+    "end" message (inclusive); the last SAMPLES line before the trial is
+    added at the top, so the sample layout is known'''
+
+    markers = list(MARKERS) + [m for m in (start, end) if m not in MARKERS]
+    index = load_index(asc_file, markers)
+    offset, end_offset = trial_range(index, trial, start, end)
+    header = [o for o in index['samples_lines'] if o < offset]
+
+    with open(asc_file, 'rb') as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            # the "end" message line is included
+            stop = mm.find(b'\n', end_offset)
+            stop = len(mm) if stop < 0 else stop + 1
+            text = mm[offset:stop]
+            if header:
+                text = mm[header[-1]:mm.find(b'\n', header[-1]) + 1] + text
+        finally:
+            mm.close()
+
+    return text.decode().splitlines(True)
+
+
+def read_trial(asc_file, trial, start='SYNCTIME', end='blank_screen',
+               samples=True):
+    '''Parse a trial, return a list of records (see asc_parser.py)'''
+
+    return list(parse_asc(trial_lines(asc_file, trial, start, end),
+                          samples=samples))
+
+
+def trial_samples(asc_file, trial, start='SYNCTIME', end='blank_screen'):
+    '''Load the samples of a trial into a SampleStore'''
+
+    return load_samples(trial_lines(asc_file, trial, start, end))
@@ -0,0 +1,168 @@
+# Filename: trial_render.py
+# Author: Zhiguo Wang
+# Date: 10/18/2026
+#
+# Description:
+# Render the scan path and the heatmap of each trial in parallel. The ASC
+# file is first segmented into per-trial fixation payloads (from SYNCTIME
+# to blank_screen); each payload is handed over to a process pool as soon
+# as the trial has been parsed, so the first images are saved while the
+# rest of the file is still being read.
+#
+# Usage:
+# python trial_render.py  (edit edf_dir and n_workers below)
+
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from math import sqrt
+from PIL import ImageDraw
+from asc_parser import parse_asc, Fixation
+from fixation_heatmap import fixation_heatmap, blend_heatmap
+from vcl_cache import shared_cache
+
+# Everything we need to render a trial; fixations is a list of
+# (x, y, duration) tuples, ppd is the pixels per degree (x, y)
+Trial = namedtuple('Trial', ['number', 'scn_w', 'scn_h', 'bg_image',
+                             'fixations', 'ppd'])
+
+
+def iter_trials(asc_file, edf_dir):
+    '''Parse the ASC file and yield a Trial at the end of each trial; the
+    trials without a background image or without fixations are skipped'''
+
+    scn_w, scn_h = [-32768, -32768]
+    trial_start = False
+    trial_number = 0
+    bg_image = None
+    fixations = []
+    ppd = []
+    for ev in parse_asc(asc_file, samples=False, events=['EFIX', 'MSG']):
+        if type(ev) is Fixation:
+            if trial_start:
+                fixations.append((ev.x, ev.y, ev.duration))
+                ppd.append((ev.x_res, ev.y_res))
+            continue
+
+        if 'GAZE_COORDS' in ev.text:  # get screen resolution
+            scn_w, scn_h = [int(float(x)) + 1 for x in ev.text.split()[-2:]]
+        if 'SYNCTIME' in ev.text:  # message marking image onset
+            trial_start = True
+            trial_number += 1
+            bg_image = None
+            fixations = []
+            ppd = []
+        if trial_start and 'DRAW_LIST' in ev.text:
+            # MSG 80790106 -3 !V DRAW_LIST ../../runtime/dataviewer/zw/
+            # graphics/VC_1.vcl
+            bg_image = shared_cache.background(edf_dir, ev.text.split()[-1])
+        if trial_start and 'blank_screen' in ev.text:  # image offset
+            trial_start = False
+            # Nothing to draw on, or nothing to draw
+            if bg_image is None:
+                print('no background image in trial # %d, skipped'
+                      % trial_number)
+                continue
+            if not fixations:
+                print('no fixations in trial # %d, skipped' % trial_number)
+                continue
+            ppd_x = sum(p[0] for p in ppd)/len(ppd)
+            ppd_y = sum(p[1] for p in ppd)/len(ppd)
+            yield Trial(trial_number, scn_w, scn_h, bg_image, fixations,
+                        (ppd_x, ppd_y))
+
+
+def draw_scanpath(trial, png_file):
+    '''Draw the scan path on top of the background image'''
+
+    bg = shared_cache.image(trial.bg_image)
+    draw = ImageDraw.Draw(bg)
+    fixations = [(int(x), int(y)) for x, y, d in trial.fixations]
+    fix_duration = [d for x, y, d in trial.fixations]
+    # Draw the scan path
+    draw.line(fixations, fill=(0, 0, 255), width=3)
+    # Draw circles to represent the duration of the fixation
+    for i, d in enumerate(fix_duration):
+        sz = sqrt(d/max(fix_duration)*256)
+        gx, gy = fixations[i]
+        draw.ellipse([(gx-sz, gy-sz), (gx+sz, gy+sz)], fill=(0, 0, 255))
+    bg.save(png_file, 'PNG')
+
+
+def draw_heatmap(trial, png_file, sigma=1.0, alpha=0.5):
+    '''Draw the fixation heatmap (sigma in degrees) on the background'''
+
+    heatmap = fixation_heatmap(trial.fixations, trial.scn_w, trial.scn_h,
+                               sigma=sigma, units='deg', ppd=trial.ppd)
+    bg = shared_cache.image(trial.bg_image)
+    blend_heatmap(heatmap, bg, alpha).save(png_file, 'PNG')
+
+
+def render_trial(trial, kinds, out_dir):
+    '''Render a trial, return the names of the saved PNG files, and the
+    process ID and image cache statistics of the worker; the file names
+    only depend on the trial number, i.e., trial_1.png and
+    heatmap_trial_1.png, as in parse_ASC_4scanpath.py and
+    heatmap_simple.py'''
+
+    png_files = []
+    if 'scanpath' in kinds:
+        png_files.append(os.path.join(out_dir,
+                                      'trial_%d.png' % trial.number))
+        draw_scanpath(trial, png_files[-1])
+    if 'heatmap' in kinds:
+        png_files.append(os.path.join(out_dir,
+                                      'heatmap_trial_%d.png' % trial.number))
+        draw_heatmap(trial, png_files[-1])
+
+    return png_files, os.getpid(), shared_cache.stats()
+
+
+def render_trials(asc_file, edf_dir, out_dir='.',
+                  kinds=('scanpath', 'heatmap'), n_workers=None):
+    '''Render all trials in an ASC file
+
+    kinds: the images to render, 'scanpath' and/or 'heatmap'
+    n_workers: number of worker processes; None to use all CPU cores,
+    1 to render the trials one by one in the current process
+
+    Return a list of saved PNG files (in trial order), and the image
+    cache statistics summed over all worker processes'''
+
+    png_files = []
+    if n_workers == 1:
+        for trial in iter_trials(asc_file, edf_dir):
+            png_files += render_trial(trial, kinds, out_dir)[0]
+        return png_files, shared_cache.stats()
+
+    worker_stats = {}  # the latest cache statistics of each worker
+    with ProcessPoolExecutor(max_workers=n_workers) as pool:
+        # Submit each trial as soon as it is parsed
+        jobs = [pool.submit(render_trial, trial, kinds, out_dir)
+                for trial in iter_trials(asc_file, edf_dir)]
+        for job in jobs:
+            files, pid, stats = job.result()
+            png_files += files
+            worker_stats[pid] = stats
+
+    # The VCL files are parsed in this process, the images are decoded
+    # in the worker processes
+    cache_stats = shared_cache.stats()
+    for key in ['image_hits', 'image_misses', 'evictions', 'n_bytes']:
+        cache_stats[key] += sum(s[key] for s in worker_stats.values())
+
+    return png_files, cache_stats
+
+
+if __name__ == '__main__':
+    edf_dir = 'Picture/results/zw/'  # path to the EDF data file
+    n_workers = 4  # number of worker processes
+    os.system('edf2asc -e -y -res %s' % (edf_dir + 'zw.edf'))  # convert EDF
+
+    t_start = time.time()
+    png_files, cache_stats = render_trials(edf_dir + 'zw.asc', edf_dir,
+                                           n_workers=n_workers)
+    print('Saved %d images in %.2f secs' % (len(png_files),
+                                            time.time() - t_start))
+    print('Image cache: %s' % cache_stats)
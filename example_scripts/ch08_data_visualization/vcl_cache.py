@@ -0,0 +1,119 @@
+# Filename: vcl_cache.py
+# Author: Zhiguo Wang
+# Date: 10/18/2026
+#
+# Description:
+# A least-recently-used (LRU) cache for the background graphics of Data
+# Viewer. The IMGLOAD commands parsed from each VCL file and the decoded
+# RGBA images are kept in memory, so trials that share a background image
+# do not reopen the VCL file or decode the same PNG again. The cache has
+# a size cap (in bytes); the least recently used entries are evicted first.
+#
+# Usage:
+# from vcl_cache import ImageCache
+# cache = ImageCache(max_bytes=256*1024*1024)
+# bg_image = cache.background(edf_dir, vcl_file)  # path to the image
+# img = cache.image(bg_image)  # a copy of the decoded RGBA image
+# print(cache.stats())  # hit and miss counts
+
+from collections import OrderedDict, namedtuple
+from PIL import Image
+
+# 0 IMGLOAD TOP_LEFT  ../../runtime/images/
+# 5495090083862704888.png 0 0 1920 1080
+ImgLoad = namedtuple('ImgLoad', ['position', 'image', 'x', 'y',
+                                 'width', 'height'])
+
+
+def parse_vcl(vcl_file):
+    '''Return the IMGLOAD commands in a VCL file, as ImgLoad tuples'''
+
+    commands = []
+    vcl = open(vcl_file, 'r')
+    for draw_commands in vcl:
+        if 'IMGLOAD' in draw_commands:
+            tmp_list = draw_commands.split()
+            commands.append(ImgLoad(tmp_list[2], tmp_list[3],
+                                    *[int(x) for x in tmp_list[4:8]]))
+    vcl.close()
+
+    return commands
+
+
+class ImageCache(object):
+    '''LRU cache of parsed VCL files and decoded RGBA images'''
+
+    def __init__(self, max_bytes=256*1024*1024):
+        '''max_bytes: size cap of the cache, in bytes'''
+
+        self.max_bytes = max_bytes
+        self.n_bytes = 0
+        self.entries = OrderedDict()  # key -> (value, size in bytes)
+        self.hits = {'vcl': 0, 'image': 0}
+        self.misses = {'vcl': 0, 'image': 0}
+        self.evictions = 0
+
+    def get(self, kind, path, load, size):
+        '''Return a cached item, call load(path) to load it if needed
+
+        kind: 'vcl' or 'image'
+        size: a function returning the size (in bytes) of a loaded item'''
+
+        key = (kind, path)
+        if key in self.entries:
+            self.hits[kind] += 1
+            self.entries.move_to_end(key)  # most recently used
+            return self.entries[key][0]
+
+        self.misses[kind] += 1
+        value = load(path)
+        n_bytes = size(value)
+        # Items larger than the cap are never cached
+        if n_bytes <= self.max_bytes:
+            self.entries[key] = (value, n_bytes)
+            self.n_bytes += n_bytes
+            # Evict the least recently used items
+            while self.n_bytes > self.max_bytes:
+                old_value, old_bytes = self.entries.popitem(last=False)[1]
+                self.n_bytes -= old_bytes
+                self.evictions += 1
+
+        return value
+
+    def imgload(self, vcl_file):
+        '''Return the IMGLOAD commands in a VCL file'''
+
+        return self.get('vcl', vcl_file, parse_vcl,
+                        lambda cmds: 64 + sum(len(c.image) for c in cmds))
+
+    def background(self, edf_dir, vcl_file):
+        '''Return the path to the (last) image loaded in a VCL file; paths in
+        VCL files are relative to the folder of the EDF data file'''
+
+        commands = self.imgload(edf_dir + vcl_file)
+        if not commands:
+            return None
+        return edf_dir + commands[-1].image
+
+    def image(self, img_file):
+        '''Return a copy of a decoded RGBA image, so the caller is free to
+        draw on it'''
+
+        img = self.get('image', img_file,
+                       lambda f: Image.open(f).convert('RGBA'),
+                       lambda im: im.width*im.height*4)
+        return img.copy()
+
+    def stats(self):
+        '''Return the hit and miss counts, and the size of the cache'''
+
+        return {'vcl_hits': self.hits['vcl'],
+                'vcl_misses': self.misses['vcl'],
+                'image_hits': self.hits['image'],
+                'image_misses': self.misses['image'],
+                'evictions': self.evictions,
+                'n_bytes': self.n_bytes}
+
+
+# A cache shared by all the code running in the current process
+shared_cache = ImageCache()